@@ -0,0 +1,113 @@
+"""
+Compares the FAISS index types of the index factory on synthetic embeddings.
+
+For every corpus size and index type it reports build time, recall@k against
+the exact flat index, single-query p50/p99 latency, serialized index size
+and the resident memory added by building the index. IVF and HNSW indexes
+are measured at each of the given nprobe / efSearch values.
+
+Usage:
+    python -m benchmarks.ann_index --sizes 10000 50000 --dim 768
+    python -m benchmarks.ann_index --sizes 100000 --types flat hnsw --ef-search 32 64 128
+"""
+import os
+import json
+import time
+import argparse
+import numpy as np
+import faiss
+
+from benchmarks.common import percentile, EMBEDDING_DIM
+from modules.workflow.document import index_factory
+
+
+def resident_mb():
+    """Current resident set size of this process in MiB (Linux only, else 0)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return 0.0
+
+
+def clustered_vectors(n, dim, clusters=200, seed=0):
+    """Unit vectors drawn around random centres, roughly like topic-clustered chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def measure(index, queries, truth, k):
+    latencies = []
+    found = 0
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len(set(ids[0]).intersection(truth[i]))
+    return {
+        "recall_at_k": round(found / (len(queries) * k), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def run(sizes, kinds, dim, queries, k, nprobes, ef_searches):
+    results = []
+    for size in sizes:
+        data = clustered_vectors(size + queries, dim, seed=size)
+        corpus, query_vectors = data[:size], data[size:]
+
+        exact = faiss.IndexFlatL2(dim)
+        exact.add(corpus)
+        _, truth = exact.search(query_vectors, k)
+        truth = [set(row) for row in truth]
+        del exact
+
+        for kind in kinds:
+            if not index_factory.can_build(kind, size):
+                continue
+            rss_before = resident_mb()
+            start = time.perf_counter()
+            index = index_factory.build_index(kind, corpus)
+            build_seconds = time.perf_counter() - start
+            base = {
+                "size": size,
+                "type": kind,
+                "factory": index_factory.factory_string(kind, dim, size),
+                "build_seconds": round(build_seconds, 2),
+                "index_mb": round(len(faiss.serialize_index(index)) / 2 ** 20, 1),
+                "rss_added_mb": round(resident_mb() - rss_before, 1),
+            }
+
+            if kind in ("ivf_flat", "ivf_pq"):
+                settings = [("nprobe", value) for value in nprobes]
+            elif kind == "hnsw":
+                settings = [("efSearch", value) for value in ef_searches]
+            else:
+                settings = [(None, None)]
+            for name, value in settings:
+                if name:
+                    faiss.ParameterSpace().set_index_parameter(index, name, value)
+                row = dict(base, **({name: value} if name else {}))
+                row.update(measure(index, query_vectors, truth, k))
+                results.append(row)
+            del index
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--types", nargs="+", default=["flat", "ivf_flat", "ivf_pq", "hnsw"])
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(1)  # single-query latency, as served per request
+    print(json.dumps(run(args.sizes, args.types, args.dim, args.queries, args.k, args.nprobe, args.ef_search), indent=2))
@@ -0,0 +1,60 @@
+"""
+Reports chunk count and embedding volume for different chunking settings.
+
+Embedding volume is the number of characters sent to the embedding model;
+the inflation factor compares it with the raw extracted text, so it shows
+how much the chunk overlap costs in embedding calls.
+
+Usage:
+    python -m benchmarks.chunking --files 3 --pages 200
+    python -m benchmarks.chunking --pdf statute.pdf --settings 10000:3000 4000:400 8000:800
+"""
+import os
+import json
+import argparse
+import tempfile
+
+from benchmarks.common import write_synthetic_pdf
+from modules.workflow.document.datapreprocess import DocumentProcessor, CHUNKING_CONFIG, CHUNK_SIZE, CHUNK_OVERLAP
+
+
+def run(paths, settings):
+    raw_chars = sum(len(page) for doc in DocumentProcessor(paths).extract_pages() for page in doc)
+    results = []
+    for label, chunk_size, chunk_overlap in settings:
+        chunks = list(DocumentProcessor(paths, chunk_size=chunk_size, chunk_overlap=chunk_overlap).iter_chunks())
+        embedded_chars = sum(len(chunk.page_content) for chunk in chunks)
+        results.append({
+            "setting": label,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "chunks": len(chunks),
+            "raw_chars": raw_chars,
+            "embedded_chars": embedded_chars,
+            "inflation": round(embedded_chars / raw_chars, 3) if raw_chars else 0.0,
+        })
+    return results
+
+
+def parse_setting(value):
+    size, overlap = value.split(":")
+    return value, int(size), int(overlap)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="*", help="existing PDFs to chunk instead of synthetic ones")
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=100, help="pages per synthetic PDF")
+    parser.add_argument("--settings", type=parse_setting, nargs="*",
+                        help="extra chunk_size:chunk_overlap settings to compare")
+    args = parser.parse_args()
+
+    settings = [("legacy", CHUNK_SIZE, CHUNK_OVERLAP)]
+    settings += [(category, config["chunk_size"], config["chunk_overlap"]) for category, config in CHUNKING_CONFIG.items()]
+    settings += args.settings or []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.pdf or [write_synthetic_pdf(os.path.join(tmp, f"bundle_{i}.pdf"), args.pages, seed=i)
+                             for i in range(args.files)]
+        print(json.dumps(run(paths, settings), indent=2))
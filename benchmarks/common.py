@@ -0,0 +1,158 @@
+"""Shared helpers for the offline benchmarks (stub embedder, timing utilities)."""
+import time
+import random
+import hashlib
+import threading
+from array import array
+
+EMBEDDING_DIM = 768
+
+
+class RateLimitError(Exception):
+    """Raised by the stub embedder to simulate an HTTP 429 from the remote API."""
+    status_code = 429
+
+
+class StubEmbedder:
+    """
+    Deterministic offline stand-in for a remote embedding API.
+
+    Every text maps to a fixed pseudo-random unit vector derived from its hash.
+    Each call sleeps `latency` seconds plus `per_text_latency` per text, and
+    fails with a RateLimitError with probability `throttle_rate`.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM, latency=0.0, per_text_latency=0.0, throttle_rate=0.0, seed=0):
+        self.dim = dim
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.throttle_rate = throttle_rate
+        self.calls = 0
+        self.texts = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        rng = random.Random(seed)
+        values = [rng.gauss(0.0, 1.0) for _ in range(self.dim)]
+        norm = sum(v * v for v in values) ** 0.5 or 1.0
+        return array("f", (v / norm for v in values)).tolist()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls += 1
+            throttled = self._random.random() < self.throttle_rate
+        time.sleep(self.latency + self.per_text_latency * len(texts))
+        if throttled:
+            raise RateLimitError("429 Resource has been exhausted (e.g. check quota).")
+        with self._lock:
+            self.texts += len(texts)
+        return [self.vector(text) for text in texts]
+
+    def embed_documents(self, texts):
+        return self(texts)
+
+    def embed_query(self, text):
+        return self([text])[0]
+
+
+def install_stub_embeddings(embedder, model_name="stub"):
+    """Makes every embedding backend (and so every category) embed with the given stub."""
+    from modules.workflow.document import embeddings
+    for name in embeddings.EMBEDDING_BACKENDS:
+        embeddings.EMBEDDING_BACKENDS[name] = embeddings.LazyEmbeddings(lambda: embedder, model_name)
+
+
+def percentile(values, pct):
+    """Returns the pct-th percentile of values using nearest-rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+LEGAL_WORDS = (
+    "court appellant respondent section act provision liability contract offence penalty "
+    "evidence witness judgment appeal statute clause tribunal petition order decree bail "
+    "jurisdiction plaintiff defendant damages negligence property custody hearing notice"
+).split()
+
+
+def synthetic_pages(pages, lines_per_page=45, seed=0):
+    """Yields deterministic pages of legal-sounding text, one list of lines per page."""
+    rng = random.Random(seed)
+    for page_no in range(pages):
+        lines = [f"Section {page_no + 1}.{line_no + 1}" if line_no == 0 else
+                 " ".join(rng.choice(LEGAL_WORDS) for _ in range(12)).capitalize() + "."
+                 for line_no in range(lines_per_page)]
+        yield lines
+
+
+def write_synthetic_pdf(path, pages, lines_per_page=45, seed=0):
+    """Writes a minimal text-only PDF (Helvetica, one content stream per page) to path."""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(None)
+    pages_id = add(None)
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for lines in synthetic_pages(pages, lines_per_page, seed):
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        stream = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+        stream = stream.encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_offset)
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+class StubLLM:
+    """
+    Drop-in stand-in for GeminiPro / OllamaModel that blocks for `latency`
+    seconds (like the synchronous SDK clients) and returns a canned answer.
+    """
+
+    latency = 0.5
+    answer = "This is a stubbed legal answer."
+
+    def __init__(self, user_question, model_name=None, *args, **kwargs):
+        self.user_question = user_question
+        self.model_name = model_name
+        self.connection_type = "stub"
+        self.context_stats = {}
+
+    def generate_response(self, retrieved_docs):
+        time.sleep(self.latency)
+        return self.answer, any(retrieved_docs.values())
+
+    def stream_response(self, retrieved_docs):
+        """Yields the canned answer word by word, spreading `latency` across the tokens."""
+        self.context_status = any(retrieved_docs.values())
+        words = self.answer.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            yield word if i == 0 else " " + word
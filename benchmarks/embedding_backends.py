@@ -0,0 +1,116 @@
+"""
+Compares the embedding backends: the remote Gemini model (simulated by the
+stub embedder, with a per-call round trip and a per-text cost) and the local
+ONNX model loaded from --model-dir.
+
+The same synthetic statute text is cut into chunks of every size ingestion
+uses (the CHUNKING_CONFIG sizes, the default size, and the local model's
+MAX_CHUNK_CHARS). For each backend and chunk size it reports ingestion
+throughput (chunks/s and characters/s through the same EmbeddingPipeline
+ingestion uses); for the local model also how many chunks exceeded its token
+limit and were truncated. It also reports single-question latency
+p50/p95/p99 (what every query pays before retrieval). The local backend is
+reported as skipped if onnxruntime/tokenizers or the model files are missing.
+
+Usage:
+    python -m benchmarks.embedding_backends --model-dir models/all-MiniLM-L6-v2
+    python -m benchmarks.embedding_backends --chars 2000000 --queries 200 --remote-latency 0.3 --threads 1 4
+"""
+import json
+import time
+import argparse
+
+from benchmarks.common import StubEmbedder, percentile, synthetic_pages
+from modules.workflow.document.datapreprocess import CHUNK_SIZE, CHUNKING_CONFIG
+from modules.workflow.document.embedding_pipeline import EmbeddingPipeline
+from modules.workflow.document.embeddings import LOCAL_MODEL_DIR
+from modules.workflow.document.local_embeddings import MAX_CHUNK_CHARS
+
+CHUNK_SIZES = sorted({CHUNK_SIZE, MAX_CHUNK_CHARS, *(config["chunk_size"] for config in CHUNKING_CONFIG.values())})
+
+
+def synthetic_text(chars):
+    """Returns at least `chars` characters of synthetic statute text."""
+    lines, length = [], 0
+    for page in synthetic_pages(chars // 2000 + 1):
+        lines.extend(page)
+        length += sum(len(line) + 1 for line in page)
+        if length >= chars:
+            break
+    return "\n".join(lines)[:chars]
+
+
+def synthetic_chunks(text, chunk_size):
+    return [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+
+
+def measure_ingest(embedder, chunks):
+    pipeline = EmbeddingPipeline(embedder)
+    truncated = getattr(embedder, "truncated", None)
+    pipeline.run(chunks)
+    seconds = pipeline.stats["seconds"]
+    result = {
+        "chunk_size": max(len(chunk) for chunk in chunks),
+        "chunks": len(chunks),
+        "chunks_per_second": pipeline.stats["chunks_per_second"],
+        "chars_per_second": round(sum(len(chunk) for chunk in chunks) / seconds) if seconds > 0 else 0,
+        "ingest_seconds": seconds,
+    }
+    if truncated is not None:
+        result["truncated_chunks"] = embedder.truncated - truncated
+    return result
+
+
+def measure_queries(embedder, questions):
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        embedder.embed_query(question)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "query_p50_seconds": round(percentile(latencies, 50), 4),
+        "query_p95_seconds": round(percentile(latencies, 95), 4),
+        "query_p99_seconds": round(percentile(latencies, 99), 4),
+    }
+
+
+def measure(embedder, text, questions, chunk_sizes):
+    return {
+        "ingest": [measure_ingest(embedder, synthetic_chunks(text, size)) for size in chunk_sizes],
+        **measure_queries(embedder, questions),
+    }
+
+
+def run(chars, queries, remote_latency, remote_per_text_latency, model_dir, threads, chunk_sizes=CHUNK_SIZES):
+    text = synthetic_text(chars)
+    questions = [f"What is the penalty under section {i}.{i % 7 + 1} of the act?" for i in range(queries)]
+    remote = StubEmbedder(latency=remote_latency, per_text_latency=remote_per_text_latency)
+    results = {"chars": len(text), "queries": queries,
+               "remote": {"latency": remote_latency, "per_text_latency": remote_per_text_latency,
+                          **measure(remote, text, questions, chunk_sizes)},
+               "local": {"model_dir": model_dir, "max_chunk_chars": MAX_CHUNK_CHARS}}
+
+    try:
+        from modules.workflow.document.local_embeddings import OnnxEmbeddings
+        local = [(count, OnnxEmbeddings(model_dir, threads=count)) for count in threads]
+    except Exception as e:
+        results["local"]["skipped"] = f"{type(e).__name__}: {e}"
+        return results
+    results["local"]["runs"] = [{"threads": count or "all cores", **measure(embedder, text, questions, chunk_sizes)}
+                                for count, embedder in local]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=1_000_000, help="characters of text embedded per chunk size")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=CHUNK_SIZES)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--remote-latency", type=float, default=0.15, help="simulated seconds per remote API call")
+    parser.add_argument("--remote-per-text-latency", type=float, default=0.002, help="simulated seconds per remote text")
+    parser.add_argument("--model-dir", default=LOCAL_MODEL_DIR, help="directory with model.onnx and tokenizer.json")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0],
+                        help="ONNX Runtime intra-op threads to compare (0 = one per core)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.chars, args.queries, args.remote_latency, args.remote_per_text_latency,
+                         args.model_dir, args.threads, args.chunk_sizes), indent=2))
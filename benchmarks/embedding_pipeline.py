@@ -0,0 +1,36 @@
+"""
+Benchmarks EmbeddingPipeline against a local stub embedder.
+
+Usage:
+    python -m benchmarks.embedding_pipeline --chunks 2000 --latency 0.2 --throttle-rate 0.05
+"""
+import argparse
+import json
+
+from benchmarks.common import StubEmbedder
+from modules.workflow.document.embedding_pipeline import EmbeddingPipeline
+
+
+def run(chunks, batch_sizes, concurrencies, latency, per_text_latency, throttle_rate):
+    texts = [f"Section {i}. Synthetic statute text for embedding benchmark." for i in range(chunks)]
+    results = []
+    for batch_size in batch_sizes:
+        for concurrency in concurrencies:
+            stub = StubEmbedder(dim=64, latency=latency, per_text_latency=per_text_latency, throttle_rate=throttle_rate)
+            pipeline = EmbeddingPipeline(stub, batch_size=batch_size, max_concurrency=concurrency, base_delay=0.05, max_delay=0.5)
+            pipeline.run(texts)
+            results.append({"batch_size": batch_size, "max_concurrency": concurrency, "api_calls": stub.calls, **pipeline.stats})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 25, 100])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated seconds per API call")
+    parser.add_argument("--per-text-latency", type=float, default=0.0005, help="simulated seconds per embedded text")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="probability that a call returns 429")
+    args = parser.parse_args()
+    print(json.dumps(run(args.chunks, args.batch_sizes, args.concurrency, args.latency,
+                         args.per_text_latency, args.throttle_rate), indent=2))
@@ -0,0 +1,110 @@
+"""
+Microbenchmark of the second retrieval stage (MMR re-ranking) on synthetic
+candidate pools.
+
+For every pool size it times the retriever's re-rank step (threshold scores
+from combined_relevance, MMR over the rank-fused relevance) with its
+defaults (two categories with quotas, final k), and LangChain's
+maximal_marginal_relevance choosing the same k from the same pool (no quotas
+or threshold) for reference. Pools mimic over-fetched chunks: clusters of
+near-duplicate vectors around a few topics.
+
+Usage:
+    python -m benchmarks.mmr_rerank
+    python -m benchmarks.mmr_rerank --sizes 50 200 1000 --dim 768 --repeats 200
+"""
+import json
+import time
+import argparse
+import numpy as np
+
+from benchmarks.common import percentile, EMBEDDING_DIM
+from modules.workflow.retrieval.reranker import (unit_rows, reciprocal_rank_fusion, combined_relevance, mmr_rerank,
+                                                  MMR_LAMBDA, MIN_SCORE)
+from modules.workflow.retrieval.vector_retriever import FINAL_K, CATEGORY_QUOTAS
+
+TOPICS = 8          # clusters of overlapping chunks in a pool
+DUPLICATE_NOISE = 0.05
+
+
+def synthetic_pool(size, dim, seed=0):
+    """Returns (query, unit candidate vectors, cosine to the query, BM25 scores, category of each candidate)."""
+    rng = np.random.default_rng(seed)
+    query = unit_rows(rng.standard_normal(dim))
+    topics = unit_rows(rng.standard_normal((TOPICS, dim)) + query * rng.uniform(0.5, 2.0, (TOPICS, 1)))
+    vectors = unit_rows(topics[rng.integers(0, TOPICS, size)] + DUPLICATE_NOISE * rng.standard_normal((size, dim)))
+    lexical = np.where(rng.random(size) < 0.3, rng.uniform(0, 12, size), 0.0).astype(np.float32)
+    categories = rng.integers(0, 2, size)
+    return query, vectors, vectors @ query, lexical, categories
+
+
+def ranks(scores, present):
+    """1-based rank of every candidate by descending score, 0 where present is False."""
+    order = np.argsort(-np.where(present, scores, -np.inf), kind="stable")
+    rank = np.empty(len(scores), dtype=np.int64)
+    rank[order] = np.arange(1, len(scores) + 1)
+    return np.where(present, rank, 0)
+
+
+def timed(func, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+    return result, latencies
+
+
+def summary(latencies):
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run(sizes, dim, repeats, k):
+    from langchain_community.vectorstores.utils import maximal_marginal_relevance
+
+    quotas = list(CATEGORY_QUOTAS.values())[:2]
+    results = []
+    for size in sizes:
+        query, vectors, dense, lexical, categories = synthetic_pool(size, dim, seed=size)
+        groups = np.zeros(size, dtype=np.int64)
+        # Rank fusion happens while the pools are built, before the timed re-rank step
+        fused = reciprocal_rank_fusion(ranks(dense, np.ones(size, dtype=bool)), ranks(lexical, lexical > 0))
+
+        def rerank():
+            scores = combined_relevance(dense, lexical, groups)
+            return mmr_rerank(fused / fused.max(), vectors, k, categories, quotas, groups, MMR_LAMBDA, MIN_SCORE,
+                              scores=scores)
+
+        selected, ours = timed(rerank, repeats)
+        _, reference = timed(lambda: maximal_marginal_relevance(query, vectors, MMR_LAMBDA, k), repeats)
+        top_k = np.argsort(-dense)[:k]
+        results.append({
+            "pool_size": size,
+            "selected": len(selected),
+            "mmr_rerank": summary(ours),
+            "langchain_mmr": summary(reference),
+            # Redundancy of the chosen set: mean pairwise cosine (lower is more diverse)
+            "mean_similarity_mmr": _mean_similarity(vectors[selected]),
+            "mean_similarity_top_k": _mean_similarity(vectors[top_k]),
+        })
+    return results
+
+
+def _mean_similarity(vectors):
+    if len(vectors) < 2:
+        return 0.0
+    similarity = vectors @ vectors.T
+    return round(float(similarity[~np.eye(len(vectors), dtype=bool)].mean()), 3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 250, 500, 1000])
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--k", type=int, default=FINAL_K)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.dim, args.repeats, args.k), indent=2))
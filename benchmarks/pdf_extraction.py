@@ -0,0 +1,54 @@
+"""
+Compares serial and process-pool PDF extraction in DocumentProcessor.
+
+Generates synthetic PDFs (or uses the PDFs given with --pdf), checks that the
+parallel output matches the serial output exactly and reports pages/sec.
+
+Usage:
+    python -m benchmarks.pdf_extraction --files 4 --pages 200 --workers 1 2 4 8
+    python -m benchmarks.pdf_extraction --pdf bundle1.pdf bundle2.pdf
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+from benchmarks.common import write_synthetic_pdf
+from modules.workflow.document.datapreprocess import DocumentProcessor
+
+
+def run(paths, worker_counts):
+    baseline = None
+    results = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        pages = DocumentProcessor(paths, workers=workers).extract_pages()
+        elapsed = time.perf_counter() - start
+        page_count = sum(len(doc) for doc in pages)
+        if baseline is None:
+            baseline = pages
+        results.append({
+            "workers": workers,
+            "pages": page_count,
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(page_count / elapsed, 1) if elapsed > 0 else 0.0,
+            "matches_serial": pages == baseline,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="*", help="existing PDFs to extract instead of synthetic ones")
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=150, help="pages per synthetic PDF")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    # The serial extractor always runs first and is the reference output
+    worker_counts = [1] + [w for w in args.workers if w != 1]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.pdf or [write_synthetic_pdf(os.path.join(tmp, f"bundle_{i}.pdf"), args.pages, seed=i)
+                             for i in range(args.files)]
+        print(json.dumps(run(paths, worker_counts), indent=2))
@@ -0,0 +1,93 @@
+"""
+Load-tests the /query/ route with stubbed retrieval and a stubbed blocking LLM.
+
+Sends --requests concurrent queries through the real FastAPI app (in-process,
+via httpx's ASGI transport) and compares the wall-clock time with what the
+same requests would take if they ran one at a time.
+
+With --stream the queries run through the streaming handler behind
+/query/stream instead, and time-to-first-token is reported next to the total
+latency.
+
+Usage:
+    python -m benchmarks.query_concurrency --requests 32 --llm-latency 0.5 --retrieval-latency 0.05
+    python -m benchmarks.query_concurrency --requests 32 --stream
+"""
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import StubLLM, StubEmbedder, install_stub_embeddings, percentile
+from modules.fastapi.schemas.query import QueryRequest
+from modules.fastapi.services import model_handler
+
+
+def install_stubs(retrieval_latency, llm_latency):
+    def retrieve_faiss(user_question, db_names, query_vectors=None):
+        time.sleep(retrieval_latency)
+        return {db_name: [] for db_name in db_names}
+
+    StubLLM.latency = llm_latency
+    model_handler.VectorRetriever.retrieve_faiss = staticmethod(retrieve_faiss)
+    model_handler.GeminiPro = StubLLM
+    install_stub_embeddings(StubEmbedder())
+    model_handler.log_interaction = lambda **kwargs: None
+
+
+async def fire(requests, stream=False):
+    from fastapi_server import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            body = {
+                "question": f"What is the punishment under section {i}?",
+                "model_type": "Gemini",
+                "model_name": "stub",
+            }
+            start = time.perf_counter()
+            if not stream:
+                response = await client.post("/query/", json=body)
+                response.raise_for_status()
+                return time.perf_counter() - start, None
+
+            # httpx's ASGI transport buffers whole responses, so the SSE
+            # generator behind /query/stream is consumed directly
+            first_token = None
+            async for event in model_handler.stream_query(QueryRequest(**body)):
+                if first_token is None and event.startswith("event: token"):
+                    first_token = time.perf_counter() - start
+            return time.perf_counter() - start, first_token
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - start, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--retrieval-latency", type=float, default=0.05)
+    parser.add_argument("--stream", action="store_true", help="query /query/stream and report time-to-first-token")
+    args = parser.parse_args()
+
+    install_stubs(args.retrieval_latency, args.llm_latency)
+    wall, results = asyncio.run(fire(args.requests, args.stream))
+    latencies = [total for total, _ in results]
+    first_tokens = [first for _, first in results if first is not None]
+    serial = args.requests * (args.llm_latency + args.retrieval_latency)
+    print(json.dumps({
+        "requests": args.requests,
+        "stream": args.stream,
+        "p50_first_token_seconds": round(percentile(first_tokens, 50), 3) if first_tokens else None,
+        "wall_seconds": round(wall, 3),
+        "serial_seconds_estimate": round(serial, 3),
+        "speedup_vs_serial": round(serial / wall, 1) if wall > 0 else 0.0,
+        "p50_seconds": round(percentile(latencies, 50), 3),
+        "p95_seconds": round(percentile(latencies, 95), 3),
+        "throughput_rps": round(args.requests / wall, 1) if wall > 0 else 0.0,
+    }, indent=2))
@@ -0,0 +1,270 @@
+"""
+Offline end-to-end benchmark of the ingestion and query paths.
+
+Generates synthetic legal PDFs, then runs the real code on them with the
+deterministic StubEmbedder and StubLLM in place of the remote APIs:
+
+  * extraction  - DocumentProcessor.extract_pages, reported as pages/sec
+  * ingestion   - StreamingIngestor into the Laws and Case indexes, chunks/sec
+  * index       - size on disk and resident memory added by loading it
+  * query       - /query/ through the FastAPI app (in-process) at each
+                  concurrency level, with p50/p95/p99 latency and throughput
+
+Everything runs in a temporary working directory, so the local vector_store/,
+cache/ and logs/ are left alone. Results are printed and written as JSON; with
+--baseline the headline numbers are compared against an earlier result file.
+
+Usage:
+    python -m benchmarks.run_all
+    python -m benchmarks.run_all --files 4 --pages 100 --concurrency 1 8 32 --queries 200
+    python -m benchmarks.run_all --output after.json --baseline benchmarks/results/before.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+import httpx
+
+from benchmarks.common import StubEmbedder, StubLLM, install_stub_embeddings, percentile, write_synthetic_pdf
+from benchmarks.ann_index import resident_mb
+from modules.workflow.document.datapreprocess import DocumentProcessor
+from modules.workflow.document.ingest_pipeline import StreamingIngestor
+from modules.workflow.document.vector_db import VectorStore
+from modules.fastapi.services import model_handler
+from modules.fastapi.services.answer_cache import answer_cache
+from modules.utils.log_writer import log_writer
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+CATEGORIES = ("Laws", "Case")
+
+# Headline numbers compared with --baseline, and whether higher is better
+HEADLINE = {
+    "extraction.pages_per_second": True,
+    "ingestion.chunks_per_second": True,
+    "index.disk_mb": False,
+    "index.rss_mb": False,
+}
+
+
+def install_stubs(embedder, llm_latency):
+    """Points every module that embeds or generates at the offline stubs."""
+    StubLLM.latency = llm_latency
+    install_stub_embeddings(embedder)
+    model_handler.GeminiPro = StubLLM
+
+
+def generate_pdfs(folder, files, pages, lines_per_page):
+    """Writes `files` synthetic PDFs per category; returns {category: [path, ...]}."""
+    paths = {}
+    for c, category in enumerate(CATEGORIES):
+        paths[category] = [
+            write_synthetic_pdf(os.path.join(folder, f"{category.lower()}_{i}.pdf"), pages, lines_per_page,
+                                seed=c * 1000 + i)
+            for i in range(files)
+        ]
+    return paths
+
+
+def bench_extraction(paths, workers):
+    all_paths = [path for category in CATEGORIES for path in paths[category]]
+    start = time.perf_counter()
+    pages = sum(len(doc) for doc in DocumentProcessor(all_paths, workers=workers).extract_pages())
+    elapsed = time.perf_counter() - start
+    return {
+        "files": len(all_paths),
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def bench_ingestion(paths, workers):
+    per_category = {}
+    for category in CATEGORIES:
+        ingestor = StreamingIngestor(category, workers=workers)
+        if not ingestor.run([(os.path.basename(path), path) for path in paths[category]]):
+            raise RuntimeError(f"Ingestion into {category} failed; see logs/error_log.txt in the work directory.")
+        per_category[category] = ingestor.stats
+    chunks = sum(stats["chunks"] for stats in per_category.values())
+    seconds = sum(stats["seconds"] for stats in per_category.values())
+    return {
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "chunks_per_second": round(chunks / seconds, 1) if seconds > 0 else 0.0,
+        "categories": per_category,
+    }
+
+
+def bench_index():
+    """Size of the published indexes on disk, and the memory their first load adds."""
+    disk_bytes = 0
+    for category in CATEGORIES:
+        for root, _, files in os.walk(VectorStore.index_path(category)):
+            disk_bytes += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+
+    VectorStore.invalidate()
+    rss_before = resident_mb()
+    start = time.perf_counter()
+    vectors = 0
+    for category in CATEGORIES:
+        vectors += VectorStore.load_VDB(category).index.ntotal
+    elapsed = time.perf_counter() - start
+    return {
+        "vectors": vectors,
+        "disk_mb": round(disk_bytes / 2 ** 20, 2),
+        "rss_mb": round(resident_mb() - rss_before, 2),
+        "load_seconds": round(elapsed, 3),
+    }
+
+
+async def bench_queries(concurrency_levels, queries):
+    from fastapi_server import app
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for concurrency in concurrency_levels:
+            # Unique questions and an empty answer cache, so every query is retrieved and generated
+            answer_cache.clear()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(i):
+                body = {
+                    "question": f"What is the penalty for breach of contract under section {concurrency}.{i}?",
+                    "model_type": "Gemini",
+                    "model_name": "stub",
+                }
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/query/", json=body)
+                    response.raise_for_status()
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(one(i) for i in range(queries)))
+            wall = time.perf_counter() - start
+            results.append({
+                "concurrency": concurrency,
+                "queries": queries,
+                "wall_seconds": round(wall, 3),
+                "throughput_qps": round(queries / wall, 1) if wall > 0 else 0.0,
+                "p50_seconds": round(percentile(latencies, 50), 4),
+                "p95_seconds": round(percentile(latencies, 95), 4),
+                "p99_seconds": round(percentile(latencies, 99), 4),
+            })
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(baseline, current):
+    """Percentage change of the headline numbers (and p99 per concurrency level) against a baseline run."""
+    def lookup(result, dotted):
+        value = result
+        for key in dotted.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+
+    pairs = [(name, lookup(baseline, name), lookup(current, name), higher) for name, higher in HEADLINE.items()]
+    baseline_queries = {level["concurrency"]: level for level in baseline.get("query", [])}
+    for level in current.get("query", []):
+        old = baseline_queries.get(level["concurrency"], {})
+        pairs.append((f"query.c{level['concurrency']}.p99_seconds", old.get("p99_seconds"), level["p99_seconds"], False))
+
+    changes = {}
+    for name, old, new, higher in pairs:
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        changes[name] = {
+            "baseline": old,
+            "current": new,
+            "change_pct": round(change, 1),
+            "better": change > 0 if higher else change < 0,
+        }
+    return changes
+
+
+def run(files, pages, lines_per_page, workers, concurrency_levels, queries, embed_latency, llm_latency, keep=False):
+    work_dir = tempfile.mkdtemp(prefix="rag-bench-")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    log_writer.log_dir = os.path.join(work_dir, "logs")
+    try:
+        install_stubs(StubEmbedder(latency=embed_latency), llm_latency)
+        paths = generate_pdfs(work_dir, files, pages, lines_per_page)
+        result = {
+            "environment": environment(),
+            "config": {
+                "files_per_category": files,
+                "pages_per_file": pages,
+                "lines_per_page": lines_per_page,
+                "workers": workers,
+                "embed_latency": embed_latency,
+                "llm_latency": llm_latency,
+            },
+            "extraction": bench_extraction(paths, workers),
+            "ingestion": bench_ingestion(paths, workers),
+            "index": bench_index(),
+            "query": asyncio.run(bench_queries(concurrency_levels, queries)),
+        }
+        log_writer.flush()
+        return result
+    finally:
+        os.chdir(cwd)
+        if keep:
+            print(f"Work directory kept at {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2, help="synthetic PDFs per category (Laws and Case)")
+    parser.add_argument("--pages", type=int, default=50, help="pages per PDF")
+    parser.add_argument("--lines-per-page", type=int, default=45)
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes (default: automatic)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="queries in flight")
+    parser.add_argument("--queries", type=int, default=100, help="queries sent at each concurrency level")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="simulated seconds per embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="simulated seconds per LLM answer")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/run-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary work directory")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output or os.path.join(
+        RESULTS_DIR, f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    ))
+    result = run(args.files, args.pages, args.lines_per_page, args.workers, args.concurrency, args.queries,
+                 args.embed_latency, args.llm_latency, args.keep)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            result["comparison"] = compare(json.load(f), result)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
@@ -0,0 +1,143 @@
+"""
+Measures cold start of the FastAPI server.
+
+Every measurement runs in a fresh interpreter:
+
+  * import        - time to `import fastapi_server`, and which heavy libraries
+                    (LangChain, FAISS, the Gemini and Ollama SDKs, ...) that
+                    import pulled in
+  * first health  - time from launching uvicorn until GET /health answers
+  * ready         - time until /health reports the background warm-up done
+
+The server is started with --cwd as its working directory (a temporary empty
+directory by default, so no indexes are loaded; pass the repository root to
+include loading the local vector_store/). Runs with warm-up enabled and
+disabled (RAG_WARMUP=0) unless --warmup is given.
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 5 --warmup on --cwd .
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_community", "langchain_google_genai",
+                 "google.generativeai", "faiss", "ollama", "PyPDF2", "streamlit")
+HEALTH_TIMEOUT = 120  # seconds to wait for the server before giving up
+POLL_INTERVAL = 0.01
+
+IMPORT_PROBE = f"""
+import sys, json, time
+start = time.perf_counter()
+import fastapi_server
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy_modules": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _env(warmup=True):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env["RAG_WARMUP"] = "1" if warmup else "0"
+    return env
+
+
+def measure_import(cwd):
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=cwd, env=_env(warmup=False),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get_health(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+
+def measure_server(cwd, warmup):
+    """Returns seconds until the first healthy response and until warm-up finished."""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "fastapi_server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=cwd, env=_env(warmup), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        first_health = ready = None
+        health = None
+        while time.perf_counter() - start < HEALTH_TIMEOUT:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            health = _get_health(port)
+            if health is not None:
+                first_health = first_health or time.perf_counter() - start
+                if health["ready"]:
+                    ready = time.perf_counter() - start
+                    break
+            time.sleep(POLL_INTERVAL)
+        return {
+            "first_health_seconds": first_health,
+            "ready_seconds": ready,
+            "warmup_steps": health["warmup"]["steps"] if health else {},
+            "warmup_errors": health["warmup"]["errors"] if health else {},
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _summary(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"median": round(statistics.median(values), 3), "min": round(min(values), 3), "max": round(max(values), 3)}
+
+
+def run(runs, warmup_modes, cwd):
+    imports = [measure_import(cwd) for _ in range(runs)]
+    result = {
+        "runs": runs,
+        "import_seconds": _summary([probe["seconds"] for probe in imports]),
+        "heavy_modules_on_import": imports[-1]["heavy_modules"],
+        "server": {},
+    }
+    for warmup in warmup_modes:
+        samples = [measure_server(cwd, warmup) for _ in range(runs)]
+        result["server"]["warmup" if warmup else "no_warmup"] = {
+            "first_health_seconds": _summary([s["first_health_seconds"] for s in samples]),
+            "ready_seconds": _summary([s["ready_seconds"] for s in samples]),
+            "warmup_steps": samples[-1]["warmup_steps"],
+            "warmup_errors": samples[-1]["warmup_errors"],
+        }
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", choices=["on", "off", "both"], default="both")
+    parser.add_argument("--cwd", help="server working directory (default: a temporary empty directory)")
+    args = parser.parse_args()
+
+    modes = {"on": [True], "off": [False], "both": [True, False]}[args.warmup]
+    with tempfile.TemporaryDirectory(prefix="rag-startup-") as tmp:
+        cwd = os.path.abspath(args.cwd) if args.cwd else tmp
+        print(json.dumps(run(args.runs, modes, cwd), indent=2))
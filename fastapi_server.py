@@ -1,9 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from modules.fastapi.api import upload_law,upload_case, query, list_models, cleanup
-app = FastAPI()
+from modules.fastapi.api import upload_law,upload_case, query, list_models, cleanup, metrics, jobs, health, uploads
+from modules.fastapi.services.warmup import warmup
+from modules.utils.logging_config import configure_logging
+
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Services are imported on first use; preload them and the indexes in the
+    # background so the server accepts requests (and /health) right away
+    warmup.start()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(list_models.router)
 app.include_router(upload_law.router)
 app.include_router(upload_case.router)
+app.include_router(uploads.router)
 app.include_router(query.router)
 app.include_router(cleanup.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
+app.include_router(health.router)
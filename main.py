@@ -1,8 +1,69 @@
+import json
+import time
+import hashlib
 import streamlit as st
 import requests
+from modules.utils.logging_config import configure_logging
+
+configure_logging()
 
 # FastAPI backend URL
 BASE_URL = "http://localhost:8000"
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_RETRIES = 5  # rounds of resending missing chunks before giving up on a file
+
+def upload_file(file, category, progress):
+    """
+    Uploads one file through a resumable upload session, chunk by chunk.
+
+    The session of a file is remembered for the browser session, so pressing
+    "Process Files" again after a failure only sends the chunks the server is
+    missing. Returns the final session status.
+    """
+    data = file.getvalue()
+    sha256 = hashlib.sha256(data).hexdigest()
+    sessions = st.session_state.setdefault("upload_sessions", {})
+    key = (category, file.name, sha256)
+
+    session = None
+    if key in sessions:
+        response = requests.get(f"{BASE_URL}/uploads/{sessions[key]}")
+        if response.status_code == 200:
+            session = response.json()
+    if session is None:
+        response = requests.post(f"{BASE_URL}/uploads/", json={
+            "filename": file.name, "category": category, "size": len(data),
+            "chunk_size": UPLOAD_CHUNK_SIZE, "sha256": sha256,
+        })
+        response.raise_for_status()
+        session = response.json()
+        sessions[key] = session["upload_id"]
+
+    chunk_size = session["chunk_size"]
+    for attempt in range(UPLOAD_RETRIES):
+        # A complete upload that could not be queued yet is handed over again by resending any chunk
+        for index in session["missing"] or [0]:
+            chunk = data[index * chunk_size:(index + 1) * chunk_size]
+            try:
+                response = requests.put(
+                    f"{BASE_URL}/uploads/{session['upload_id']}/chunks/{index}", data=chunk,
+                    headers={"X-Chunk-SHA256": hashlib.sha256(chunk).hexdigest()}, timeout=300,
+                )
+            except requests.RequestException:
+                break
+            if response.status_code != 200:
+                break
+            session = response.json()
+            progress.progress(session["bytes_received"] / session["size"],
+                              text=f"{file.name}: {session['bytes_received'] // 1024 ** 2} / {session['size'] // 1024 ** 2} MB")
+        if session["state"] == "ingesting":
+            return session
+        time.sleep(2 ** attempt)
+        # Resume from what the server actually received
+        response = requests.get(f"{BASE_URL}/uploads/{session['upload_id']}")
+        if response.status_code == 200:
+            session = response.json()
+    return session
 
 st.set_page_config(page_title="Legal AI Chatbot", page_icon="⚖️", layout="wide")
 
@@ -28,22 +89,22 @@ with st.sidebar:
     case_files = st.file_uploader("Upload PDFs for Case Files", type=["pdf"], accept_multiple_files=True)
 
     if st.button("Process Files"):
-        files = []
-
-        # Append law files
-        for file in law_files:
-            files.append(("law_files", (file.name, file.getvalue(), "application/pdf")))
-
-        # Append case files
-        for file in case_files:
-            files.append(("case_files", (file.name, file.getvalue(), "application/pdf")))
+        files = [(file, "Laws") for file in law_files] + [(file, "Case") for file in case_files]
 
         if files:
-            response = requests.post(f"{BASE_URL}/upload_documents/", files=files)
-            if response.status_code == 200:
-                st.success("✅ Documents processed successfully!")
+            failed = []
+            for file, category in files:
+                progress = st.progress(0.0, text=f"{file.name}: starting upload")
+                try:
+                    session = upload_file(file, category, progress)
+                except requests.RequestException:
+                    session = None
+                if session is None or session["state"] != "ingesting":
+                    failed.append(file.name)
+            if failed:
+                st.error(f"❌ Failed to upload {', '.join(failed)}. Press Process Files again to resume.")
             else:
-                st.error("❌ Failed to process documents.")
+                st.success("✅ Documents uploaded! They are being processed in the background.")
         else:
             st.warning("Please upload at least one document.")
 
@@ -65,17 +126,36 @@ for message in st.session_state.chat_history:
     with st.chat_message("user" if role == "user" else "assistant"):
         st.markdown(text)
 
+def stream_answer(request_data):
+    """Yields answer tokens from the /query/stream Server-Sent Events endpoint."""
+    with requests.post(f"{BASE_URL}/query/stream", json=request_data, stream=True) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if event == "token":
+                    yield data["token"]
+                elif event == "error":
+                    yield f"\n\n❌ {data['response']}"
+
 user_input = st.chat_input("Type your message...")
 if user_input:
     st.session_state.chat_history.append(("user", user_input))
-    request_data = {"question": user_input, "model_choice": model_choice}
-    if model_choice != "Gemini Pro":
-        request_data["ollama_model"] = model_choice
-
-    response = requests.post(f"{BASE_URL}/query/", json=request_data)
-    if response.status_code == 200:
-        ai_response = response.json().get("response", "No response generated.")
-        st.session_state.chat_history.append(("assistant", ai_response))
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
+    if model_choice == "Gemini Pro":
+        request_data = {"question": user_input, "model_type": "Gemini", "model_name": "gemini-2.0-flash"}
     else:
+        request_data = {"question": user_input, "model_type": "Ollama", "model_name": model_choice}
+
+    try:
+        with st.chat_message("assistant"):
+            ai_response = st.write_stream(stream_answer(request_data))
+        st.session_state.chat_history.append(("assistant", ai_response or "No response generated."))
+    except requests.RequestException:
         st.error("❌ Failed to generate response.")
     st.rerun()
@@ -1,12 +1,18 @@
 from fastapi import APIRouter
-from modules.fastapi.schemas.cleanup import CleanRequest
-from modules.fastapi.services.cleanup_handler import perform_cleanup
+from modules.fastapi.schemas.cleanup import CleanRequest, DocumentDeleteRequest
+from modules.utils.lazy_import import lazy_module
+
+# Imported on first use, so the vector store stack is not loaded when the server starts
+cleanup_handler = lazy_module("modules.fastapi.services.cleanup_handler")
 
 # Initialize API router for cleanup operations
 router = APIRouter()
 
+# Plain (sync) routes run in FastAPI's thread pool, so waiting for a category's
+# write lock while an ingestion job publishes does not block the event loop
+
 @router.delete("/cleanup/")
-async def cleanup(request: CleanRequest):
+def cleanup(request: CleanRequest):
     """
     Endpoint to clean (delete) stored vector data from the vector database.
 
@@ -21,4 +27,23 @@ async def cleanup(request: CleanRequest):
         dict: A status message confirming successful cleanup.
               Example: {"message": "Database ['Laws', 'Case'] cleaned successfully"}
     """
-    return perform_cleanup(request)
+    return cleanup_handler.perform_cleanup(request)
+
+@router.delete("/cleanup/document/")
+def cleanup_document(request: DocumentDeleteRequest):
+    """
+    Endpoint to remove a single uploaded document from a vector database category.
+
+    Only the chunks stored under the given document id (the uploaded file name)
+    are removed; the rest of the category keeps its embeddings.
+
+    Args:
+        request (DocumentDeleteRequest): A Pydantic model containing:
+            - database (str): The vector database category ("Laws" or "Case").
+            - doc_id (str): The document id to remove.
+
+    Returns:
+        dict: A status message.
+              Example: {"message": "Document 'ipc.pdf' removed from Laws"}
+    """
+    return cleanup_handler.perform_document_delete(request)
@@ -0,0 +1,35 @@
+import time
+from fastapi import APIRouter
+from modules.fastapi.services.warmup import warmup
+from modules.workflow.llm.registry import llm_registry
+
+# Initialize API router for liveness and readiness checks
+router = APIRouter()
+
+STARTED_AT = time.time()
+
+@router.get("/health")
+async def health():
+    """
+    Endpoint for load balancers and container health checks.
+
+    Answers as soon as the server accepts requests, without loading models or
+    indexes; `ready` turns true once the background warm-up has preloaded them
+    (or immediately when warm-up is disabled with RAG_WARMUP=0).
+
+    Returns:
+        dict: A dictionary containing:
+            - status (str): Always "ok" while the server is up.
+            - ready (bool): Whether the warm-up has finished.
+            - uptime_seconds (float): Seconds since the server module was loaded.
+            - warmup (dict): Warm-up state, per-step durations and errors.
+            - llm (dict): Cached LLM clients and the last Ollama health checks.
+    """
+    status = warmup.status()
+    return {
+        "status": "ok",
+        "ready": status["state"] in ("done", "failed", "disabled"),
+        "uptime_seconds": round(time.time() - STARTED_AT, 3),
+        "warmup": status,
+        "llm": llm_registry.health(),
+    }
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from modules.fastapi.services.job_manager import job_manager
+
+# Initialize API router for background ingestion jobs
+router = APIRouter()
+
+@router.get("/jobs/")
+async def list_jobs():
+    """
+    Endpoint to list the ingestion jobs that are queued, running or recently finished.
+
+    Returns:
+        dict: The jobs, newest first, in the same shape as `/jobs/{job_id}`.
+              Example: {"jobs": [{"job_id": "3f2a...", "status": "running", ...}]}
+    """
+    return {"jobs": [job.to_dict() for job in job_manager.list()]}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Endpoint to report the progress of one ingestion job.
+
+    Args:
+        job_id (str): The id returned by `/upload_law/` or `/upload_case/`.
+
+    Returns:
+        dict: The job's status ("queued", "running", "done" or "failed"), its
+              current stage, the documents, pages and chunks processed so far,
+              throughput and any error.
+              Example: {"job_id": "3f2a...", "status": "running", "stage": "ingesting",
+                        "pages": 120, "chunks_indexed": 64, "chunks_per_second": 21.3, ...}
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
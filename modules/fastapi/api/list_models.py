@@ -1,7 +1,12 @@
 from fastapi import APIRouter
-from modules.workflow.llm.ollama_llms import OllamaModel
+from modules.workflow.llm.registry import llm_registry
 from modules.utils.gemini_config import configure_gemini_api
 from modules.fastapi.schemas.Ollama_external_url import OllamaUrl
+from modules.utils.lazy_import import lazy_module
+
+# Imported on first use, so the LLM stack is not loaded when the server starts
+ollama_llms = lazy_module("modules.workflow.llm.ollama_llms")
+
 # Initialize the API router
 router = APIRouter()
 
@@ -18,7 +23,7 @@ async def list_models(Ollama_host : OllamaUrl):
             - gemini_models (List[str]): Available Gemini model names
     """
     # Get Ollama model data (includes models, connection status, and docker flag)
-    ollama_data = OllamaModel.list_models(Ollama_host.ExternalUrl)
+    ollama_data = ollama_llms.OllamaModel.list_models(Ollama_host.ExternalUrl)
 
     gemini_connection = configure_gemini_api()
     # Hardcoded Gemini model list (replace or fetch dynamically if needed)
@@ -48,3 +53,17 @@ async def list_models(Ollama_host : OllamaUrl):
             "Gemini_models": gemini_models
         }
 
+@router.get("/list_models/health")
+async def llm_health():
+    """
+    Endpoint to inspect the shared LLM clients and Ollama health checks.
+
+    Ollama model lists are cached and re-checked in the background, so this
+    reports the last check of every known host without contacting it.
+
+    Returns:
+        dict: A dictionary containing:
+            - ollama (dict): Per host: connected, models, checked_seconds_ago, latency_ms
+            - clients (List[str]): Cached clients and chains, as backend/host/model
+    """
+    return llm_registry.health()
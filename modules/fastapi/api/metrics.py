@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from modules.utils.metrics import metrics
+
+# Initialize API router for the Prometheus metrics endpoint
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Endpoint exposing latency histograms and counters in Prometheus text format.
+
+    Stages timed in `rag_stage_seconds`: pdf_extraction, chunking, embedding,
+    index_write, index_load, question_embedding, search, context_assembly,
+    generation, query and upload.
+
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text exposition format (version 0.0.4).
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
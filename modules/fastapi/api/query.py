@@ -1,6 +1,11 @@
 from fastapi import APIRouter
-from modules.fastapi.schemas.query import QueryRequest
-from modules.fastapi.services.model_handler import process_query
+from fastapi.responses import StreamingResponse
+from modules.fastapi.schemas.query import QueryRequest, BatchQueryRequest
+from modules.fastapi.services.answer_cache import answer_cache
+from modules.utils.lazy_import import lazy_module
+
+# Imported on the first query (or by the startup warm-up), not when the server starts
+model_handler = lazy_module("modules.fastapi.services.model_handler")
 
 # Initialize API router for handling user queries to LLMs
 router = APIRouter()
@@ -24,4 +29,62 @@ async def query(request: QueryRequest):
         dict: A dictionary containing the generated response.
               Example: {"response": "Here's the answer to your legal question..."}
     """
-    return await process_query(request)
+    return await model_handler.process_query(request)
+
+@router.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Streaming variant of `/query/` using Server-Sent Events.
+
+    Tokens are sent as they are generated by Gemini or Ollama, so the client
+    can render the answer before it is complete.
+
+    Args:
+        request (QueryRequest): Same body as `/query/`.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` of events:
+            - token: {"token": "..."} for every generated token.
+            - done: {"context_status": bool, "Connection_type": str, "timing": {...}} at the end.
+            - error: {"response": "..."} if the query could not be answered.
+    """
+    return StreamingResponse(
+        model_handler.stream_query(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/query/batch")
+async def query_batch(request: BatchQueryRequest):
+    """
+    Endpoint to answer many questions with one model in a single request.
+
+    All questions are embedded in one batched call and each vector store is
+    searched once for the whole batch; answers are generated with bounded
+    concurrency.
+
+    Args:
+        request (BatchQueryRequest): A Pydantic model containing:
+            - questions (List[str]): The questions to answer (at most 500).
+            - model_type (str): Type of model to use ("Gemini" or "Ollama").
+            - model_name (str): Specific model name to use.
+            - max_concurrency (int, optional): LLM calls in flight at once (default 4).
+
+    Returns:
+        dict: Results in input order, each with its own timings.
+              Example: {"results": [{"index": 0, "question": "...", "response": "...",
+                        "timing": {"queued_seconds": 0.0, "generation_seconds": 1.2, "total_seconds": 1.5}}],
+                        "timing": {"embedding_seconds": 0.2, "retrieval_seconds": 0.1, "total_seconds": 3.4}}
+    """
+    return await model_handler.process_batch(request)
+
+@router.get("/query/cache")
+async def query_cache_stats():
+    """
+    Endpoint to inspect the semantic answer cache in front of `/query/`.
+
+    Returns:
+        dict: Hit and miss counters, hit rate and number of cached answers.
+              Example: {"hits": 12, "misses": 30, "hit_rate": 0.286, "entries": 30}
+    """
+    return answer_cache.stats()
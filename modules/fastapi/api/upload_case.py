@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Query
 from typing import List
 from modules.fastapi.services.document_handler import handle_document_upload
 
@@ -6,20 +6,25 @@ from modules.fastapi.services.document_handler import handle_document_upload
 router = APIRouter()
 
 @router.post("/upload_case/")
-async def upload_case_documents(case_files: List[UploadFile] = File(default=[])):
+async def upload_case_documents(case_files: List[UploadFile] = File(default=[]), wait: bool = Query(default=False)):
     """
     Endpoint to upload case-related documents.
 
-    This route accepts one or more case files, processes them using the
-    `handle_document_upload` function, and stores the processed data
-    in the vector database under the "Case" category.
+    This route accepts one or more case files, spools them to disk and
+    queues them as a background ingestion job (see `handle_document_upload`),
+    which stores the processed content in the vector database under the
+    "Case" category.
 
     Args:
         case_files (List[UploadFile]): List of uploaded case documents (PDFs, text, etc.)
+        wait (bool): Keep the request open until ingestion has finished
+            (the behaviour before background jobs). Defaults to False.
 
     Returns:
-        dict: A status message indicating whether the upload and processing was successful.
-              Example: {"Case Files": "Success"}
+        dict: The job that ingests the files in the background. Poll
+              `status_url` for its progress.
+              Example: {"Case Files": "Queued", "job_id": "3f2a...", "status_url": "/jobs/3f2a..."}
+              With wait=true: {"Case Files": "Success", "job_id": "3f2a..."}
     """
-    result = await handle_document_upload(case_files, "Case")
-    return {"Case Files": result}
+    result = await handle_document_upload(case_files, "Case", wait)
+    return {"Case Files": result.pop("status"), **result}
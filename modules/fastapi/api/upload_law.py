@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Query
 from typing import List
 from modules.fastapi.services.document_handler import handle_document_upload
 
@@ -6,20 +6,25 @@ from modules.fastapi.services.document_handler import handle_document_upload
 router = APIRouter()
 
 @router.post("/upload_law/")
-async def upload_law_documents(law_files: List[UploadFile] = File(default=[])):
+async def upload_law_documents(law_files: List[UploadFile] = File(default=[]), wait: bool = Query(default=False)):
     """
     Endpoint to upload legal/law documents.
 
-    This route accepts one or more law-related documents, processes them using the
-    `handle_document_upload` service, and stores the processed content
-    in the vector database under the "Laws" category.
+    This route accepts one or more law-related documents, spools them to disk and
+    queues them as a background ingestion job (see `handle_document_upload`),
+    which stores the processed content in the vector database under the
+    "Laws" category.
 
     Args:
         law_files (List[UploadFile]): List of uploaded law documents (PDFs, text, etc.)
+        wait (bool): Keep the request open until ingestion has finished
+            (the behaviour before background jobs). Defaults to False.
 
     Returns:
-        dict: A status message indicating whether the upload and processing was successful.
-              Example: {"Laws": "Success"}
+        dict: The job that ingests the files in the background. Poll
+              `status_url` for its progress.
+              Example: {"Laws": "Queued", "job_id": "3f2a...", "status_url": "/jobs/3f2a..."}
+              With wait=true: {"Laws": "Success", "job_id": "3f2a..."}
     """
-    result = await handle_document_upload(law_files, "Laws")
-    return {"Laws": result}
+    result = await handle_document_upload(law_files, "Laws", wait)
+    return {"Laws": result.pop("status"), **result}
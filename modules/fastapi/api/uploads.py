@@ -0,0 +1,98 @@
+from fastapi import APIRouter, HTTPException, Header, Request
+from modules.fastapi.schemas.upload import UploadSessionRequest
+from modules.fastapi.services.upload_sessions import upload_sessions, UploadNotFound, UploadRejected
+from modules.fastapi.services.job_manager import QueueFullError
+
+# Initialize API router for resumable chunked uploads
+router = APIRouter()
+
+def _not_found(upload_id):
+    return HTTPException(status_code=404, detail=f"Upload '{upload_id}' not found")
+
+@router.post("/uploads/", status_code=201)
+def create_upload(request: UploadSessionRequest):
+    """
+    Endpoint to start a resumable upload of one document.
+
+    Args:
+        request (UploadSessionRequest): The file's name, its category ("Laws" or
+            "Case"), its size in bytes, optionally the chunk size to use
+            (default 8 MiB) and the SHA-256 of the whole file, which is then
+            verified once all chunks have arrived.
+
+    Returns:
+        dict: The session, including the `upload_id`, the number of `chunks`
+              to PUT to `/uploads/{upload_id}/chunks/{index}` and the
+              `missing` chunk indices.
+              Example: {"upload_id": "9c1e...", "chunk_size": 8388608, "chunks": 38,
+                        "state": "uploading", "missing": [0, 1, ...], ...}
+    """
+    try:
+        return upload_sessions.create(request.filename, request.category, request.size,
+                                      request.chunk_size, request.sha256)
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def put_chunk(upload_id: str, index: int, request: Request, x_chunk_sha256: str = Header()):
+    """
+    Endpoint to upload one chunk of a file, as the raw request body.
+
+    Chunks can be sent in any order, in parallel and again after a failure.
+    When the last missing chunk arrives the file is queued for ingestion.
+
+    Args:
+        upload_id (str): The id returned by `/uploads/`.
+        index (int): Zero-based chunk number; chunk i holds bytes
+            [i * chunk_size, (i + 1) * chunk_size) of the file.
+        x_chunk_sha256 (str): `X-Chunk-SHA256` header with the hex SHA-256 of the chunk.
+
+    Returns:
+        dict: The session status. Once complete, `state` is "ingesting" and
+              `status_url` points at the ingestion job.
+              Responds 400 if the chunk's size or checksum is wrong (send it
+              again) and 503 if the job queue is full (resend any chunk later).
+    """
+    try:
+        return await upload_sessions.write_chunk(upload_id, index, x_chunk_sha256, request.stream())
+    except UploadNotFound:
+        raise _not_found(upload_id)
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    """
+    Endpoint to resume an upload: reports which chunks were received and which are missing.
+
+    Args:
+        upload_id (str): The id returned by `/uploads/`.
+
+    Returns:
+        dict: The session status ("uploading", "complete" or "ingesting"), the
+              `received` and `missing` chunk indices, `bytes_received` and,
+              once ingesting, the `job_id` and `status_url`.
+    """
+    try:
+        return upload_sessions.status(upload_id)
+    except UploadNotFound:
+        raise _not_found(upload_id)
+
+@router.delete("/uploads/{upload_id}")
+def delete_upload(upload_id: str):
+    """
+    Endpoint to abandon an upload and delete what was received.
+
+    Args:
+        upload_id (str): The id returned by `/uploads/`.
+
+    Returns:
+        dict: Example: {"upload_id": "9c1e...", "status": "Deleted"}
+    """
+    try:
+        upload_sessions.abort(upload_id)
+    except UploadNotFound:
+        raise _not_found(upload_id)
+    return {"upload_id": upload_id, "status": "Deleted"}
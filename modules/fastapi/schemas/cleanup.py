@@ -3,3 +3,7 @@ from typing import List
 
 class CleanRequest(BaseModel):
     database: List
+
+class DocumentDeleteRequest(BaseModel):
+    database: str
+    doc_id: str
@@ -1,6 +1,14 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class QueryRequest(BaseModel):
     question: str
     model_type: str
     model_name: str
+    trace: bool = False
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    model_type: str
+    model_name: str
+    max_concurrency: Optional[int] = None
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    category: Literal["Laws", "Case"]
+    size: int = Field(gt=0)
+    chunk_size: Optional[int] = None
+    sha256: Optional[str] = None
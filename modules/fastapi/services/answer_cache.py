@@ -0,0 +1,132 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from modules.utils.metrics import metrics
+
+SIMILARITY_THRESHOLD = 0.97  # cosine similarity above which two questions count as the same
+CACHE_TTL = 6 * 60 * 60      # seconds an answer stays valid
+MAX_ENTRIES = 2000
+
+# Section numbers and clause markers ("302", "498a", "(ii)") that must match exactly:
+# "Section 302" and "Section 304" embed almost identically but need different answers
+_KEY_TOKEN = re.compile(r"\d+[a-z]*|\((?:[a-z]|[ivx]+)\)")
+
+
+def question_key(question):
+    """Returns the numeric and clause tokens of a question as a sorted tuple."""
+    return tuple(sorted(set(_KEY_TOKEN.findall((question or "").lower()))))
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of answers, matched by question-embedding similarity.
+
+    Every entry is scoped to a (model type, model name, index version) tuple,
+    so an upload or cleanup (which changes the index version) makes older
+    answers unreachable, and only matches questions citing the same section
+    numbers (see question_key). Vectors live in one preallocated matrix;
+    entries older than `ttl` seconds are dropped when a lookup reaches them
+    and the least recently used ones are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, ttl=CACHE_TTL, max_entries=MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._vectors = None                               # (max_entries, dim) unit vectors, allocated on first store
+        self._created = np.zeros(self.max_entries)
+        self._slot_groups = np.full(self.max_entries, -1)  # group id of each slot, -1 when free
+        self._entries = OrderedDict()                      # slot -> (group, response), least recently used first
+        self._groups = {}                                  # (scope, question key) -> [group id, slots in use]
+        self._next_group = 0
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _release(self, slot):
+        group, _ = self._entries.pop(slot)
+        self._slot_groups[slot] = -1
+        self._groups[group][1] -= 1
+        if not self._groups[group][1]:
+            del self._groups[group]
+        self._free.append(slot)
+
+    def lookup(self, vector, scope, question=""):
+        """Returns the cached response of the most similar question in scope, or None."""
+        query = self._normalize(vector)
+        with self._lock:
+            group = self._groups.get((scope, question_key(question)))
+            if group is not None:
+                candidates = self._slot_groups == group[0]
+                expired = candidates & (time.time() - self._created > self.ttl)
+                for slot in np.flatnonzero(expired).tolist():
+                    self._release(slot)
+                candidates &= ~expired
+                if candidates.any():
+                    similarities = np.where(candidates, self._vectors @ query, -np.inf)
+                    slot = int(np.argmax(similarities))
+                    if similarities[slot] >= self.threshold:
+                        self._entries.move_to_end(slot)
+                        self.hits += 1
+                        return self._entries[slot][1]
+            self.misses += 1
+            return None
+
+    def store(self, vector, scope, response, question=""):
+        """Caches a response for the question embedding in scope."""
+        unit = self._normalize(vector)
+        group = (scope, question_key(question))
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, unit.shape[0]), dtype=np.float32)
+            if not self._free:
+                self._release(next(iter(self._entries)))
+            if group not in self._groups:
+                self._groups[group] = [self._next_group, 0]
+                self._next_group += 1
+            self._groups[group][1] += 1
+            slot = self._free.pop()
+            self._vectors[slot] = unit
+            self._created[slot] = time.time()
+            self._slot_groups[slot] = self._groups[group][0]
+            self._entries[slot] = (group, response)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self):
+        """Returns hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+answer_cache = SemanticAnswerCache()
+
+metrics.callback(
+    "rag_answer_cache_lookups_total", "Semantic answer cache lookups, by result.", ("result",),
+    lambda: {("hit",): answer_cache.hits, ("miss",): answer_cache.misses},
+    kind="counter",
+)
+metrics.callback(
+    "rag_answer_cache_entries", "Answers currently held in the semantic answer cache.", (),
+    lambda: {(): answer_cache.stats()["entries"]},
+)
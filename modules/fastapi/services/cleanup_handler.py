@@ -1,6 +1,12 @@
 from modules.workflow.document.cleanup import Cleanup
-from modules.fastapi.schemas.cleanup import CleanRequest
+from modules.workflow.document.vector_db import VectorStore
+from modules.fastapi.schemas.cleanup import CleanRequest, DocumentDeleteRequest
 
 def perform_cleanup(request: CleanRequest) -> dict:
     Cleanup.clear_vector_store(request.database)
     return {"message": f"Database {request.database} cleaned successfully"}
+
+def perform_document_delete(request: DocumentDeleteRequest) -> dict:
+    if VectorStore.delete_document(request.database, request.doc_id):
+        return {"message": f"Document '{request.doc_id}' removed from {request.database}"}
+    return {"message": f"Document '{request.doc_id}' not found in {request.database}"}
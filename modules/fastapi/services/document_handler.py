@@ -1,16 +1,50 @@
-from io import BytesIO
+import os
+import asyncio
+import tempfile
 from typing import List
-from fastapi import UploadFile
-from modules.workflow.document.datapreprocess import DocumentProcessor
-from modules.workflow.document.vector_db import VectorStore
+from fastapi import UploadFile, HTTPException
+from modules.fastapi.services.job_manager import job_manager, QueueFullError
 
-async def handle_document_upload(files: List[UploadFile], category: str) -> str:
+SPOOL_BLOCK_SIZE = 1024 * 1024
+
+async def spool_upload(file: UploadFile) -> str:
+    """Copies an upload to a temporary file in fixed-size blocks and returns its path."""
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        while True:
+            block = await file.read(SPOOL_BLOCK_SIZE)
+            if not block:
+                break
+            tmp.write(block)
+    return tmp.name
+
+async def handle_document_upload(files: List[UploadFile], category: str, wait: bool = False) -> dict:
+    """
+    Spools the uploaded files to disk and queues them for background ingestion.
+
+    Returns {"status": "Queued", "job_id", "status_url"} at once, or with wait
+    set, {"status": "Success" | "Failure", "job_id"} once the job has finished.
+    Responds 503 while the job queue is full.
+    """
     if not files:
-        return "No files uploaded"
+        return {"status": "No files uploaded"}
 
-    file_objs = [BytesIO(await file.read()) for file in files]
-    processor = DocumentProcessor(file_objs)
-    text_chunks = processor.run()
+    # Uploads are spooled to disk and streamed through extraction, chunking and
+    # embedding by the job, so memory use does not grow with the size of the
+    # upload. Each file is stored under its own document id, so re-uploading a
+    # file replaces its chunks instead of rebuilding the whole category.
+    documents = []
+    try:
+        for file in files:
+            documents.append((file.filename, await spool_upload(file)))
+        job = job_manager.submit(category, documents)
+    except Exception as e:
+        for _, path in documents:
+            os.remove(path)
+        if isinstance(e, QueueFullError):
+            raise HTTPException(status_code=503, detail=str(e))
+        raise
 
-    success = text_chunks and VectorStore.store_VDB(category, text_chunks)
-    return "Success" if success else "Failure"
+    if not wait:
+        return {"status": "Queued", "job_id": job.id, "status_url": f"/jobs/{job.id}"}
+    result = await asyncio.wrap_future(job.future)
+    return {"status": result, "job_id": job.id}
@@ -0,0 +1,138 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.utils import metrics
+from modules.utils.lazy_import import lazy_module
+
+# Loaded with the first job (or the startup warm-up) rather than when the server starts
+ingest_pipeline = lazy_module("modules.workflow.document.ingest_pipeline")
+
+INGEST_WORKERS = 2       # ingestion jobs running at once; the rest wait in the queue
+MAX_PENDING_JOBS = 100   # queued or running jobs accepted before uploads are refused
+JOB_RETENTION = 60 * 60  # seconds a finished job stays visible on /jobs/
+
+
+class QueueFullError(Exception):
+    """Raised when an upload is submitted while MAX_PENDING_JOBS jobs are waiting or running."""
+
+
+class IngestJob:
+    """One upload being ingested into a category in the background."""
+
+    def __init__(self, category, documents):
+        self.id = uuid.uuid4().hex
+        self.category = category
+        self.documents = documents  # [(doc_id, spooled path), ...]
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Created by the worker thread, so the first upload does not import the ingestion stack on the event loop
+        self.ingestor = None
+        self.future = None
+
+    def progress(self):
+        """The ingestor's progress, or an empty snapshot while the job is still queued."""
+        if self.ingestor is not None:
+            return self.ingestor.progress()
+        return {"stage": "pending", "documents": len(self.documents), "documents_read": 0, "doc_ids": [],
+                "pages": 0, "chunks_embedded": 0, "chunks_indexed": 0, "seconds": 0.0,
+                "pages_per_second": 0.0, "chunks_per_second": 0.0, "error": None}
+
+    def to_dict(self):
+        progress = self.progress()
+        stage = progress.pop("stage")
+        error = progress.pop("error") or self.error
+        return {
+            "job_id": self.id,
+            "category": self.category,
+            "files": [doc_id for doc_id, _ in self.documents],
+            "status": self.status,
+            "result": self.result,
+            "stage": stage if self.status == "running" else self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": round((self.started_at or time.time()) - self.created_at, 3),
+            **progress,
+            "error": error,
+        }
+
+
+class JobManager:
+    """
+    Runs ingestion jobs on a bounded worker pool and keeps their status.
+
+    Uploads are spooled to disk by the request and handed over here, so the
+    request returns as soon as the job is queued. At most INGEST_WORKERS jobs
+    run at once; jobs for the same category are additionally serialised by the
+    category's index write lock (see IndexWriter).
+    """
+
+    def __init__(self, workers=INGEST_WORKERS, max_pending=MAX_PENDING_JOBS, retention=JOB_RETENTION):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, category, documents):
+        """Queues the spooled documents for ingestion and returns the job; raises QueueFullError when full."""
+        job = IngestJob(category, documents)
+        with self._lock:
+            self._prune()
+            pending = sum(1 for other in self._jobs.values() if other.status in ("queued", "running"))
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} ingestion jobs are already pending; try again later.")
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            self._prune()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.ingestor = ingest_pipeline.StreamingIngestor(job.category)
+            with metrics.stage("upload"):
+                success = job.ingestor.run(job.documents)
+            metrics.ITEMS.inc("chunks", amount=job.ingestor.stats.get("chunks", 0))
+        except Exception as e:
+            logging.error(f"Ingestion job {job.id} failed: {e}")
+            job.error = str(e)
+            success = False
+        finally:
+            for _, path in job.documents:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if not success and job.error is None and job.progress()["error"] is None:
+            job.error = "No text could be extracted from the uploaded files."
+        job.result = "Success" if success else "Failure"
+        job.status = "done" if success else "failed"
+        job.finished_at = time.time()
+        return job.result
+
+
+job_manager = JobManager()
@@ -1,31 +1,127 @@
-from streamlit import connection
+import json
+import time
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from modules.utils.docker_utils import is_running_in_docker
-from modules.workflow.retrieval.vector_retriever import VectorRetriever
-from modules.workflow.llm.ollama_llms import OllamaModel
+from modules.workflow.retrieval.vector_retriever import VectorRetriever, embed_question, embed_questions
+from modules.workflow.document.embeddings import embeddings_for
+from modules.workflow.document.vector_db import VectorStore
+from modules.workflow.llm.ollama_llms import OllamaModel, NOT_CONNECTED_MESSAGE, FAILURE_MESSAGE
 from modules.workflow.llm.gemini import GeminiPro
 from modules.utils.interaction_logger import log_interaction
-from modules.fastapi.schemas.query import QueryRequest
+from modules.utils import metrics
+from modules.workflow.llm.context_packer import estimate_tokens
+from modules.fastapi.schemas.query import QueryRequest, BatchQueryRequest
+from modules.fastapi.services.answer_cache import answer_cache
 
-async def process_query(request: QueryRequest) -> dict:
-    retrieved_docs = VectorRetriever.retrieve_faiss(request.question, ["Laws", "Case"])
+QUERY_WORKERS = 16     # max blocking retrieval/LLM calls in flight across all requests
+QUERY_TIMEOUT = 120    # seconds before a query is abandoned
+DB_NAMES = ["Laws", "Case"]
+CACHE_CATEGORY = DB_NAMES[0]  # the answer cache compares questions by their vector for this category
+BATCH_MAX_QUESTIONS = 500
+BATCH_LLM_CONCURRENCY = 4  # answers generated at once per batch unless the request asks otherwise
+
+# Retrieval and LLM clients are synchronous; they run here so the event loop stays free
+_query_executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="query")
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking call on the bounded query thread pool (in a copy of the caller's context, so traces follow it)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_query_executor, partial(context.run, func, *args, **kwargs))
+
+def _embed_question(question):
+    """Embeds the question once for the answer cache and retrieval ({db_name: vector}); None if embedding fails."""
+    try:
+        with metrics.stage("question_embedding"):
+            return embed_question(question, DB_NAMES)
+    except Exception as e:
+        logging.error(f"Failed to embed question: {e}")
+        return None
+
+def _cache_scope(model_type, model_name):
+    """Cached answers are only reused for the same LLM, index generations and embedding models."""
+    try:
+        embedding_models = tuple(embeddings_for(db_name).model_name for db_name in DB_NAMES)
+    except ValueError:
+        embedding_models = None
+    return (model_type, model_name, VectorStore.index_version(DB_NAMES), embedding_models)
+
+async def _cached_answer(request: QueryRequest):
+    """Returns (question vectors, cache scope, cached response or None)."""
+    query_vectors = await run_blocking(_embed_question, request.question)
+    scope = _cache_scope(request.model_type, request.model_name)
+    cached = None
+    if query_vectors is not None:
+        cached = answer_cache.lookup(query_vectors[CACHE_CATEGORY], scope, request.question)
+    return query_vectors, scope, cached
+
+def _generate_gemini(question, model_name, retrieved_docs):
+    model = GeminiPro(question, model_name)
+    with metrics.stage("generation"):
+        response, context_status = model.generate_response(retrieved_docs)
+    metrics.TOKENS.inc("answer", amount=estimate_tokens(response))
+    return response, context_status, model.context_stats
+
+def _generate_ollama(question, model_name, retrieved_docs):
+    model = OllamaModel(question, model_name)
+    with metrics.stage("generation"):
+        response, context_status = model.generate_response(retrieved_docs)
+    metrics.TOKENS.inc("answer", amount=estimate_tokens(response))
+    return response, context_status, model.connection_type, model.context_stats
+
+def _ollama_model_error(model_name):
+    """
+    Returns an error message if the requested Ollama model cannot be used, else None.
+
+    Checks the registry's cached model list; a model missing from it triggers
+    one refresh, so models pulled since the last refresh are still found.
+    """
+    ollama_data = OllamaModel.list_models()
+    if ollama_data.get("connected") and model_name not in ollama_data.get("models", []):
+        ollama_data = OllamaModel.list_models(refresh=True)
+    if not ollama_data.get("connected"):
+        return "Ollama is not connected. Unable to fetch models."
+    if model_name not in ollama_data.get("models", []):
+        return f"Model '{model_name}' not found in available Ollama models."
+    return None
+
+async def _answer_query(request: QueryRequest) -> dict:
+    query_vectors, scope, cached = await _cached_answer(request)
+    if cached is not None:
+        log_interaction(
+            model_type=request.model_type,
+            model_name=request.model_name or "N/A",
+            question=request.question,
+            answer=cached["response"],
+            docker_status=is_running_in_docker(),
+            context_status = cached["context_status"]
+        )
+        return {"response": cached["response"], "Connection_type": cached["Connection_type"], "cached": True}
 
     if request.model_type == "Gemini":
-        model = GeminiPro(request.question, request.model_name)
-        response,context_status= model.generate_response(retrieved_docs)
+        retrieved_docs = await run_blocking(VectorRetriever.retrieve_faiss, request.question, DB_NAMES, query_vectors)
+        response, context_status, context_stats = await run_blocking(
+            _generate_gemini, request.question, request.model_name, retrieved_docs
+        )
         connection_type = "Gemini"
 
     elif request.model_type == "Ollama":
-        ollama_data = OllamaModel.list_models()
-        if not ollama_data.get("connected"):
-            return {"response": "Ollama is not connected. Unable to fetch models."}
+        # Validate the model while the vector stores are being searched
+        retrieved_docs, error = await asyncio.gather(
+            run_blocking(VectorRetriever.retrieve_faiss, request.question, DB_NAMES, query_vectors),
+            run_blocking(_ollama_model_error, request.model_name),
+        )
+        if error:
+            return {"response": error}
 
-        if request.model_name not in ollama_data.get("models", []):
-            return {"response": f"Model '{request.model_name}' not found in available Ollama models."}
-
-        model = OllamaModel(request.question, request.model_name)
-        connection_type = model.connection_type
-        response,context_status = model.generate_response(retrieved_docs)
+        response, context_status, connection_type, context_stats = await run_blocking(
+            _generate_ollama, request.question, request.model_name, retrieved_docs
+        )
     else:
         return {"response": f"Invalid model type '{request.model_type}'"}
 
@@ -38,5 +134,292 @@ async def process_query(request: QueryRequest) -> dict:
         context_status = context_status
     )
 
+    if query_vectors is not None and response not in (NOT_CONNECTED_MESSAGE, FAILURE_MESSAGE):
+        answer_cache.store(query_vectors[CACHE_CATEGORY], scope, {
+            "response": response, "Connection_type": connection_type, "context_status": context_status
+        }, request.question)
+
     return {"response": response,
-            "Connection_type":connection_type}
+            "Connection_type":connection_type,
+            "context_stats": context_stats}
+
+def _outcome(result):
+    if result.get("cached"):
+        return "cached"
+    return "answered" if result.get("Connection_type") else "error"
+
+async def process_query(request: QueryRequest) -> dict:
+    """
+    Answers one query. With request.trace set, the response carries a
+    "trace" list with the duration of every stage the query went through.
+    """
+    with metrics.tracing(request.trace) as trace:
+        with metrics.stage("query"):
+            try:
+                result = await asyncio.wait_for(_answer_query(request), timeout=QUERY_TIMEOUT)
+                outcome = _outcome(result)
+            except asyncio.TimeoutError:
+                result, outcome = {"response": f"Query timed out after {QUERY_TIMEOUT} seconds."}, "timeout"
+    metrics.QUERIES.inc("query", request.model_type, outcome)
+    if trace is not None:
+        result["trace"] = trace
+    return result
+
+def _embed_batch(questions):
+    """Embeds all questions of a batch in one call per embedding model ({db_name: [vector, ...]}); None if embedding fails."""
+    try:
+        return embed_questions(questions, DB_NAMES)
+    except Exception as e:
+        logging.error(f"Failed to embed batch of {len(questions)} questions: {e}")
+        return None
+
+async def process_batch(request: BatchQueryRequest) -> dict:
+    """
+    Answers a list of questions with the same model.
+
+    Questions are embedded in one batched call and every category is searched
+    once for the whole batch. Answers are then generated with at most
+    `max_concurrency` LLM calls in flight and returned in input order.
+    """
+    start = time.perf_counter()
+    questions = request.questions
+
+    if request.model_type not in ("Gemini", "Ollama"):
+        return {"response": f"Invalid model type '{request.model_type}'"}
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        return {"response": f"A batch can hold at most {BATCH_MAX_QUESTIONS} questions, got {len(questions)}."}
+    if request.model_type == "Ollama":
+        error = await run_blocking(_ollama_model_error, request.model_name)
+        if error:
+            return {"response": error}
+
+    metrics.ITEMS.inc("questions", amount=len(questions))
+    query_vectors = await run_blocking(_embed_batch, questions) if questions else {}
+    embedding_time = time.perf_counter() - start
+
+    scope = _cache_scope(request.model_type, request.model_name)
+    if not query_vectors:
+        cached = [None] * len(questions)
+    else:
+        cached = [
+            answer_cache.lookup(vector, scope, question)
+            for vector, question in zip(query_vectors[CACHE_CATEGORY], questions)
+        ]
+
+    pending = [i for i, entry in enumerate(cached) if entry is None]
+    retrieved = {}
+    if pending:
+        docs = await run_blocking(
+            VectorRetriever.retrieve_faiss_batch,
+            [questions[i] for i in pending],
+            DB_NAMES,
+            {db_name: [vectors[i] for i in pending] for db_name, vectors in query_vectors.items()} if query_vectors else None,
+        )
+        retrieved = dict(zip(pending, docs))
+    retrieval_time = time.perf_counter() - start - embedding_time
+
+    concurrency = max(1, min(request.max_concurrency or BATCH_LLM_CONCURRENCY, QUERY_WORKERS))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(i):
+        question = questions[i]
+        queued = time.perf_counter()
+        generation_start = queued
+        result = {"index": i, "question": question}
+
+        if cached[i] is not None:
+            response = cached[i]["response"]
+            context_status = cached[i]["context_status"]
+            result.update(response=response, Connection_type=cached[i]["Connection_type"], cached=True)
+        else:
+            async with semaphore:
+                generation_start = time.perf_counter()
+                context_stats = {}
+                try:
+                    if request.model_type == "Gemini":
+                        response, context_status, context_stats = await asyncio.wait_for(
+                            run_blocking(_generate_gemini, question, request.model_name, retrieved[i]),
+                            timeout=QUERY_TIMEOUT,
+                        )
+                        connection_type = "Gemini"
+                    else:
+                        response, context_status, connection_type, context_stats = await asyncio.wait_for(
+                            run_blocking(_generate_ollama, question, request.model_name, retrieved[i]),
+                            timeout=QUERY_TIMEOUT,
+                        )
+                except asyncio.TimeoutError:
+                    response, context_status, connection_type = f"Query timed out after {QUERY_TIMEOUT} seconds.", False, None
+                except Exception as e:
+                    logging.error(f"Batch question {i} failed: {e}")
+                    response, context_status, connection_type = f"Failed to generate response: {e}", False, None
+
+            if query_vectors and connection_type and response not in (NOT_CONNECTED_MESSAGE, FAILURE_MESSAGE):
+                answer_cache.store(query_vectors[CACHE_CATEGORY][i], scope, {
+                    "response": response, "Connection_type": connection_type, "context_status": context_status
+                }, question)
+            result.update(response=response, Connection_type=connection_type, context_stats=context_stats)
+
+        log_interaction(
+            model_type=request.model_type,
+            model_name=request.model_name or "N/A",
+            question=question,
+            answer=response,
+            docker_status=is_running_in_docker(),
+            context_status = context_status
+        )
+        metrics.QUERIES.inc("batch", request.model_type, _outcome(result))
+        finished = time.perf_counter()
+        result["timing"] = {
+            "queued_seconds": round(generation_start - queued, 3),
+            "generation_seconds": round(finished - generation_start, 3),
+            "total_seconds": round(finished - start, 3),
+        }
+        return result
+
+    results = await asyncio.gather(*(answer(i) for i in range(len(questions))))
+    return {
+        "results": results,
+        "timing": {
+            "embedding_seconds": round(embedding_time, 3),
+            "retrieval_seconds": round(retrieval_time, 3),
+            "total_seconds": round(time.perf_counter() - start, 3),
+        },
+        "cached": sum(entry is not None for entry in cached),
+        "concurrency": concurrency,
+    }
+
+_STREAM_END = object()
+
+def _next_token(tokens):
+    return next(tokens, _STREAM_END)
+
+def _sse(event, data):
+    """Formats one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_model(request: QueryRequest, query_vectors):
+    """
+    Retrieves the context and builds the streaming model of a query.
+
+    Returns:
+        tuple: (retrieved docs, model, connection type, error message or None)
+    """
+    if request.model_type == "Gemini":
+        retrieved_docs = await run_blocking(VectorRetriever.retrieve_faiss, request.question, DB_NAMES, query_vectors)
+        model = await run_blocking(GeminiPro, request.question, request.model_name)
+        return retrieved_docs, model, "Gemini", None
+
+    if request.model_type == "Ollama":
+        retrieved_docs, error = await asyncio.gather(
+            run_blocking(VectorRetriever.retrieve_faiss, request.question, DB_NAMES, query_vectors),
+            run_blocking(_ollama_model_error, request.model_name),
+        )
+        if error:
+            return None, None, None, error
+        model = await run_blocking(OllamaModel, request.question, request.model_name)
+        return retrieved_docs, model, model.connection_type, None
+
+    return None, None, None, f"Invalid model type '{request.model_type}'"
+
+async def stream_query(request: QueryRequest):
+    """
+    Answers a query as a stream of Server-Sent Events.
+
+    Emits one "token" event per generated token, then a "done" event with the
+    context status and timings ("error" replaces "done" on failure). The full
+    answer is still recorded with log_interaction. With request.trace set, the
+    "done" event also carries the stage trace.
+    """
+    start = time.perf_counter()
+    trace = metrics.start_trace() if request.trace else None
+
+    query_vectors, scope, cached = await _cached_answer(request)
+    if cached is not None:
+        log_interaction(
+            model_type=request.model_type,
+            model_name=request.model_name or "N/A",
+            question=request.question,
+            answer=cached["response"],
+            docker_status=is_running_in_docker(),
+            context_status = cached["context_status"]
+        )
+        metrics.QUERIES.inc("stream", request.model_type, "cached")
+        yield _sse("token", {"token": cached["response"]})
+        yield _sse("done", {
+            "context_status": cached["context_status"],
+            "Connection_type": cached["Connection_type"],
+            "cached": True,
+            "timing": {"total_seconds": round(time.perf_counter() - start, 3)},
+            **({"trace": trace} if trace is not None else {}),
+        })
+        return
+
+    model = connection_type = tokens = None
+    retrieval_time = None
+    answer_parts = []
+    first_token_time = None
+
+    try:
+        remaining = QUERY_TIMEOUT - (time.perf_counter() - start)
+        retrieved_docs, model, connection_type, error = await asyncio.wait_for(
+            _stream_model(request, query_vectors), timeout=max(remaining, 0.001)
+        )
+        retrieval_time = time.perf_counter() - start
+        if error is None:
+            tokens = model.stream_response(retrieved_docs)
+            while True:
+                remaining = QUERY_TIMEOUT - (time.perf_counter() - start)
+                token = await asyncio.wait_for(run_blocking(_next_token, tokens), timeout=max(remaining, 0.001))
+                if token is _STREAM_END:
+                    break
+                if first_token_time is None:
+                    first_token_time = time.perf_counter() - start
+                answer_parts.append(token)
+                yield _sse("token", {"token": token})
+    except asyncio.TimeoutError:
+        error = f"Query timed out after {QUERY_TIMEOUT} seconds."
+    except Exception as e:
+        error = f"Failed to generate response: {e}"
+    finally:
+        if tokens is not None:
+            try:
+                tokens.close()
+            except ValueError:
+                pass  # still running on a worker thread after a timeout
+
+    if retrieval_time is None:
+        retrieval_time = time.perf_counter() - start
+    answer = "".join(answer_parts)
+    context_status = getattr(model, "context_status", False)
+    if tokens is not None:
+        metrics.record("generation", time.perf_counter() - start - retrieval_time)
+    metrics.TOKENS.inc("answer", amount=estimate_tokens(answer))
+    metrics.QUERIES.inc("stream", request.model_type, "answered" if error is None else "error")
+    log_interaction(
+        model_type=request.model_type,
+        model_name=request.model_name or "N/A",
+        question=request.question,
+        answer=answer if error is None else f"{answer}\n[{error}]",
+        docker_status=is_running_in_docker(),
+        context_status = context_status
+    )
+
+    timing = {
+        "retrieval_seconds": round(retrieval_time, 3),
+        "first_token_seconds": round(first_token_time, 3) if first_token_time is not None else None,
+        "total_seconds": round(time.perf_counter() - start, 3),
+    }
+    if error is not None:
+        yield _sse("error", {"response": error, "timing": timing})
+    else:
+        if query_vectors is not None and answer not in (NOT_CONNECTED_MESSAGE, ""):
+            answer_cache.store(query_vectors[CACHE_CATEGORY], scope, {
+                "response": answer, "Connection_type": connection_type, "context_status": context_status
+            }, request.question)
+        yield _sse("done", {
+            "context_status": context_status,
+            "Connection_type": connection_type,
+            "context_stats": getattr(model, "context_stats", {}),
+            "timing": timing,
+            **({"trace": trace} if trace is not None else {}),
+        })
@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from starlette.concurrency import run_in_threadpool
+from modules.fastapi.services.job_manager import job_manager, QueueFullError
+
+UPLOAD_DIR = "uploads"
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+MAX_UPLOAD_SIZE = 4 * 1024 ** 3   # bytes per file
+SESSION_TTL = 24 * 60 * 60        # seconds an unfinished upload can be resumed
+HASH_BLOCK_SIZE = 1024 * 1024
+WRITE_BLOCK_SIZE = 1024 * 1024    # bytes of a chunk buffered before they are hashed and written off the event loop
+
+# Layout of a session directory (uploads/<upload_id>/):
+#   session.json      what was announced: file name, category, size, chunking, checksum
+#   data.part         the file, every chunk written in place at index * chunk_size
+#   chunks/<index>    SHA-256 of each chunk that arrived intact
+#   COMPLETE          created exclusively by the request that completed the upload;
+#                     holds the id of the ingestion job
+# All state lives on disk, so an upload survives client disconnects and server
+# restarts, and the chunks of one upload may be sent to different workers.
+SESSION_FILE = "session.json"
+DATA_FILE = "data.part"
+CHUNKS_DIR = "chunks"
+COMPLETE_FILE = "COMPLETE"
+
+
+class UploadNotFound(Exception):
+    """Raised for an unknown or expired upload id."""
+
+
+class UploadRejected(Exception):
+    """Raised when a session or chunk is invalid (bad size, index or checksum); the chunk is not recorded."""
+
+
+class UploadSessions:
+    """
+    Resumable chunked uploads that are assembled on disk and ingested as
+    soon as the last chunk has arrived.
+
+    A client announces a file (create), PUTs its chunks in any order and as
+    often as needed (write_chunk), and after a disconnect asks which chunks
+    are still missing (status). Each chunk is checked against the SHA-256 the
+    client sent with it and written straight to its place in the file, so
+    the server never holds more than WRITE_BLOCK_SIZE bytes of a chunk in
+    memory. File I/O and hashing run in the thread pool, never on the event
+    loop.
+    """
+
+    def __init__(self, root=UPLOAD_DIR):
+        self.root = root
+
+    def _path(self, upload_id, *parts):
+        if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+            raise UploadNotFound(upload_id)
+        return os.path.join(self.root, upload_id, *parts)
+
+    def _load(self, upload_id):
+        try:
+            with open(self._path(upload_id, SESSION_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadNotFound(upload_id)
+
+    def create(self, filename, category, size, chunk_size=None, sha256=None):
+        """Starts an upload session and returns its status."""
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        if size > MAX_UPLOAD_SIZE:
+            raise UploadRejected(f"Files can be at most {MAX_UPLOAD_SIZE} bytes, got {size}.")
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadRejected(f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes.")
+        self.prune()
+
+        upload_id = uuid.uuid4().hex
+        session = {
+            "upload_id": upload_id,
+            # Only the base name is kept: it becomes the document id
+            "filename": os.path.basename(filename.replace("\\", "/")) or "upload.pdf",
+            "category": category,
+            "size": size,
+            "chunk_size": chunk_size,
+            "chunks": -(-size // chunk_size),
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": time.time(),
+        }
+        os.makedirs(self._path(upload_id, CHUNKS_DIR))
+        with open(self._path(upload_id, DATA_FILE), "wb") as f:
+            f.truncate(size)
+        with open(self._path(upload_id, SESSION_FILE), "w", encoding="utf-8") as f:
+            json.dump(session, f)
+        return self.status(upload_id)
+
+    def _received(self, upload_id):
+        try:
+            return sorted(int(name) for name in os.listdir(self._path(upload_id, CHUNKS_DIR)) if name.isdigit())
+        except FileNotFoundError:
+            return []
+
+    def _job_id(self, upload_id):
+        try:
+            with open(self._path(upload_id, COMPLETE_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def status(self, upload_id):
+        """Returns the session with the chunks received and missing, and its ingestion job once complete."""
+        session = self._load(upload_id)
+        received = self._received(upload_id)
+        job_id = self._job_id(upload_id)
+        missing = sorted(set(range(session["chunks"])) - set(received))
+        bytes_received = sum(self._chunk_length(session, index) for index in received)
+        return {
+            **session,
+            "state": "ingesting" if job_id else ("uploading" if missing else "complete"),
+            "received": received,
+            "missing": missing,
+            "bytes_received": bytes_received,
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}" if job_id else None,
+        }
+
+    @staticmethod
+    def _chunk_length(session, index):
+        return min(session["chunk_size"], session["size"] - index * session["chunk_size"])
+
+    async def write_chunk(self, upload_id, index, checksum, stream):
+        """
+        Writes chunk `index` from an async byte stream and returns the session
+        status. The chunk is only recorded if its length and SHA-256 match; a
+        chunk that was already received is accepted again. The request that
+        completes the upload submits the ingestion job.
+        """
+        session, fd = await run_in_threadpool(self._open_chunk, upload_id, index)
+        if fd is None:
+            return await run_in_threadpool(self.status, upload_id)
+        checksum = (checksum or "").strip().lower()
+        try:
+            await self._receive(fd, stream, index, index * session["chunk_size"],
+                                self._chunk_length(session, index), checksum)
+        except Exception:
+            await run_in_threadpool(self._finish_chunk, upload_id, session, index, fd, None)
+            raise
+        return await run_in_threadpool(self._finish_chunk, upload_id, session, index, fd, checksum)
+
+    def _open_chunk(self, upload_id, index):
+        """Returns the session and a descriptor for writing chunk `index`, or no descriptor once the upload is complete."""
+        session = self._load(upload_id)
+        if self._job_id(upload_id):
+            return session, None
+        if not 0 <= index < session["chunks"]:
+            raise UploadRejected(f"Chunk index must be between 0 and {session['chunks'] - 1}, got {index}.")
+        try:
+            return session, os.open(self._path(upload_id, DATA_FILE), os.O_WRONLY)
+        except FileNotFoundError:
+            # Completed by a concurrent request since the check above
+            return session, None
+
+    def _finish_chunk(self, upload_id, session, index, fd, checksum):
+        """
+        Records chunk `index` once its bytes are on disk (checksum None: the
+        chunk failed), completes the upload when it was the last one and
+        returns the session status.
+        """
+        marker = self._path(upload_id, CHUNKS_DIR, str(index))
+        try:
+            if checksum is None:
+                # Whatever arrived overwrote the chunk's bytes, so it is missing until resent intact
+                if os.path.exists(marker):
+                    os.remove(marker)
+                return None
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        with open(f"{marker}.{uuid.uuid4().hex}.tmp", "w", encoding="utf-8") as f:
+            f.write(checksum)
+        os.replace(f.name, marker)
+
+        if len(self._received(upload_id)) == session["chunks"]:
+            self._complete(upload_id, session)
+        return self.status(upload_id)
+
+    @staticmethod
+    async def _receive(fd, stream, index, offset, expected, checksum):
+        digest = hashlib.sha256()
+        length = 0
+        pending = bytearray()
+        async for block in stream:
+            length += len(block)
+            if length > expected:
+                raise UploadRejected(f"Chunk {index} must be {expected} bytes; received more.")
+            pending += block
+            if len(pending) >= WRITE_BLOCK_SIZE:
+                await run_in_threadpool(UploadSessions._write_block, fd, digest, bytes(pending), offset)
+                offset += len(pending)
+                pending.clear()
+        if pending:
+            await run_in_threadpool(UploadSessions._write_block, fd, digest, bytes(pending), offset)
+        if length != expected:
+            raise UploadRejected(f"Chunk {index} must be {expected} bytes, received {length}.")
+        if digest.hexdigest() != checksum:
+            raise UploadRejected(f"Checksum mismatch for chunk {index}; send it again.")
+
+    @staticmethod
+    def _write_block(fd, digest, block, offset):
+        digest.update(block)
+        os.pwrite(fd, block, offset)
+
+    def _file_sha256(self, upload_id):
+        digest = hashlib.sha256()
+        with open(self._path(upload_id, DATA_FILE), "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _complete(self, upload_id, session):
+        """Hands the assembled file to the job manager; only one request (in any process) gets to do it."""
+        complete_path = self._path(upload_id, COMPLETE_FILE)
+        try:
+            fd = os.open(complete_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return
+
+        try:
+            if session["sha256"] and self._file_sha256(upload_id) != session["sha256"]:
+                shutil.rmtree(self._path(upload_id, CHUNKS_DIR))
+                os.makedirs(self._path(upload_id, CHUNKS_DIR))
+                raise UploadRejected("The assembled file does not match the announced sha256; upload it again.")
+            # The job deletes the file once it has been ingested
+            document = self._path(upload_id, f"{upload_id}.pdf")
+            os.replace(self._path(upload_id, DATA_FILE), document)
+            try:
+                job = job_manager.submit(session["category"], [(session["filename"], document)])
+            except QueueFullError:
+                os.replace(document, self._path(upload_id, DATA_FILE))
+                raise
+            os.write(fd, job.id.encode("ascii"))
+        except Exception:
+            os.close(fd)
+            os.remove(complete_path)
+            raise
+        os.close(fd)
+        logging.info(f"Upload {upload_id} ({session['filename']}) complete; ingestion job {job.id}")
+
+    def abort(self, upload_id):
+        """Deletes an upload session and everything received for it."""
+        self._load(upload_id)
+        shutil.rmtree(self._path(upload_id), ignore_errors=True)
+
+    def prune(self):
+        """Deletes sessions that have not received a chunk for SESSION_TTL seconds."""
+        try:
+            upload_ids = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+        now = time.time()
+        for upload_id in upload_ids:
+            path = os.path.join(self.root, upload_id)
+            try:
+                touched = max(os.path.getmtime(path), os.path.getmtime(os.path.join(path, CHUNKS_DIR)))
+            except OSError:
+                touched = 0
+            if now - touched > SESSION_TTL:
+                shutil.rmtree(path, ignore_errors=True)
+                logging.info(f"Removed expired upload session {upload_id}")
+
+
+upload_sessions = UploadSessions()
@@ -0,0 +1,101 @@
+import os
+import time
+import logging
+import threading
+from functools import partial
+from modules.utils.lazy_import import lazy_module
+
+WARMUP_ENV = "RAG_WARMUP"  # set to 0 to skip preloading at startup
+WARMUP_MODULES = (
+    "modules.fastapi.services.model_handler",
+    "modules.fastapi.services.cleanup_handler",
+    "modules.workflow.document.ingest_pipeline",
+    "modules.workflow.llm.ollama_llms",
+)
+
+model_handler = lazy_module("modules.fastapi.services.model_handler")
+vector_db = lazy_module("modules.workflow.document.vector_db")
+document_embeddings = lazy_module("modules.workflow.document.embeddings")
+
+
+class Warmup:
+    """
+    Preloads the query and ingestion stack in a background thread.
+
+    Started once the server is up, so /health answers while it runs; each
+    step (imports, embeddings client, indexes) is timed and a failing step is
+    reported without stopping the ones after it. Requests that arrive first
+    simply load what they need themselves.
+    """
+
+    def __init__(self, modules=WARMUP_MODULES):
+        self.modules = modules
+        self.state = "idle"
+        self.steps = {}
+        self.errors = {}
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled():
+        return os.getenv(WARMUP_ENV, "1").lower() not in ("0", "false", "no")
+
+    def start(self):
+        """Starts the warm-up thread (once); does nothing if RAG_WARMUP=0."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            if not self.enabled():
+                self.state = "disabled"
+                return
+            self.state = "running"
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _step(self, name, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            logging.error(f"Warm-up step '{name}' failed: {e}")
+            self.errors[name] = str(e)
+        self.steps[name] = round(time.perf_counter() - start, 3)
+
+    @staticmethod
+    def _load_embeddings(db_name):
+        document_embeddings.embeddings_for(db_name).get()
+
+    def _run(self):
+        for name in self.modules:
+            self._step(f"import:{name.rsplit('.', 1)[-1]}", lazy_module(name).load)
+
+        try:
+            backends = {}
+            for db_name in model_handler.DB_NAMES:
+                backends.setdefault(document_embeddings.backend_name(db_name), db_name)
+            for name, db_name in backends.items():
+                self._step(f"embeddings:{name}", partial(self._load_embeddings, db_name))
+            for db_name in model_handler.DB_NAMES:
+                if vector_db.VectorStore.index_signature(db_name) is not None:
+                    self._step(f"index:{db_name}", partial(vector_db.VectorStore.load_VDB, db_name))
+        except Exception as e:
+            # The query stack itself failed to import; already recorded by its import step
+            logging.error(f"Warm-up could not load indexes: {e}")
+
+        self.finished_at = time.time()
+        self.state = "failed" if self.errors else "done"
+        logging.info(f"Warm-up {self.state} in {self.finished_at - self.started_at:.2f}s: {self.steps}")
+
+    def status(self):
+        return {
+            "state": self.state,
+            "seconds": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+            "steps": dict(self.steps),
+            "errors": dict(self.errors),
+        }
+
+
+warmup = Warmup()
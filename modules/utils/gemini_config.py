@@ -1,13 +1,20 @@
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
+from modules.utils.lazy_import import lazy_module
+
+# google.generativeai takes about a second to import, so it is loaded on first configuration
+genai = lazy_module("google.generativeai")
+
+_configured_key = None
 
 
 def configure_gemini_api():
     """
     Loads environment variables, ensures the Google API key is set,
-    and configures the Google Gemini API.
+    and configures the Google Gemini API. Later calls with the same key
+    return True without configuring the SDK again.
     """
+    global _configured_key
     # Load environment variables from .env
     load_dotenv()
 
@@ -15,6 +22,8 @@ def configure_gemini_api():
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         return False
+    if api_key == _configured_key:
+        return True
 
     print("✅ Google API Key Loaded Successfully")
 
@@ -25,6 +34,7 @@ def configure_gemini_api():
     os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
     print("✅ Connection established with Google Gemini API")
+    _configured_key = api_key
 
     return True
 
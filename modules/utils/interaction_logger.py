@@ -1,11 +1,7 @@
-import json
-import os
 from datetime import datetime
+from modules.utils.log_writer import log_writer
 
-LOG_FILE = "logs/interactions.json"
-
-# Ensure log directory exists
-os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+LOG_NAME = "interactions"  # written to logs/interactions.jsonl
 
 def log_interaction(model_type: str, model_name: str, question: str, answer: str,docker_status: bool,context_status:bool):
     log_entry = {
@@ -18,7 +14,5 @@ def log_interaction(model_type: str, model_name: str, question: str, answer: str
         "context_status":context_status
     }
 
-    # Append the entry as a JSON line
-    with open(LOG_FILE, "a") as f:
-        json.dump(log_entry, f , indent=4, ensure_ascii=False)
-        f.write(",\n")
+    # Queued and appended as a JSON line by the background log writer
+    log_writer.write(LOG_NAME, log_entry)
@@ -0,0 +1,36 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Lets the API routers refer to the services (and through them LangChain,
+    FAISS and the model SDKs) without importing them when the server starts.
+    The import itself goes through importlib, whose import lock makes
+    concurrent first uses wait for one import.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        """Imports the module if needed and returns it."""
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+
+def lazy_module(name):
+    """Returns a LazyModule for the given dotted module name."""
+    return LazyModule(name)
@@ -1,18 +1,27 @@
-import logging
 import datetime
 import os
-import json
+import hashlib
 from functools import wraps
+from modules.utils.log_writer import log_writer
 
-# Configure logging
 log_dir = "logs"
 os.makedirs(log_dir, exist_ok=True)
 
-logging.basicConfig(
-    filename=os.path.join(log_dir, "retrieval_log.txt"),
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+def chunk_key(doc):
+    """Returns the id a retrieved chunk is logged under (its chunk id, else a hash of its text)."""
+    metadata = getattr(doc, "metadata", {}) or {}
+    if metadata.get("chunk_id"):
+        return metadata["chunk_id"]
+    digest = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()[:12]
+    return f"{metadata['doc_id']}#{digest}" if metadata.get("doc_id") else digest
+
+def _log_retrieval(user_question, retrieved_docs):
+    """Queues one compact record of the chunks retrieved for a question (written by the background log writer)."""
+    log_writer.write("retrieval", {
+        "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "question": user_question,
+        "retrieved": {db_name: [chunk_key(doc) for doc in docs] for db_name, docs in retrieved_docs.items()},
+    })
 
 def log_retrieved_docs(func):
     """Decorator to log retrieved documents from multiple FAISS vector stores."""
@@ -21,34 +30,19 @@ def log_retrieved_docs(func):
     def wrapper(*args, **kwargs):
         result = func(*args, **kwargs)  # Call the original function
         user_question = args[0]  # Extract the user question
-        retrieved_docs = result  # The function returns a dictionary of retrieved documents
-
-        log_data = {
-            "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "question": user_question,
-            "retrieved_docs": {}
-        }
-
-        for db_name, docs in retrieved_docs.items():
-            if docs:
-                log_data["retrieved_docs"][db_name] = [doc.page_content for doc in docs]
-            else:
-                log_data["retrieved_docs"][db_name] = "No relevant documents found."
-
-            # Log separately for each DB
-            with open(os.path.join(log_dir, f"{db_name}_retrieval_log.txt"), "a") as file:
-                file.write(f"\n[{log_data['time']}] Question: {user_question}\n")
-                if docs:
-                    for i, doc in enumerate(docs, start=1):
-                        file.write(f"Document {i}: {doc.page_content}\n")
-                else:
-                    file.write("No relevant documents found.\n")
-
-        # Log full output in JSON format for easier debugging
-        with open(os.path.join(log_dir, "retrieval_summary.json"), "a") as json_file:
-            json.dump(log_data, json_file, indent=4)
-            json_file.write(",\n")
-
+        _log_retrieval(user_question, result)  # The function returns a dictionary of retrieved documents
         return result
 
     return wrapper
+
+def log_retrieved_batch(func):
+    """Decorator to log retrieved documents for a list of questions (one result dict per question)."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        results = func(*args, **kwargs)
+        for user_question, retrieved_docs in zip(args[0], results):
+            _log_retrieval(user_question, retrieved_docs)
+        return results
+
+    return wrapper
@@ -0,0 +1,145 @@
+import os
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from datetime import datetime
+
+LOG_DIR = "logs"
+FLUSH_INTERVAL = 1.0              # seconds a record may wait before its batch is written
+MAX_BATCH = 1000                  # records written per batch at most
+MAX_QUEUE = 10_000                # records beyond this are dropped instead of blocking a request
+ROTATE_BYTES = 50 * 1024 * 1024   # a log file is rotated once it reaches this size ...
+ROTATE_SECONDS = 24 * 60 * 60     # ... or this age
+KEEP_ROTATED = 10                 # compressed files kept per log
+
+_STOP = object()
+
+
+class JsonlLogWriter:
+    """
+    Background writer for JSON-lines logs.
+
+    write() only puts the record on a bounded queue, so it never blocks the
+    caller on disk I/O; when the queue is full the record is dropped and
+    counted. A daemon thread drains the queue in batches, appends each batch
+    to logs/<name>.jsonl with one write, and rotates a file by size or age
+    into logs/<name>-<timestamp>.jsonl.gz, keeping the newest KEEP_ROTATED.
+    """
+
+    def __init__(self, log_dir=LOG_DIR, flush_interval=FLUSH_INTERVAL, max_queue=MAX_QUEUE,
+                 rotate_bytes=ROTATE_BYTES, rotate_seconds=ROTATE_SECONDS, keep_rotated=KEEP_ROTATED):
+        self.log_dir = log_dir
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.keep_rotated = keep_rotated
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._opened = {}   # log name -> time its current file was started (mtime for files from an earlier run)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def path(self, name):
+        return os.path.join(self.log_dir, f"{name}.jsonl")
+
+    def write(self, name, record):
+        """Queues a record for logs/<name>.jsonl; returns False if it had to be dropped."""
+        self._start()
+        try:
+            self._queue.put_nowait((name, record))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """Blocks until every queued record has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout=5):
+        """Writes the remaining records and stops the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            try:
+                self._write_batch([item for item in batch if item is not _STOP])
+            except Exception as e:
+                logging.error(f"Failed to write log batch: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        lines = {}
+        for name, record in batch:
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+            lines.setdefault(name, []).append(line)
+
+        for name, records in lines.items():
+            path = self.path(name)
+            if name not in self._opened:
+                self._opened[name] = os.path.getmtime(path) if os.path.exists(path) else time.time()
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(records) + "\n")
+            self.written += len(records)
+
+            if (os.path.getsize(path) >= self.rotate_bytes
+                    or time.time() - self._opened[name] >= self.rotate_seconds):
+                self._rotate(name)
+
+    def _rotate(self, name):
+        """Compresses the current file of a log and removes the oldest rotated ones."""
+        path = self.path(name)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = os.path.join(self.log_dir, f"{name}-{stamp}.jsonl")
+        os.rename(path, rotated)
+        self._opened[name] = time.time()
+
+        with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+
+        prefix = f"{name}-"
+        old = sorted(f for f in os.listdir(self.log_dir) if f.startswith(prefix) and f.endswith(".jsonl.gz"))
+        for file_name in old[:-self.keep_rotated] if self.keep_rotated else old:
+            os.remove(os.path.join(self.log_dir, file_name))
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+
+log_writer = JsonlLogWriter()
@@ -0,0 +1,30 @@
+import os
+import logging
+
+LOG_DIR = "logs"
+LOG_LEVEL = logging.INFO
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+ERROR_LOG_FILE = "error_log.txt"
+
+
+def configure_logging(level=LOG_LEVEL):
+    """
+    Configures the root logger once per process, from the entry points
+    (fastapi_server.py, main.py): status messages at `level` and above go to
+    stderr, errors are also appended to logs/error_log.txt.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    os.makedirs(LOG_DIR, exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    errors = logging.FileHandler(os.path.join(LOG_DIR, ERROR_LOG_FILE))
+    errors.setLevel(logging.ERROR)
+    errors.setFormatter(formatter)
+
+    root.setLevel(level)
+    root.addHandler(console)
+    root.addHandler(errors)
@@ -0,0 +1,217 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Per-request trace: a list of {"stage", "seconds"} dicts while tracing is on
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self.labelnames, labels, (), value) for labels, value in self._values.items()]
+
+
+class Histogram:
+    """Histogram with fixed buckets; rendered with cumulative bucket counts as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for labels, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _format_value(float(bound))
+                    samples.append((f"{self.name}_bucket", self.labelnames, labels, (("le", le),), cumulative))
+                samples.append((f"{self.name}_sum", self.labelnames, labels, (), series[-1]))
+                samples.append((f"{self.name}_count", self.labelnames, labels, (), cumulative))
+        return samples
+
+
+class CallbackMetric:
+    """Gauge or counter whose values are read from a callback ({label tuple: value}) at scrape time."""
+
+    def __init__(self, name, documentation, labelnames, callback, kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self):
+        try:
+            values = self.callback()
+        except Exception:
+            return []
+        return [(self.name, self.labelnames, labels, (), value) for labels, value in values.items()]
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, labelnames, callback, kind="gauge"):
+        """Registers (or replaces) a metric computed by callback() when scraped."""
+        metric = CallbackMetric(name, documentation, labelnames, callback, kind)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labelnames, labels, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labelnames, labels, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "rag_stage_seconds", "Time spent in each pipeline stage.", ("stage",)
+)
+TOKENS = metrics.counter(
+    "rag_tokens_total", "Estimated tokens handled, by kind (context_in, context_out, answer).", ("kind",)
+)
+QUERIES = metrics.counter(
+    "rag_queries_total", "Queries answered, by endpoint, model type and outcome.", ("endpoint", "model_type", "outcome")
+)
+ITEMS = metrics.counter(
+    "rag_items_total", "Items processed, by kind (chunks, embeddings, embedding_retries, questions).", ("kind",)
+)
+
+
+def record(stage_name, seconds):
+    """Records the duration of a stage in the histogram and in the current trace, if any."""
+    STAGE_SECONDS.observe(seconds, stage_name)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append({"stage": stage_name, "seconds": round(seconds, 4)})
+
+
+@contextmanager
+def stage(stage_name):
+    """Times the enclosed block as one observation of a pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage_name, time.perf_counter() - start)
+
+
+def timed_iter(iterable, stage_name):
+    """
+    Yields from iterable, recording the time spent producing its items
+    (not the time the consumer spends on them) as one stage observation.
+    """
+    iterator = iter(iterable)
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - start
+                return
+            elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            iterator.close()
+        record(stage_name, elapsed)
+
+
+def start_trace():
+    """
+    Starts collecting stages for the rest of the current context (one asyncio
+    task, e.g. a streaming response) and returns the trace list.
+    """
+    trace = []
+    _trace.set(trace)
+    return trace
+
+
+@contextmanager
+def tracing(enabled=True):
+    """
+    Collects the stages recorded in this context (including work handed to
+    threads with a copied context) into a list, or yields None if disabled.
+    """
+    if not enabled:
+        yield None
+        return
+    trace = []
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
@@ -1,21 +1,23 @@
-import os
-import shutil
+from modules.workflow.document.vector_db import VectorStore, VECTOR_STORE_DIR
 
 class Cleanup:
     @staticmethod
     def clear_vector_store(db_name):
         """Clears a specific FAISS vector store by deleting the stored index."""
         for i in db_name:
-            directory = f"vector_store/{i}"
+            directory = f"{VECTOR_STORE_DIR}/{i}"
 
             try:
-                if os.path.exists(directory):
-                    shutil.rmtree(directory)
+                # Waits for an ingestion job writing to this category to publish first;
+                # workers still reading the index keep it until their next query
+                if VectorStore.clear(i):
                     print(f"Deleted FAISS index at: {directory}")
                 else:
                     print(f"No index found at: {directory}")
             except Exception as e:
                 print(f"Error deleting {directory}: {e}")
                 return False
+            finally:
+                VectorStore.invalidate(i)
 
         return True
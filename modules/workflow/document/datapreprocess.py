@@ -1,27 +1,241 @@
+import os
+import re
+import bisect
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.docstore.document import Document
+from modules.utils import metrics
+from modules.workflow.document.embeddings import max_chunk_chars
+
+PARALLEL_MIN_PAGES = 40  # below this, process start-up costs more than it saves
+MIN_PAGES_PER_TASK = 8
+CHUNK_SIZE = 10000
+CHUNK_OVERLAP = 3000
+STREAM_BUFFER_CHUNKS = 4  # chunks worth of page text buffered before splitting when streaming
+
+# Chunk size / overlap (in characters) per vector store category. Statutes are
+# short, self-contained sections; judgments need more surrounding context.
+CHUNKING_CONFIG = {
+    "Laws": {"chunk_size": 4000, "chunk_overlap": 400},
+    "Case": {"chunk_size": 8000, "chunk_overlap": 800},
+}
+
+# Lines that open a new section of a statute or judgment, e.g. "Section 498A.",
+# "CHAPTER XVI", "Article 21" or an all-caps heading line.
+SECTION_HEADING = re.compile(
+    r"^[ \t]*((?:section|sec\.|article|chapter|part|schedule|order|rule)[ \t]+[0-9IVXLCDM]+[A-Z]?\b[^\n]{0,100})",
+    re.IGNORECASE | re.MULTILINE,
+)
+CAPS_HEADING = re.compile(r"^[ \t]*([A-Z][A-Z0-9 ,.'()&-]{3,80})[ \t]*$", re.MULTILINE)
+
+
+def _extract_page_range(path, start, stop):
+    """Extracts the text of pages [start, stop) of a PDF file (runs in a worker process)."""
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _find_headings(text):
+    """Returns sorted (offset, heading) pairs of the section headings found in text."""
+    headings = [(m.start(1), m.group(1).strip()) for m in SECTION_HEADING.finditer(text)]
+    headings += [(m.start(1), m.group(1).strip()) for m in CAPS_HEADING.finditer(text)]
+    return sorted(headings)
+
 
 class DocumentProcessor:
-    def __init__(self, pdf_docs):
+    def __init__(self, pdf_docs, workers=None, names=None, category=None, chunk_size=None, chunk_overlap=None):
         self.pdf_docs = pdf_docs  # List of PDF file paths or file-like objects
+        self.names = names or [self._document_name(pdf, i) for i, pdf in enumerate(pdf_docs)]
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        config = CHUNKING_CONFIG.get(category, {})
+        self.chunk_size = chunk_size or config.get("chunk_size", CHUNK_SIZE)
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else config.get("chunk_overlap", CHUNK_OVERLAP)
+        limit = max_chunk_chars(category) if category and not chunk_size else None
+        if limit and self.chunk_size > limit:
+            # The category's embedding model would truncate longer chunks: chunk at its limit, same overlap ratio
+            self.chunk_overlap = self.chunk_overlap * limit // self.chunk_size
+            self.chunk_size = limit
         self.text = ""
         self.text_chunks = []
+        self.pages_read = 0  # pages consumed so far by iter_chunks, for progress reporting
 
     def extract_text(self):
         """Extracts text from multiple PDF documents."""
         all_text = []
-        for pdf in self.pdf_docs:
-            reader = PdfReader(pdf)
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                all_text.append(page_text)
+        for pages in self.extract_pages():
+            all_text.extend(pages)
         self.text = "\n".join(all_text)
         return self.text
 
+    def extract_pages(self):
+        """Extracts the text of every page, as one list of page texts per document."""
+        documents = [[] for _ in self.pdf_docs]
+        for doc_index, page_text in self.iter_pages():
+            documents[doc_index].append(page_text)
+        return documents
+
+    def iter_pages(self):
+        """
+        Yields (document index, page text) for every page, in order.
+
+        Large inputs are split into page ranges and extracted across a process
+        pool of `workers` processes; page order is preserved and the output is
+        identical to the serial extractor. Only a bounded window of page ranges
+        is in flight at a time, so pages are streamed rather than collected.
+        The time spent extracting is recorded as the "pdf_extraction" stage.
+        """
+        return metrics.timed_iter(self._read_pages(), "pdf_extraction")
+
+    def _read_pages(self):
+        readers = [PdfReader(pdf) for pdf in self.pdf_docs]
+        total_pages = sum(len(reader.pages) for reader in readers)
+
+        if self.workers <= 1 or total_pages < PARALLEL_MIN_PAGES:
+            for doc_index, reader in enumerate(readers):
+                for page in reader.pages:
+                    yield doc_index, page.extract_text() or ""
+            return
+
+        yield from self._iter_pages_parallel(readers, total_pages)
+
+    def _iter_pages_parallel(self, readers, total_pages):
+        pages_per_task = max(MIN_PAGES_PER_TASK, -(-total_pages // (self.workers * 4)))
+        temp_paths = []
+        try:
+            tasks = []
+            for doc_index, (pdf, reader) in enumerate(zip(self.pdf_docs, readers)):
+                path = pdf if isinstance(pdf, (str, os.PathLike)) else self._spool_to_disk(pdf, temp_paths)
+                for start in range(0, len(reader.pages), pages_per_task):
+                    tasks.append((doc_index, path, start, min(start + pages_per_task, len(reader.pages))))
+
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as executor:
+                task_iter = iter(tasks)
+                pending = deque()
+                for doc_index, path, start, stop in task_iter:
+                    pending.append((doc_index, executor.submit(_extract_page_range, path, start, stop)))
+                    if len(pending) >= self.workers * 2:
+                        break
+                while pending:
+                    doc_index, future = pending.popleft()
+                    for page_text in future.result():
+                        yield doc_index, page_text
+                    for next_doc, path, start, stop in task_iter:
+                        pending.append((next_doc, executor.submit(_extract_page_range, path, start, stop)))
+                        break
+        finally:
+            for path in temp_paths:
+                os.remove(path)
+
+    def iter_chunks(self):
+        """
+        Yields chunks as Documents, document by document, without building the full text.
+
+        Page text is buffered until it spans a few chunks, split, and every
+        chunk but the last is emitted; the last one is carried over so chunk
+        boundaries do not depend on page boundaries. Chunks never cross
+        document boundaries and carry the source file name, page range,
+        section heading and a stable chunk id in their metadata.
+        """
+        state = None
+        for doc_index, page_text in self.iter_pages():
+            if state is None or state["doc_index"] != doc_index:
+                if state is not None:
+                    yield from self._split_buffer(state, final=True)
+                state = {"doc_index": doc_index, "text": "", "pages": [], "page_no": 0, "heading": "", "chunk_no": 0}
+
+            state["page_no"] += 1
+            self.pages_read += 1
+            if state["text"]:
+                state["text"] += "\n"
+            state["pages"].append((len(state["text"]), state["page_no"]))
+            state["text"] += page_text
+            if len(state["text"]) >= self.chunk_size * STREAM_BUFFER_CHUNKS:
+                yield from self._split_buffer(state, final=False)
+
+        if state is not None:
+            yield from self._split_buffer(state, final=True)
+
+    def _split_buffer(self, state, final):
+        """Splits the buffered text of one document; unless final, the last chunk is carried over."""
+        text = state["text"]
+        with metrics.stage("chunking"):
+            pieces = self._text_splitter(add_start_index=True).create_documents([text])
+            headings = _find_headings(text)
+        carry = None if final or len(pieces) < 2 else pieces.pop()
+
+        page_offsets = [offset for offset, _ in state["pages"]]
+        heading_offsets = [offset for offset, _ in headings]
+
+        for piece in pieces:
+            start = piece.metadata["start_index"]
+            end = start + len(piece.page_content)
+            first_page = state["pages"][max(0, bisect.bisect_right(page_offsets, start) - 1)][1]
+            last_page = state["pages"][max(0, bisect.bisect_left(page_offsets, end) - 1)][1]
+
+            # Prefer a heading that opens inside the chunk, else the last one before it
+            inside = bisect.bisect_left(heading_offsets, start)
+            if inside < len(headings) and headings[inside][0] < end:
+                section = headings[inside][1]
+            elif inside > 0:
+                section = headings[inside - 1][1]
+            else:
+                section = state["heading"]
+
+            name = self.names[state["doc_index"]]
+            yield Document(page_content=piece.page_content, metadata={
+                "source": name,
+                "page_start": first_page,
+                "page_end": last_page,
+                "section": section,
+                "chunk_id": f"{name}:{state['chunk_no']}",
+            })
+            state["chunk_no"] += 1
+
+        if carry is None:
+            state["text"], state["pages"] = "", []
+            return
+
+        # Keep the unsplit tail (and the pages and heading it belongs to) for the next round
+        offset = carry.metadata["start_index"]
+        before = bisect.bisect_right(heading_offsets, offset) - 1
+        if before >= 0:
+            state["heading"] = headings[before][1]
+        first = max(0, bisect.bisect_right(page_offsets, offset) - 1)
+        state["pages"] = [(max(0, page_offset - offset), page_no) for page_offset, page_no in state["pages"][first:]]
+        state["text"] = text[offset:]
+
+    @staticmethod
+    def _document_name(pdf, index):
+        """Returns a display name for a PDF given as a path or file-like object."""
+        if isinstance(pdf, (str, os.PathLike)):
+            return os.path.basename(pdf)
+        return os.path.basename(getattr(pdf, "name", "") or f"document_{index + 1}.pdf")
+
+    @staticmethod
+    def _spool_to_disk(pdf, temp_paths):
+        """Copies a file-like PDF to a temporary file so worker processes can open it by path."""
+        pdf.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            temp_paths.append(tmp.name)
+            while True:
+                block = pdf.read(1024 * 1024)
+                if not block:
+                    break
+                tmp.write(block)
+        pdf.seek(0)
+        return tmp.name
+
+    def _text_splitter(self, add_start_index=False):
+        return RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap,
+                                              add_start_index=add_start_index)
+
     def split_text(self):
         """Splits extracted text into manageable chunks."""
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=3000)
-        self.text_chunks = text_splitter.split_text(self.text)
+        with metrics.stage("chunking"):
+            self.text_chunks = self._text_splitter().split_text(self.text)
         return self.text_chunks
 
     def run(self):
@@ -0,0 +1,144 @@
+import os
+import time
+import sqlite3
+import inspect
+import hashlib
+import logging
+import threading
+from array import array
+from langchain_core.embeddings import Embeddings
+
+CACHE_PATH = "cache/embeddings.sqlite"
+MAX_ENTRIES = 500_000
+MAX_BYTES = 2 * 1024 ** 3  # 2 GiB of stored vectors
+
+
+class EmbeddingCache:
+    """
+    Persistent on-disk cache of embedding vectors.
+
+    Entries are keyed by a SHA-256 of the embedding model name and the chunk
+    text, so the same chunk is only ever embedded once per model. When the
+    cache grows past max_entries or max_bytes, the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, model_name, path=CACHE_PATH, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def key(self, text):
+        """Returns the cache key of a chunk for this cache's model."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Returns {text: vector} for every text that is already cached."""
+        keys = {self.key(text): text for text in texts}
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            for start in range(0, len(key_list), 500):
+                batch = key_list[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[keys[key]] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, self.key(text)) for text in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, text_vectors):
+        """Stores {text: vector} pairs and evicts old entries if the cache is over its limits."""
+        if not text_vectors:
+            return
+        now = time.time()
+        rows = [(self.key(text), array("f", vector).tobytes(), now) for text, vector in text_vectors.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits its limits."""
+        count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        excess = count - self.max_entries
+        if size > self.max_bytes and count:
+            excess = max(excess, int(count * (size - self.max_bytes) / size) + 1)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        logging.info(f"Evicted {excess} entries from embedding cache {self.path}")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends cache misses to the underlying model.
+
+    `embedder` is either a LangChain Embeddings object or a plain callable
+    taking a list of texts and returning a list of vectors.
+    """
+
+    def __init__(self, embedder, cache):
+        self.embedder = embedder
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def _embed_uncached(self, texts):
+        if isinstance(self.embedder, Embeddings):
+            return self.embedder.embed_documents(texts)
+        return self.embedder(texts)
+
+    def embed_documents(self, texts):
+        cached = self.cache.get_many(texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            fresh = dict(zip(missing, self._embed_uncached(missing)))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+
+        return [cached[text] for text in texts]
+
+    def embed_query(self, text):
+        if isinstance(self.embedder, Embeddings):
+            return self.embedder.embed_query(text)
+        return self._embed_uncached([text])[0]
+
+    def embed_queries(self, texts):
+        """Embeds several questions in one batched call; like embed_query, results are not cached."""
+        if not isinstance(self.embedder, Embeddings):
+            return self._embed_uncached(texts)
+        if "task_type" in inspect.signature(self.embedder.embed_documents).parameters:
+            return self.embedder.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+        return [self.embedder.embed_query(text) for text in texts]
@@ -0,0 +1,85 @@
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+from modules.utils import metrics
+
+BATCH_SIZE = 100
+MAX_CONCURRENCY = 4
+MAX_RETRIES = 6
+BASE_DELAY = 1.0   # seconds before the first retry
+MAX_DELAY = 60.0   # upper bound of a single backoff sleep
+
+
+def is_rate_limited(error):
+    """Returns True if an embedding error means the remote API is throttling us (HTTP 429 / quota)."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests", "RateLimitError"):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ("429", "rate limit", "quota", "resource exhausted", "resource has been exhausted"))
+
+
+class EmbeddingPipeline:
+    """
+    Embeds chunks in batches with bounded concurrency.
+
+    `embed_fn` is either a LangChain Embeddings object or any callable taking a
+    list of texts and returning a list of vectors, so the pipeline can be
+    benchmarked offline against a local stub. Throttled batches are retried with
+    exponential backoff and jitter; other errors are raised immediately.
+    """
+
+    def __init__(self, embed_fn, batch_size=BATCH_SIZE, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.embed_fn = embed_fn.embed_documents if isinstance(embed_fn, Embeddings) else embed_fn
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {}
+
+    def _embed_batch(self, batch):
+        attempt = 0
+        while True:
+            try:
+                return self.embed_fn(batch), attempt
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay = random.uniform(delay / 2, delay)
+                logging.warning(f"Embedding batch throttled, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                attempt += 1
+
+    def run(self, texts):
+        """Embeds all texts and returns their vectors in input order."""
+        texts = list(texts)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        start = time.perf_counter()
+        vectors = []
+        retries = 0
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                for batch_vectors, batch_retries in executor.map(self._embed_batch, batches):
+                    vectors.extend(batch_vectors)
+                    retries += batch_retries
+        elapsed = time.perf_counter() - start
+        metrics.record("embedding", elapsed)
+        metrics.ITEMS.inc("embeddings", amount=len(texts))
+        metrics.ITEMS.inc("embedding_retries", amount=retries)
+
+        self.stats = {
+            "chunks": len(texts),
+            "batches": len(batches),
+            "retries": retries,
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        logging.info(f"Embedded {len(texts)} chunks in {elapsed:.2f}s ({self.stats['chunks_per_second']} chunks/s, {retries} retries)")
+        return vectors
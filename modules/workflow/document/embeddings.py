@@ -1,22 +1,136 @@
 import logging
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import threading
 import os
+from langchain_core.embeddings import Embeddings
 from modules.utils.gemini_config import configure_gemini_api
+from modules.utils.lazy_import import lazy_module
+from modules.workflow.document.embedding_cache import EmbeddingCache, CachedEmbeddings
+from modules.workflow.document.local_embeddings import MAX_CHUNK_CHARS as LOCAL_MAX_CHUNK_CHARS
+from modules.utils.metrics import metrics
 
-#configuring_api
-configure_gemini_api()
+langchain_google_genai = lazy_module("langchain_google_genai")
+
+EMBEDDING_MODEL = "models/embedding-001"
+
+# Backend used to embed a category: RAG_EMBEDDING_BACKEND sets it for every
+# category, RAG_EMBEDDING_BACKEND_<CATEGORY> (e.g. RAG_EMBEDDING_BACKEND_LAWS)
+# for one. "gemini" is the remote Google model, "local" an ONNX model on the CPU.
+EMBEDDING_BACKEND_ENV = "RAG_EMBEDDING_BACKEND"
+DEFAULT_BACKEND = "gemini"
+LOCAL_MODEL_ENV = "RAG_LOCAL_EMBEDDING_MODEL"
+LOCAL_MODEL_DIR = os.getenv(LOCAL_MODEL_ENV, os.path.join("models", "all-MiniLM-L6-v2"))
+LOCAL_MODEL_NAME = f"onnx/{os.path.basename(os.path.normpath(LOCAL_MODEL_DIR))}"
 
-log_dir = "logs"
-os.makedirs(log_dir, exist_ok=True)
-# Configure logging
-logging.basicConfig(filename="logs/error_log.txt", level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s")
 
 def get_embeddings():
-    """Initializes and returns Google Generative AI embeddings."""
+    """Initializes and returns Google Generative AI embeddings, backed by the on-disk embedding cache."""
     try:
-        return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        configure_gemini_api()
+        return CachedEmbeddings(
+            langchain_google_genai.GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL),
+            EmbeddingCache(model_name=EMBEDDING_MODEL),
+        )
     except Exception as e:
         logging.error(f"Failed to initialize embeddings: {e}")
         return None
 
-embeddings = get_embeddings()
+
+def get_local_embeddings():
+    """Loads the local ONNX embedding model from LOCAL_MODEL_DIR, backed by the on-disk embedding cache."""
+    try:
+        from modules.workflow.document.local_embeddings import OnnxEmbeddings
+        return CachedEmbeddings(OnnxEmbeddings(LOCAL_MODEL_DIR), EmbeddingCache(model_name=LOCAL_MODEL_NAME))
+    except Exception as e:
+        logging.error(f"Failed to initialize local embeddings from {LOCAL_MODEL_DIR}: {e}")
+        return None
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Embeddings that are built by `factory` on first use instead of at import.
+
+    Importing this module therefore neither configures the Gemini SDK nor
+    opens the embedding cache. If the factory fails (returns None), every use
+    raises a RuntimeError, which callers handle like any other embedding error;
+    the next use tries again. `model_name` identifies the vectors the backend
+    produces and is known without building it.
+    """
+
+    def __init__(self, factory, model_name):
+        self._factory = factory
+        self.model_name = model_name
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def get(self):
+        """Returns the underlying embeddings, building them on the first call."""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    instance = self._factory()
+                    if instance is None:
+                        raise RuntimeError(f"Embeddings model {self.model_name} could not be initialized.")
+                    self._instance = instance
+        return self._instance
+
+    def embed_documents(self, texts, *args, **kwargs):
+        return self.get().embed_documents(texts, *args, **kwargs)
+
+    def embed_query(self, text):
+        return self.get().embed_query(text)
+
+    def __getattr__(self, name):
+        # Only reached for attributes LazyEmbeddings does not define (embed_queries, hits, ...)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+EMBEDDING_BACKENDS = {
+    "gemini": LazyEmbeddings(get_embeddings, EMBEDDING_MODEL),
+    "local": LazyEmbeddings(get_local_embeddings, LOCAL_MODEL_NAME),
+}
+
+
+# Longest chunk, in characters, each backend embeds without truncating it (None: no smaller than any chunk)
+BACKEND_MAX_CHUNK_CHARS = {
+    "gemini": None,
+    "local": LOCAL_MAX_CHUNK_CHARS,
+}
+
+
+def backend_name(db_name):
+    """Returns the name of the embedding backend configured for a category."""
+    name = os.getenv(f"{EMBEDDING_BACKEND_ENV}_{db_name.upper()}") or os.getenv(EMBEDDING_BACKEND_ENV)
+    return (name or DEFAULT_BACKEND).strip().lower()
+
+
+def embeddings_for(db_name):
+    """Returns the embeddings used to index and query a category."""
+    name = backend_name(db_name)
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}' for {db_name}; expected one of {sorted(EMBEDDING_BACKENDS)}")
+    return EMBEDDING_BACKENDS[name]
+
+
+def max_chunk_chars(db_name):
+    """Returns the longest chunk the embedding backend of a category embeds whole, or None if it has no lower limit."""
+    return BACKEND_MAX_CHUNK_CHARS.get(backend_name(db_name))
+
+
+def _cache_lookups():
+    loaded = [backend for backend in EMBEDDING_BACKENDS.values() if getattr(backend, "loaded", True)]
+    if not loaded:
+        return {}
+    return {("hit",): sum(getattr(backend, "hits", 0) for backend in loaded),
+            ("miss",): sum(getattr(backend, "misses", 0) for backend in loaded)}
+
+
+metrics.callback(
+    "rag_embedding_cache_lookups_total", "Embedding cache lookups during ingestion, by result.", ("result",),
+    _cache_lookups, kind="counter",
+)
@@ -0,0 +1,250 @@
+import math
+import logging
+import numpy as np
+import faiss
+
+# Index type per category. A category starts as "type" and is rebuilt as
+# "switch_to" once it holds at least "switch_at" vectors. Supported types:
+# "flat", "ivf_flat", "ivf_pq" and "hnsw".
+INDEX_CONFIG = {
+    "Laws": {"type": "flat", "switch_at": 50_000, "switch_to": "hnsw"},
+    "Case": {"type": "flat", "switch_at": 100_000, "switch_to": "ivf_flat"},
+}
+DEFAULT_INDEX_CONFIG = {"type": "flat", "switch_at": None, "switch_to": None}
+
+# Build-time parameters
+IVF_MIN_POINTS_PER_LIST = 39   # FAISS warns when training with fewer points per centroid
+TRAIN_SAMPLE_SIZE = 100_000    # vectors sampled to train IVF/PQ quantizers
+PQ_SUB_VECTOR_DIM = 8          # dimensions per PQ sub-quantizer (768-d -> 96 bytes per vector)
+PQ_NBITS = 8
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+
+# Query-time parameters, per category (falls back to the defaults)
+SEARCH_PARAMS = {}
+DEFAULT_SEARCH_PARAMS = {"nprobe": 16, "ef_search": 64}
+
+# Flat L2 indexes are stored as a plain (n, d) float32 array in this file
+# instead of index.faiss, so that readers can memory-map it
+VECTORS_FILE = "vectors.npy"
+
+
+class MappedFlatIndex:
+    """
+    Read-only exact L2 index over a memory-mapped (n, d) float32 array.
+
+    FAISS 1.8 can only map the inverted lists of IVF indexes and always reads
+    a flat index into the process heap. Searching the mapped array with
+    faiss.knn (the same BLAS kernel IndexFlatL2 uses) lets every worker share
+    one copy of the vectors in the page cache. Implements the part of the
+    faiss.Index interface that readers use.
+    """
+
+    metric_type = faiss.METRIC_L2
+    is_trained = True
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.ntotal, self.d = vectors.shape
+
+    def search(self, x, k):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if self.ntotal == 0:
+            return (np.full((len(x), k), np.finfo(np.float32).max, dtype=np.float32),
+                    np.full((len(x), k), -1, dtype=np.int64))
+        return faiss.knn(x, self.vectors, k, faiss.METRIC_L2)
+
+    def search_and_reconstruct(self, x, k):
+        distances, labels = self.search(x, k)
+        found = self.vectors[np.maximum(labels, 0)] if self.ntotal else np.zeros((*labels.shape, self.d), np.float32)
+        return distances, labels, np.where((labels >= 0)[..., None], found, 0.0).astype(np.float32)
+
+    def reconstruct(self, key):
+        if not 0 <= key < self.ntotal:
+            raise RuntimeError(f"key {key} out of range for {self.ntotal} vectors")
+        return np.array(self.vectors[key])
+
+    def reconstruct_n(self, start, n):
+        return np.array(self.vectors[start:start + n])
+
+
+def category_config(db_name):
+    return {**DEFAULT_INDEX_CONFIG, **INDEX_CONFIG.get(db_name, {})}
+
+
+def index_type(index):
+    """Returns the configured type name ("flat", "ivf_flat", "ivf_pq", "hnsw") of a FAISS index."""
+    if isinstance(index, MappedFlatIndex):
+        return "flat"
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def target_type(db_name, ntotal):
+    """Returns the index type a category should use at a given size."""
+    config = category_config(db_name)
+    if config["switch_at"] is not None and config["switch_to"] and ntotal >= config["switch_at"]:
+        return config["switch_to"]
+    return config["type"]
+
+
+def nlist_for(ntotal):
+    """Number of IVF lists: about 4 * sqrt(n), limited so every list gets enough training points."""
+    return max(1, min(int(4 * math.sqrt(ntotal)), ntotal // IVF_MIN_POINTS_PER_LIST))
+
+
+def factory_string(kind, dim, ntotal):
+    if kind == "flat":
+        return "Flat"
+    if kind == "ivf_flat":
+        return f"IVF{nlist_for(ntotal)},Flat"
+    if kind == "ivf_pq":
+        m = max(1, dim // PQ_SUB_VECTOR_DIM)
+        while dim % m:
+            m -= 1
+        return f"IVF{nlist_for(ntotal)},PQ{m}x{PQ_NBITS}"
+    if kind == "hnsw":
+        return f"HNSW{HNSW_M},Flat"
+    raise ValueError(f"Unknown index type '{kind}'")
+
+
+def can_build(kind, ntotal):
+    """IVF/PQ quantizers need enough vectors to train; below that a flat index is used."""
+    if kind == "ivf_flat":
+        return ntotal >= IVF_MIN_POINTS_PER_LIST
+    if kind == "ivf_pq":
+        return ntotal >= max(IVF_MIN_POINTS_PER_LIST, 2 ** PQ_NBITS * IVF_MIN_POINTS_PER_LIST)
+    return True
+
+
+def build_index(kind, vectors, seed=1234):
+    """Builds and fills an index of the given type, training it on a sample of the vectors."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ntotal, dim = vectors.shape
+    index = faiss.index_factory(dim, factory_string(kind, dim, ntotal), faiss.METRIC_L2)
+    if kind == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        sample = vectors
+        if ntotal > TRAIN_SAMPLE_SIZE:
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(ntotal, TRAIN_SAMPLE_SIZE, replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    return index
+
+
+def is_mappable(index):
+    """Flat L2 indexes are written as VECTORS_FILE; other types keep FAISS's own format."""
+    index = faiss.downcast_index(index)
+    return isinstance(index, faiss.IndexFlat) and index.metric_type == faiss.METRIC_L2
+
+
+def save_flat(index, path):
+    np.save(path, np.ascontiguousarray(reconstruct_all(index), dtype=np.float32))
+
+
+def load_flat(path, mapped=False):
+    """
+    Reads a VECTORS_FILE: memory-mapped behind a MappedFlatIndex for readers,
+    or copied into a writable IndexFlatL2 for writers.
+    """
+    if mapped:
+        try:
+            return MappedFlatIndex(np.load(path, mmap_mode="r"))
+        except ValueError:
+            # An empty array leaves nothing to map
+            return MappedFlatIndex(np.load(path))
+    vectors = np.load(path)
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    return index
+
+
+def reconstruct_all(index):
+    """Returns every stored vector (approximate for PQ indexes) as an (n, d) array."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return index.reconstruct_n(0, index.ntotal)
+    # IVF lists need a direct map to reconstruct by position; drop it afterwards
+    # because remove_ids() is not supported while it exists
+    ivf.make_direct_map()
+    try:
+        return index.reconstruct_n(0, index.ntotal)
+    finally:
+        ivf.make_direct_map(False)
+
+
+def supports_remove(index):
+    """
+    Only flat indexes renumber the remaining vectors on remove_ids(), which
+    the LangChain store relies on; IVF keeps the old labels and HNSW cannot
+    remove at all.
+    """
+    return index_type(index) == "flat"
+
+
+def search_params(db_name):
+    return {**DEFAULT_SEARCH_PARAMS, **SEARCH_PARAMS.get(db_name, {})}
+
+
+def tune_search(index, db_name):
+    """Applies the category's query-time nprobe / efSearch to an index."""
+    params = search_params(db_name)
+    kind = index_type(index)
+    if kind in ("ivf_flat", "ivf_pq"):
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", params["nprobe"])
+    elif kind == "hnsw":
+        faiss.ParameterSpace().set_index_parameter(index, "efSearch", params["ef_search"])
+
+
+def maybe_rebuild(db_name, vector_store):
+    """
+    Rebuilds a store's index when the category has grown past its switch
+    threshold (or is configured for a non-flat type). Returns True if rebuilt.
+    """
+    ntotal = vector_store.index.ntotal
+    kind = target_type(db_name, ntotal)
+    if kind == index_type(vector_store.index) or not can_build(kind, ntotal):
+        return False
+
+    logging.warning(f"Rebuilding {db_name} index as {kind} ({ntotal} vectors)")
+    vector_store.index = build_index(kind, reconstruct_all(vector_store.index))
+    tune_search(vector_store.index, db_name)
+    return True
+
+
+def remove_vectors(vector_store, chunk_ids):
+    """
+    Removes chunks from a LangChain FAISS store. Indexes that cannot remove
+    in place are refilled from their remaining vectors; IVF indexes keep their
+    trained quantizer, HNSW graphs are rebuilt.
+    """
+    if supports_remove(vector_store.index):
+        vector_store.delete(chunk_ids)
+        return
+
+    drop = set(chunk_ids)
+    positions = sorted(vector_store.index_to_docstore_id)
+    keep = [i for i in positions if vector_store.index_to_docstore_id[i] not in drop]
+    vectors = reconstruct_all(vector_store.index)[keep]
+
+    index = vector_store.index
+    if index_type(index) == "hnsw":
+        index = build_index("hnsw", vectors) if keep else faiss.IndexFlatL2(index.d)
+    else:
+        index.reset()
+        index.add(vectors)
+    vector_store.index = index
+    vector_store.docstore.delete(list(drop))
+    vector_store.index_to_docstore_id = {
+        new: vector_store.index_to_docstore_id[old] for new, old in enumerate(keep)
+    }
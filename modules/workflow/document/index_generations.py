@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, a single server process is assumed
+    fcntl = None
+
+# Layout of a category directory (vector_store/<category>/):
+#   CURRENT                  manifest naming the published generation
+#   WRITE.lock               held exclusively by the one process writing the category
+#   generations/<id>/        immutable index files of one generation, plus LEASE
+#   generations/<id>.tmp/    a generation being written
+MANIFEST_FILE = "CURRENT"
+WRITE_LOCK_FILE = "WRITE.lock"
+GENERATIONS_DIR = "generations"
+LEASE_FILE = "LEASE"
+WORK_SUFFIX = ".tmp"
+
+
+def new_generation_id():
+    """Returns a unique generation id that sorts by creation time."""
+    return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+
+def generation_path(category_path, generation):
+    return os.path.join(category_path, GENERATIONS_DIR, generation)
+
+
+def read_manifest(category_path):
+    """Returns the published manifest of a category, or None if nothing is published."""
+    try:
+        with open(os.path.join(category_path, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("generation") else None
+
+
+def write_manifest(category_path, generation, **details):
+    """Publishes a generation by atomically replacing the manifest."""
+    manifest = {"generation": generation, "published_at": datetime.now().isoformat(timespec="seconds"), **details}
+    tmp_path = os.path.join(category_path, f"{MANIFEST_FILE}.{uuid.uuid4().hex}{WORK_SUFFIX}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(category_path, MANIFEST_FILE))
+    return manifest
+
+
+def remove_manifest(category_path):
+    try:
+        os.remove(os.path.join(category_path, MANIFEST_FILE))
+    except FileNotFoundError:
+        pass
+
+
+class Lease:
+    """
+    A reader's hold on one generation: a shared flock on its LEASE file.
+
+    The lock lives as long as the file stays open and is dropped by the
+    kernel if the process dies, so a crashed worker never pins a generation.
+    """
+
+    def __init__(self, path, handle):
+        self.path = path
+        self._handle = handle
+
+    def release(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def acquire_lease(path):
+    """Leases the generation at path; returns None if it has been (or is being) collected."""
+    try:
+        handle = open(os.path.join(path, LEASE_FILE), "rb")
+    except FileNotFoundError:
+        return None
+    if fcntl is not None:
+        fcntl.flock(handle, fcntl.LOCK_SH)
+    # The collector renames a generation away while holding the exclusive lock
+    if not os.path.isdir(path):
+        handle.close()
+        return None
+    return Lease(path, handle)
+
+
+def create_work_dir(category_path, generation):
+    """Creates the directory a new generation is written to (with the LEASE file readers will lock)."""
+    path = generation_path(category_path, generation) + WORK_SUFFIX
+    os.makedirs(path)
+    open(os.path.join(path, LEASE_FILE), "ab").close()
+    return path
+
+
+class WriteLock:
+    """
+    Serialises writers of one category within the process (threading lock)
+    and across processes (exclusive flock on WRITE.lock).
+    """
+
+    def __init__(self, category_path):
+        self.category_path = category_path
+        self._thread_lock = threading.Lock()
+        self._handle = None
+
+    def acquire(self, blocking=True):
+        """Acquires both locks; with blocking=False returns False instead of waiting for a writer."""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            os.makedirs(self.category_path, exist_ok=True)
+            self._handle = open(os.path.join(self.category_path, WRITE_LOCK_FILE), "ab")
+            if fcntl is not None:
+                fcntl.flock(self._handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._release_handle()
+            self._thread_lock.release()
+            return False
+        except Exception:
+            self._release_handle()
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self):
+        self._release_handle()
+        self._thread_lock.release()
+
+    def _release_handle(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def _try_exclusive(lease_path):
+    """Returns the LEASE file opened and locked exclusively, or None while any reader holds it."""
+    handle = open(lease_path, "rb")
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return handle
+    except BlockingIOError:
+        handle.close()
+        return None
+
+
+def collect_garbage(category_path, write_locked=False):
+    """
+    Deletes the generations of a category, other than the published one,
+    that no reader in any process holds a lease on, and returns their names.
+
+    Without the category's write lock a writer may be publishing at the same
+    time, so only generations older than the published one are considered;
+    with it (write_locked) every other generation and the work directories
+    left by failed writes are removed as well.
+    """
+    root = os.path.join(category_path, GENERATIONS_DIR)
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    manifest = read_manifest(category_path)
+    current = manifest["generation"] if manifest else None
+    if current is None and not write_locked:
+        return []
+
+    removed = []
+    for name in sorted(names):
+        path = os.path.join(root, name)
+        if name == current or ".deleted-" in name:
+            continue
+        if not write_locked and (name.endswith(WORK_SUFFIX) or name > current):
+            continue
+        lease_path = os.path.join(path, LEASE_FILE)
+        handle = None
+        if os.path.exists(lease_path):
+            handle = _try_exclusive(lease_path)
+            if handle is None:
+                continue
+        try:
+            trash = f"{path}.deleted-{uuid.uuid4().hex}"
+            os.rename(path, trash)
+        except OSError as e:
+            logging.error(f"Could not remove index generation {path}: {e}")
+            continue
+        finally:
+            if handle is not None:
+                handle.close()
+        shutil.rmtree(trash, ignore_errors=True)
+        removed.append(name)
+
+    # Leftovers of a collector that stopped between rename and delete
+    for name in names:
+        if ".deleted-" in name:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return removed
@@ -0,0 +1,232 @@
+import os
+import time
+import queue
+import logging
+import threading
+from modules.workflow.document.datapreprocess import DocumentProcessor
+from modules.workflow.document.embedding_pipeline import EmbeddingPipeline, BATCH_SIZE, MAX_CONCURRENCY
+from modules.workflow.document.embeddings import embeddings_for
+from modules.workflow.document.vector_db import IndexWriter
+
+CHUNK_QUEUE_SIZE = 256   # chunks waiting to be embedded
+BATCH_QUEUE_SIZE = 2     # embedded batches waiting to be written to the index
+EMBED_BATCH_SIZE = BATCH_SIZE * MAX_CONCURRENCY
+
+_DONE = object()
+
+
+def unique_doc_ids(documents):
+    """
+    Renames repeated doc_ids in [(doc_id, source), ...] ("a.pdf", "a (2).pdf", ...)
+    so that two files with the same name in one upload get distinct chunk ids.
+    """
+    taken = {doc_id for doc_id, _ in documents}
+    seen = set()
+    unique = []
+    for doc_id, source in documents:
+        candidate = doc_id
+        if doc_id in seen:
+            stem, ext = os.path.splitext(doc_id)
+            n = 2
+            while f"{stem} ({n}){ext}" in taken:
+                n += 1
+            candidate = f"{stem} ({n}){ext}"
+            taken.add(candidate)
+        seen.add(candidate)
+        unique.append((candidate, source))
+    return unique
+
+
+class StreamingIngestor:
+    """
+    Streams documents into a category's vector store through bounded queues.
+
+    A chunker thread extracts pages and splits them per document, an embedder
+    thread groups chunks into batches and embeds them, and the calling thread
+    adds each embedded batch to the index. Because every hand-off goes through
+    a bounded queue, peak memory depends on the batch and queue sizes rather
+    than on the size of the upload.
+
+    progress() can be called from another thread while run() is in flight.
+    """
+
+    def __init__(self, db_name, batch_size=EMBED_BATCH_SIZE, queue_size=CHUNK_QUEUE_SIZE, workers=None):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.workers = workers
+        self.stats = {}
+        self._failed = threading.Event()
+        self._error = None
+        self._stage = "pending"
+        self._started = None
+        self._finished = None
+        self._documents = 0
+        self._documents_read = 0
+        self._doc_ids = []
+        self._pages_done = 0
+        self._processor = None
+        self._chunks_embedded = 0
+        self._chunks_indexed = 0
+
+    def _put(self, q, item):
+        """Blocks until the item is queued, unless another stage has failed."""
+        while not self._failed.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Blocks until an item is available; returns _DONE once another stage has failed."""
+        while not self._failed.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._failed.set()
+
+    def progress(self):
+        """Returns a snapshot of the run: stage, documents, pages and chunks processed, and throughput."""
+        processor = self._processor
+        pages = self._pages_done + (processor.pages_read if processor is not None else 0)
+        elapsed = (self._finished or time.perf_counter()) - self._started if self._started is not None else 0.0
+        return {
+            "stage": self._stage,
+            "documents": self._documents,
+            "documents_read": self._documents_read,
+            "doc_ids": list(self._doc_ids),
+            "pages": pages,
+            "chunks_embedded": self._chunks_embedded,
+            "chunks_indexed": self._chunks_indexed,
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(pages / elapsed, 1) if elapsed > 0 else 0.0,
+            "chunks_per_second": round(self._chunks_indexed / elapsed, 1) if elapsed > 0 else 0.0,
+            "error": str(self._error) if self._error is not None else None,
+        }
+
+    def _chunk_documents(self, documents, chunk_q):
+        try:
+            for doc_id, source in documents:
+                processor = DocumentProcessor([source], workers=self.workers, names=[doc_id], category=self.db_name)
+                self._processor = processor
+                for chunk in processor.iter_chunks():
+                    if not self._put(chunk_q, (doc_id, chunk)):
+                        return
+                self._processor = None
+                self._pages_done += processor.pages_read
+                self._documents_read += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(chunk_q, _DONE)
+
+    def _embed_chunks(self, embedder, chunk_q, batch_q):
+        pipeline = EmbeddingPipeline(embedder)
+        batch = []
+        try:
+            while True:
+                item = self._get(chunk_q)
+                if item is not _DONE:
+                    batch.append(item)
+                if batch and (item is _DONE or len(batch) >= self.batch_size):
+                    vectors = pipeline.run([chunk.page_content for _, chunk in batch])
+                    self._chunks_embedded += len(batch)
+                    if not self._put(batch_q, (batch, vectors)):
+                        return
+                    batch = []
+                if item is _DONE:
+                    return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(batch_q, _DONE)
+
+    def run(self, documents):
+        """
+        Ingests [(doc_id, path or file-like), ...] and returns True on success.
+
+        Repeated doc_ids are made unique (see unique_doc_ids). A document
+        replaces the chunks previously stored under its doc_id once it yields
+        its first chunk; a document without extractable text leaves them in
+        place. Only the exact doc_id is replaced: "a (2).pdf" from an earlier
+        upload is not touched by a later "a.pdf". The index is only published
+        once every document has been ingested, so a failed run, or one that
+        yields no chunks, leaves the existing index untouched.
+        """
+        try:
+            embedder = embeddings_for(self.db_name)
+        except ValueError as e:
+            self._error, self._stage = e, "failed"
+            logging.error(f"Error ingesting into {self.db_name}: {e}")
+            return False
+
+        start = self._started = time.perf_counter()
+        documents = unique_doc_ids(documents)
+        self._doc_ids = [doc_id for doc_id, _ in documents]
+        self._documents = len(documents)
+        chunk_q = queue.Queue(maxsize=self.queue_size)
+        batch_q = queue.Queue(maxsize=BATCH_QUEUE_SIZE)
+        stages = [
+            threading.Thread(target=self._chunk_documents, args=(documents, chunk_q), daemon=True),
+            threading.Thread(target=self._embed_chunks, args=(embedder, chunk_q, batch_q), daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+
+        chunk_counts = {}
+        try:
+            # Another upload to the same category holds its write lock until it has published
+            self._stage = "waiting_for_lock"
+            with IndexWriter(self.db_name) as writer:
+                self._stage = "ingesting"
+                while True:
+                    item = self._get(batch_q)
+                    if item is _DONE:
+                        break
+                    batch, vectors = item
+                    ids, metadatas = [], []
+                    for doc_id, chunk in batch:
+                        if doc_id not in chunk_counts:
+                            writer.delete_document(doc_id)
+                            chunk_counts[doc_id] = 0
+                        ids.append(chunk.metadata["chunk_id"])
+                        metadatas.append({**chunk.metadata, "doc_id": doc_id})
+                        chunk_counts[doc_id] += 1
+                    writer.add([(chunk.page_content, vector) for (_, chunk), vector in zip(batch, vectors)], metadatas, ids)
+                    self._chunks_indexed += len(batch)
+
+                if self._error is None and chunk_counts:
+                    self._stage = "writing_index"
+                    writer.commit()
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for stage in stages:
+                stage.join()
+
+        self._finished = time.perf_counter()
+        elapsed = self._finished - start
+        chunks = sum(chunk_counts.values())
+        self.stats = {
+            "documents": len(chunk_counts),
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(chunks / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        if self._error is not None:
+            self._stage = "failed"
+            logging.error(f"Error ingesting into {self.db_name}: {self._error}")
+            return False
+        empty = [doc_id for doc_id in self._doc_ids if doc_id not in chunk_counts]
+        if empty:
+            logging.warning(f"No text extracted from {', '.join(empty)}; previously stored chunks were kept")
+        self._stage = "done" if chunks > 0 else "failed"
+        return chunks > 0
@@ -0,0 +1,96 @@
+import os
+import logging
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from modules.utils.lazy_import import lazy_module
+
+# Optional dependencies of the local backend, only imported when it is used
+onnxruntime = lazy_module("onnxruntime")
+tokenizers = lazy_module("tokenizers")
+
+# A model directory holds an ONNX export of a sentence-embedding model and its
+# Hugging Face tokenizer, e.g. the onnx/ folder of all-MiniLM-L6-v2 plus tokenizer.json.
+# A quantised export (model_quantized.onnx) is preferred when both are present.
+MODEL_FILES = ("model_quantized.onnx", "model.onnx")
+TOKENIZER_FILE = "tokenizer.json"
+LOCAL_BATCH_SIZE = 64   # texts per ONNX Runtime call
+MAX_TOKENS = 256        # longer texts are truncated, as sentence-transformers does
+CHARS_PER_TOKEN = 4     # rough estimate for English text under a WordPiece vocabulary
+# Longest chunk the model embeds whole; categories using this backend are chunked
+# at this size instead of their CHUNKING_CONFIG size (see embeddings.max_chunk_chars)
+MAX_CHUNK_CHARS = MAX_TOKENS * CHARS_PER_TOKEN
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings computed on the CPU with ONNX Runtime.
+
+    Texts are tokenised in batches by the (Rust) tokenizer, sorted by length
+    so each batch pads as little as possible, and run through the model with
+    one intra-op thread per core. Token vectors are mean-pooled over the
+    attention mask and L2-normalised with NumPy. Texts longer than
+    `max_tokens` are truncated; each call that truncates logs how many, and
+    `truncated` counts them over the model's lifetime.
+    """
+
+    def __init__(self, model_dir, batch_size=LOCAL_BATCH_SIZE, max_tokens=MAX_TOKENS, threads=None):
+        model_file = next((os.path.join(model_dir, name) for name in MODEL_FILES
+                           if os.path.exists(os.path.join(model_dir, name))), None)
+        if model_file is None:
+            raise FileNotFoundError(f"No ONNX model ({' or '.join(MODEL_FILES)}) found in {model_dir}")
+
+        self.model_dir = model_dir
+        self.batch_size = max(1, batch_size)
+        self.max_tokens = max_tokens
+        self.truncated = 0
+        self.tokenizer = tokenizers.Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_tokens)
+        if self.tokenizer.padding is None:
+            pad_id = self.tokenizer.token_to_id("[PAD]")
+            self.tokenizer.enable_padding(pad_id=pad_id or 0, pad_token="[PAD]" if pad_id is not None else "<pad>")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self._inputs = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        self.truncated += sum(1 for encoding in encodings if encoding.overflowing)
+        mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64)}
+        if "attention_mask" in self._inputs:
+            feeds["attention_mask"] = mask
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        output = self.session.run(None, feeds)[0]
+        if output.ndim == 3:
+            # Token embeddings: average the ones that are not padding
+            weights = mask[:, :, None].astype(np.float32)
+            output = (output * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.maximum(norms, 1e-12)
+
+    def embed_array(self, texts):
+        """Embeds texts and returns a float32 matrix with one row per text, in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        truncated = self.truncated
+        batches = [self._embed_batch([texts[i] for i in order[start:start + self.batch_size]])
+                   for start in range(0, len(texts), self.batch_size)]
+        if self.truncated > truncated:
+            logging.warning(f"{self.truncated - truncated} of {len(texts)} texts exceeded {self.max_tokens} tokens "
+                            f"and were truncated before embedding")
+        vectors = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(batches)
+        return vectors
+
+    def embed_documents(self, texts):
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text):
+        return self.embed_array([text])[0].tolist()
@@ -0,0 +1,76 @@
+import json
+import sqlite3
+import threading
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+DOCSTORE_FILE = "docstore.sqlite"
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    LangChain docstore that keeps chunk text and metadata in a SQLite file.
+
+    Only the vectors and the id mapping of a category are held in memory;
+    chunk text is read from disk for the hits of a search. Read-only stores
+    are opened with mode=ro so a published index is never modified in place,
+    and as immutable, since published generations never change, so readers
+    in different processes take no file locks.
+    """
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "id TEXT PRIMARY KEY, doc_id TEXT, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_doc_id ON chunks (doc_id)")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, search):
+        """Returns the Document stored under an id, or an error message string (as InMemoryDocstore does)."""
+        with self._lock:
+            row = self._conn.execute("SELECT text, metadata FROM chunks WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts):
+        """Adds a dict of id -> Document; ids that already exist are rejected."""
+        rows = [(doc_key, doc.metadata.get("doc_id"), doc.page_content, json.dumps(doc.metadata))
+                for doc_key, doc in texts.items()]
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows)
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Tried to add ids that already exist: {set(texts)}")
+
+    def delete(self, ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", ((doc_key,) for doc_key in ids))
+
+    def document_chunk_ids(self, doc_id):
+        """Returns the ids of every chunk stored under a document id."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM chunks WHERE doc_id = ?", (doc_id,))]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @classmethod
+    def from_docstore(cls, path, docstore, doc_keys):
+        """Copies the given ids of another docstore (e.g. a legacy pickled one) into a new SQLite file."""
+        store = cls(path)
+        store.add({doc_key: docstore.search(doc_key) for doc_key in doc_keys})
+        return store
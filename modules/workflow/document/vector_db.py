@@ -1,38 +1,473 @@
 import os
+import json
+import uuid
+import shutil
 import logging
+import threading
+from collections import defaultdict
+import faiss
 from langchain.vectorstores import FAISS
-from modules.workflow.document.embeddings import embeddings
+from modules.workflow.document.embeddings import embeddings_for, EMBEDDING_MODEL
+from modules.workflow.document.embedding_pipeline import EmbeddingPipeline
+from modules.workflow.document import index_factory, index_generations
+from modules.workflow.document.sqlite_docstore import SQLiteDocstore, DOCSTORE_FILE
+from modules.workflow.retrieval.lexical_index import LexicalIndex
+from modules.utils import metrics
+
+VECTOR_STORE_DIR = "vector_store"
+# Each published version of a category is an immutable generation directory
+# (see index_generations). index.faiss holds the vectors, ids.json the
+# docstore id of every vector position and docstore.sqlite the chunk text and
+# metadata; flat indexes keep their vectors in vectors.npy instead of
+# index.faiss. Indexes written before generations live in
+# <category>/faiss_index, and before the SQLite docstore kept everything else
+# in a pickled index.pkl.
+INDEX_FILES = ("index.faiss", "ids.json", DOCSTORE_FILE)
+LEGACY_INDEX_FILES = ("index.faiss", "index.pkl")
+LEGACY_INDEX_DIR = "faiss_index"
+# Readers map index files instead of copying them, so uvicorn workers share
+# one copy in the page cache: flat indexes through index_factory.MappedFlatIndex,
+# IVF indexes through FAISS, which maps their inverted lists. FAISS 1.8
+# cannot map HNSW graphs or their vectors; those are still read into each
+# worker's memory.
+READ_IO_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+LEASE_RETRIES = 3  # a generation collected while being opened is retried with the new manifest
+# Indexes published before the manifest recorded their embedding model were all built with Gemini
+LEGACY_EMBEDDING_MODEL = EMBEDDING_MODEL
+
+# Process-wide registry of loaded indexes: db_name -> (signature, FAISS store, LexicalIndex, Lease)
+_index_registry = {}
+_registry_lock = threading.Lock()
+_load_locks = defaultdict(threading.Lock)
+# Serialises read-modify-write cycles on the same category, across threads and processes
+_write_locks = {}
+
+
+class EmbeddingModelMismatch(ValueError):
+    """Raised when a category's index was built with another embedding model than it is configured for."""
+
 
 class VectorStore:
     @staticmethod
-    def store_VDB(db_name, text_chunks):
-        """Stores text chunks as vector embeddings using FAISS."""
+    def category_path(db_name):
+        return os.path.join(VECTOR_STORE_DIR, db_name)
+
+    @staticmethod
+    def manifest(db_name):
+        """Returns the manifest of the published generation of a category, or None."""
+        return index_generations.read_manifest(VectorStore.category_path(db_name))
+
+    @staticmethod
+    def index_path(db_name):
+        """Returns the directory holding the published index of a category."""
+        manifest = VectorStore.manifest(db_name)
+        if manifest is not None:
+            return index_generations.generation_path(VectorStore.category_path(db_name), manifest["generation"])
+        return os.path.join(VectorStore.category_path(db_name), LEGACY_INDEX_DIR)
+
+    @staticmethod
+    def index_signature(db_name):
+        """Returns a value identifying the published index (its generation), or None if no index exists."""
+        manifest = VectorStore.manifest(db_name)
+        if manifest is not None:
+            return ("generation", manifest["generation"])
+        path = os.path.join(VectorStore.category_path(db_name), LEGACY_INDEX_DIR)
+        signature = []
+        for file_name in VectorStore._index_files(path):
+            try:
+                stat = os.stat(os.path.join(path, file_name))
+            except OSError:
+                return None
+            signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    @staticmethod
+    def _index_files(path):
+        if os.path.exists(os.path.join(path, DOCSTORE_FILE)):
+            return INDEX_FILES
+        return LEGACY_INDEX_FILES
+
+    @staticmethod
+    def index_version(db_names):
+        """Returns a value that changes whenever any of the given categories is rewritten or cleared."""
+        return tuple(VectorStore.index_signature(db_name) for db_name in db_names)
+
+    @staticmethod
+    def embedding_model(db_name):
+        """Returns the embedding model the published index of a category was built with, or None if there is none."""
+        manifest = VectorStore.manifest(db_name)
+        if manifest is not None:
+            return manifest.get("embedding_model", LEGACY_EMBEDDING_MODEL)
+        return LEGACY_EMBEDDING_MODEL if VectorStore.index_signature(db_name) is not None else None
+
+    @staticmethod
+    def check_embedding_model(db_name):
+        """
+        Raises EmbeddingModelMismatch if the published index of a category was
+        built with another model than its configured embedding backend, whose
+        vectors it cannot be searched or extended with.
+        """
+        built_with = VectorStore.embedding_model(db_name)
+        configured = embeddings_for(db_name).model_name
+        if built_with is not None and built_with != configured:
+            raise EmbeddingModelMismatch(
+                f"The {db_name} index was built with embedding model '{built_with}' but the category is "
+                f"configured for '{configured}'. Clear the category and upload its documents again to switch models."
+            )
+
+    @staticmethod
+    def write_lock(db_name):
+        """Returns the lock that serialises every writer of a category (held by IndexWriter)."""
+        with _registry_lock:
+            if db_name not in _write_locks:
+                _write_locks[db_name] = index_generations.WriteLock(VectorStore.category_path(db_name))
+            return _write_locks[db_name]
+
+    @staticmethod
+    def invalidate(db_name=None):
+        """Drops a category (or every category) from the in-memory index registry and releases its lease."""
+        with _registry_lock:
+            if db_name is None:
+                entries = list(_index_registry.values())
+                _index_registry.clear()
+            else:
+                entries = [_index_registry.pop(db_name)] if db_name in _index_registry else []
+        for entry in entries:
+            entry[3].release()
+
+    @staticmethod
+    def clear(db_name):
+        """
+        Unpublishes a category. Its generations are deleted once no reader in
+        any process holds them; returns False if there was nothing to clear.
+        """
+        category_path = VectorStore.category_path(db_name)
+        legacy_path = os.path.join(category_path, LEGACY_INDEX_DIR)
+        with VectorStore.write_lock(db_name):
+            existed = VectorStore.index_signature(db_name) is not None
+            index_generations.remove_manifest(category_path)
+            shutil.rmtree(legacy_path, ignore_errors=True)
+            VectorStore.invalidate(db_name)
+            index_generations.collect_garbage(category_path, write_locked=True)
+        return existed
+
+    @staticmethod
+    def store_VDB(db_name, text_chunks, doc_id=None, append=True):
+        """
+        Stores text chunks as vector embeddings using FAISS.
+
+        With append=True (the default) the chunks are merged into the existing
+        index of the category, so earlier uploads keep their embeddings. When a
+        doc_id is given, any chunks previously stored under that id are replaced.
+        """
         if not text_chunks:
             logging.warning(f"No text chunks provided for {db_name} storage.")
             return False
 
-        if embeddings is None:
-            logging.error("Embeddings model is not initialized. Cannot store vectors.")
-            return False
+        if doc_id is None:
+            ids = [str(uuid.uuid4()) for _ in text_chunks]
+            metadatas = [{"chunk_id": chunk_id} for chunk_id in ids]
+        else:
+            ids = [f"{doc_id}:{i}" for i in range(len(text_chunks))]
+            metadatas = [{"doc_id": doc_id, "chunk_id": chunk_id} for chunk_id in ids]
 
         try:
-            vector_store = FAISS.from_texts(text_chunks, embeddings)
-            os.makedirs(f"vector_store/{db_name}", exist_ok=True)
-            vector_store.save_local(f"vector_store/{db_name}/faiss_index")
+            vectors = EmbeddingPipeline(embeddings_for(db_name)).run(text_chunks)
+            with IndexWriter(db_name, append=append) as writer:
+                if doc_id is not None:
+                    writer.delete_document(doc_id)
+                writer.add(list(zip(text_chunks, vectors)), metadatas, ids)
+                writer.commit()
             return True
         except Exception as e:
             logging.error(f"Error storing {db_name}: {e}")
             return False
 
+    @staticmethod
+    def delete_document(db_name, doc_id):
+        """Removes every chunk stored under doc_id without re-embedding the rest of the category."""
+        try:
+            with IndexWriter(db_name) as writer:
+                if not writer.delete_document(doc_id):
+                    logging.warning(f"No document '{doc_id}' found in {db_name}.")
+                    return False
+                writer.commit()
+            return True
+        except Exception as e:
+            logging.error(f"Error deleting document '{doc_id}' from {db_name}: {e}")
+            return False
+
+    @staticmethod
+    def _open_store(db_name, path, docstore, io_flags=0):
+        """Builds a LangChain FAISS store from index.faiss (or vectors.npy), ids.json and a docstore."""
+        vectors_file = os.path.join(path, index_factory.VECTORS_FILE)
+        index_file = os.path.join(path, "index.faiss")
+        if os.path.exists(vectors_file):
+            index = index_factory.load_flat(vectors_file, mapped=bool(io_flags & faiss.IO_FLAG_MMAP))
+        else:
+            try:
+                index = faiss.read_index(index_file, io_flags)
+            except RuntimeError:
+                if not io_flags:
+                    raise
+                index = faiss.read_index(index_file)
+        with open(os.path.join(path, "ids.json"), encoding="utf-8") as f:
+            ids = json.load(f)
+        return FAISS(embeddings_for(db_name), index, docstore, dict(enumerate(ids)))
+
+    @staticmethod
+    def _load_for_write(db_name, work_dir):
+        """
+        Loads a private, writable copy of the on-disk index whose docstore
+        lives in work_dir, so readers of the published one are unaffected.
+        Legacy pickled indexes are migrated to a SQLite docstore on the way.
+        """
+        path = VectorStore.index_path(db_name)
+        if VectorStore.index_signature(db_name) is None:
+            return None
+        docstore_path = os.path.join(work_dir, DOCSTORE_FILE)
+        if os.path.exists(os.path.join(path, DOCSTORE_FILE)):
+            shutil.copyfile(os.path.join(path, DOCSTORE_FILE), docstore_path)
+            return VectorStore._open_store(db_name, path, SQLiteDocstore(docstore_path))
+
+        vector_store = FAISS.load_local(path, embeddings_for(db_name), allow_dangerous_deserialization=True)
+        vector_store.docstore = SQLiteDocstore.from_docstore(
+            docstore_path, vector_store.docstore, vector_store.index_to_docstore_id.values()
+        )
+        return vector_store
+
+    @staticmethod
+    def _document_chunk_ids(vector_store, doc_id):
+        """Returns the docstore ids of all chunks that belong to doc_id."""
+        if isinstance(vector_store.docstore, SQLiteDocstore):
+            return vector_store.docstore.document_chunk_ids(doc_id)
+        chunk_ids = []
+        for chunk_id in vector_store.index_to_docstore_id.values():
+            doc = vector_store.docstore.search(chunk_id)
+            if getattr(doc, "metadata", {}).get("doc_id") == doc_id:
+                chunk_ids.append(chunk_id)
+        return chunk_ids
+
+    @staticmethod
+    def _write_index(folder_path, vector_store, lexical_index=None):
+        """Writes the vectors, the id mapping and the lexical index next to the docstore."""
+        if index_factory.is_mappable(vector_store.index):
+            index_factory.save_flat(vector_store.index, os.path.join(folder_path, index_factory.VECTORS_FILE))
+        else:
+            faiss.write_index(vector_store.index, os.path.join(folder_path, "index.faiss"))
+        ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+        with open(os.path.join(folder_path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(ids, f, ensure_ascii=False)
+        if lexical_index is not None:
+            lexical_index.save(folder_path)
+
+    @staticmethod
+    def _publish(db_name, work_dir, generation, vector_store):
+        """
+        Turns a fully written work directory into a generation and points the
+        manifest at it; readers in every process switch on their next lookup.
+        """
+        category_path = VectorStore.category_path(db_name)
+        os.rename(work_dir, index_generations.generation_path(category_path, generation))
+        index_generations.write_manifest(
+            category_path, generation,
+            vectors=vector_store.index.ntotal, index_type=index_factory.index_type(vector_store.index),
+            embedding_model=embeddings_for(db_name).model_name, dimension=vector_store.index.d,
+        )
+        # Indexes from before generations are superseded by the first one published
+        shutil.rmtree(os.path.join(category_path, LEGACY_INDEX_DIR), ignore_errors=True)
+
     @staticmethod
     def load_VDB(db_name):
-        """Loads the FAISS vector store."""
-        if embeddings is None:
-            logging.error(f"Embeddings model is not initialized. Cannot load {db_name}.")
+        """
+        Loads the FAISS vector store.
+
+        Loaded indexes are kept in a process-wide registry and only re-read
+        from disk when a new generation is published.
+        """
+        entry = VectorStore._load_entry(db_name)
+        return entry[0] if entry else None
+
+    @staticmethod
+    def load_lexical(db_name):
+        """Loads the BM25 lexical index stored next to the category's FAISS index."""
+        entry = VectorStore._load_entry(db_name)
+        return entry[1] if entry else None
+
+    @staticmethod
+    def _load_entry(db_name):
+        """Returns the cached (FAISS store, LexicalIndex) pair of a category, loading it if stale."""
+        signature = VectorStore.index_signature(db_name)
+        if signature is None:
+            if db_name in _index_registry:
+                # Cleared since it was loaded: release the lease so its generation can go
+                VectorStore.invalidate(db_name)
+                VectorStore._collect_garbage(db_name)
+            logging.error(f"Error loading {db_name}: no index found under {VectorStore.category_path(db_name)}")
             return None
 
+        with _load_locks[db_name]:
+            with _registry_lock:
+                cached = _index_registry.get(db_name)
+            if cached and cached[0] == signature:
+                return cached[1:3]
+
+            try:
+                with metrics.stage("index_load"):
+                    signature, vector_store, lexical_index, lease = VectorStore._read_entry(db_name)
+            except Exception as e:
+                logging.error(f"Error loading {db_name}: {e}")
+                return None
+
+            with _registry_lock:
+                _index_registry[db_name] = (signature, vector_store, lexical_index, lease)
+            if cached:
+                # Queries still running on the old generation keep their open files and mappings
+                cached[3].release()
+                VectorStore._collect_garbage(db_name)
+            return vector_store, lexical_index
+
+    @staticmethod
+    def _read_entry(db_name):
+        """Leases the published generation of a category and reads its FAISS store and lexical index."""
+        category_path = VectorStore.category_path(db_name)
+        for _ in range(LEASE_RETRIES):
+            signature = VectorStore.index_signature(db_name)
+            if signature is None:
+                raise FileNotFoundError(f"no index found under {category_path}")
+            if signature[0] != "generation":
+                path = os.path.join(category_path, LEGACY_INDEX_DIR)
+                lease = index_generations.Lease(path, None)
+                break
+            path = index_generations.generation_path(category_path, signature[1])
+            lease = index_generations.acquire_lease(path)
+            if lease is not None:
+                break
+        else:
+            raise RuntimeError(f"generations of {db_name} were replaced faster than they could be opened")
+
         try:
-            return FAISS.load_local(f"vector_store/{db_name}/faiss_index", embeddings, allow_dangerous_deserialization=True)
+            VectorStore.check_embedding_model(db_name)
+            if os.path.exists(os.path.join(path, DOCSTORE_FILE)):
+                docstore = SQLiteDocstore(os.path.join(path, DOCSTORE_FILE), read_only=True)
+                vector_store = VectorStore._open_store(db_name, path, docstore, READ_IO_FLAGS)
+            else:
+                vector_store = FAISS.load_local(path, embeddings_for(db_name), allow_dangerous_deserialization=True)
+            index_factory.tune_search(vector_store.index, db_name)
+            lexical_index = LexicalIndex.load(path) or LexicalIndex.from_vector_store(vector_store)
+        except Exception:
+            lease.release()
+            raise
+        return signature, vector_store, lexical_index, lease
+
+    @staticmethod
+    def _collect_garbage(db_name):
+        """
+        Deletes generations this reader may have been the last to hold. With
+        the write lock free every unused generation goes; while a writer holds
+        it, only generations older than the published one.
+        """
+        lock = VectorStore.write_lock(db_name)
+        locked = lock.acquire(blocking=False)
+        try:
+            removed = index_generations.collect_garbage(VectorStore.category_path(db_name), write_locked=locked)
         except Exception as e:
-            logging.error(f"Error loading {db_name}: {e}")
-            return None
+            logging.error(f"Error collecting old generations of {db_name}: {e}")
+            return
+        finally:
+            if locked:
+                lock.release()
+        if removed:
+            logging.info(f"Removed {len(removed)} old index generation(s) of {db_name}")
+
+
+class IndexWriter:
+    """
+    Applies additions and deletions to one category's index and publishes them atomically.
+
+    The category write lock is held from construction until close(), so
+    concurrent writers (in any process) cannot interleave their
+    read-modify-write cycles. Changes go to a copy of the index in the work
+    directory of a new generation, which commit() publishes; without a commit
+    it is discarded.
+    """
+
+    def __init__(self, db_name, append=True):
+        self.db_name = db_name
+        self._lock = VectorStore.write_lock(db_name)
+        self._lock.acquire()
+        self._generation = index_generations.new_generation_id()
+        self._tmp_dir = None
+        try:
+            if append:
+                VectorStore.check_embedding_model(db_name)
+            self._tmp_dir = index_generations.create_work_dir(VectorStore.category_path(db_name), self._generation)
+            self.vector_store = VectorStore._load_for_write(db_name, self._tmp_dir) if append else None
+            self.lexical_index = None
+            if self.vector_store is not None:
+                self.lexical_index = (LexicalIndex.load(VectorStore.index_path(db_name))
+                                      or LexicalIndex.from_vector_store(self.vector_store))
+        except Exception:
+            self.vector_store = None
+            self.close()
+            raise
+        self.lexical_index = self.lexical_index or LexicalIndex()
+        self._dirty = not append
+
+    def delete_document(self, doc_id):
+        """Removes the chunks of doc_id and returns how many were removed."""
+        if self.vector_store is None:
+            return 0
+        stale_ids = VectorStore._document_chunk_ids(self.vector_store, doc_id)
+        if stale_ids:
+            index_factory.remove_vectors(self.vector_store, stale_ids)
+            self.lexical_index.delete(stale_ids)
+            self._dirty = True
+        return len(stale_ids)
+
+    def add(self, text_embeddings, metadatas, ids):
+        """Adds (text, vector) pairs with their metadata and docstore ids."""
+        if not text_embeddings:
+            return
+        if self.vector_store is None:
+            docstore = SQLiteDocstore(os.path.join(self._tmp_dir, DOCSTORE_FILE))
+            index = faiss.IndexFlatL2(len(text_embeddings[0][1]))
+            self.vector_store = FAISS(embeddings_for(self.db_name), index, docstore, {})
+        self.vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        self.lexical_index.add(ids, [text for text, _ in text_embeddings])
+        self._dirty = True
+
+    def commit(self):
+        """
+        Writes the index as a new generation, publishes it and drops the stale
+        copy from the registry. A category that has grown past its size
+        threshold is rebuilt with its configured ANN index type first.
+        Generations no reader holds any more are deleted afterwards.
+        """
+        if self._dirty and self.vector_store is not None:
+            with metrics.stage("index_write"):
+                index_factory.maybe_rebuild(self.db_name, self.vector_store)
+                VectorStore._write_index(self._tmp_dir, self.vector_store, self.lexical_index)
+                self._close_docstore()
+                VectorStore._publish(self.db_name, self._tmp_dir, self._generation, self.vector_store)
+            self._dirty = False
+        VectorStore.invalidate(self.db_name)
+        index_generations.collect_garbage(VectorStore.category_path(self.db_name), write_locked=True)
+
+    def _close_docstore(self):
+        if self.vector_store is not None and isinstance(self.vector_store.docstore, SQLiteDocstore):
+            self.vector_store.docstore.close()
+
+    def close(self):
+        try:
+            self._close_docstore()
+            if self._tmp_dir is not None:
+                shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        finally:
+            self._lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
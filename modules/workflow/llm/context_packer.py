@@ -0,0 +1,136 @@
+import re
+import math
+from langchain.docstore.document import Document
+from modules.workflow.retrieval.lexical_index import tokenize
+from modules.utils import metrics
+
+CHARS_PER_TOKEN = 4          # rough estimate for English legal text
+DEFAULT_TOKEN_BUDGET = 6000
+
+# Context token budget per model; looked up by prefix of the model name
+MODEL_TOKEN_BUDGETS = {
+    "gemini-2.0-flash-lite": 6000,
+    "gemini-2.0-flash": 8000,
+    "gemini-1.5-flash-8b": 6000,
+    "gemini-1.5-flash": 8000,
+    "gemma": 4000,
+    "llama": 3000,
+    "mistral": 3000,
+    "phi": 2000,
+}
+
+# Captures the separator so packed passages keep their original line breaks
+_SENTENCE_END = re.compile(r"((?<=[.;:?!])\s+|\n+)")
+_WHITESPACE = re.compile(r"\s+")
+MIN_OVERLAP_CHARS = 20  # shorter sentences ("Explanation.", "(a)") recur legitimately and are never dropped
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_budget(model_name):
+    """Returns the context token budget for a model name."""
+    name = (model_name or "").lower()
+    for prefix in sorted(MODEL_TOKEN_BUDGETS, key=len, reverse=True):
+        if name.startswith(prefix):
+            return MODEL_TOKEN_BUDGETS[prefix]
+    return DEFAULT_TOKEN_BUDGET
+
+
+def pack_context(retrieved_docs, question, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Packs retrieved documents into a context that fits a token budget.
+
+    Passages are taken in the order the retriever selected them across all
+    categories (their "retrieval_rank" metadata; passages without one follow
+    in their given order), then split into sentences. Sentences already used
+    by an adjacent chunk of the same document (the chunk overlap) are
+    dropped, unless they are shorter than MIN_OVERLAP_CHARS; repeated
+    sentences elsewhere are kept.
+    A passage that does not fit the remaining budget is trimmed to the
+    sentences that share the most terms with the question, kept in their
+    original order and with their original separators, so statute and section
+    line structure survives.
+
+    Returns:
+        tuple: (list of Documents, stats dict with tokens before/after/saved)
+    """
+    with metrics.stage("context_assembly"):
+        packed, stats = _pack(retrieved_docs, question, budget)
+    metrics.TOKENS.inc("context_in", amount=stats["tokens_before"])
+    metrics.TOKENS.inc("context_out", amount=stats["tokens_after"])
+    return packed, stats
+
+
+def _adjacent_chunks(chunk_id):
+    """Returns the ids of the chunks before and after "name:n" in the same document."""
+    name, _, number = (chunk_id or "").rpartition(":")
+    if not name or not number.isdigit():
+        return ()
+    return (f"{name}:{int(number) - 1}", f"{name}:{int(number) + 1}")
+
+
+def _pack(retrieved_docs, question, budget):
+    docs = [doc for category_docs in retrieved_docs.values() for doc in category_docs]
+    order = sorted(range(len(docs)), key=lambda i: (docs[i].metadata.get("retrieval_rank", math.inf), i))
+    ranked = [docs[i] for i in order]
+
+    question_terms = set(tokenize(question))
+    packed_sentences = {}  # chunk id -> sentence keys packed from it
+    packed = []
+    tokens_before = sum(estimate_tokens(doc.page_content) for doc in ranked)
+    remaining = budget
+
+    for doc in ranked:
+        if remaining <= 0:
+            break
+
+        chunk_id = doc.metadata.get("chunk_id")
+        overlap = set().union(*(packed_sentences.get(neighbour, ()) for neighbour in _adjacent_chunks(chunk_id)))
+
+        # Alternating [sentence, separator, sentence, ...]; each sentence keeps the separator after it
+        pieces = _SENTENCE_END.split(doc.page_content)
+        sentences, separators, keys = [], [], []
+        for sentence, separator in zip(pieces[0::2], pieces[1::2] + [""]):
+            key = _WHITESPACE.sub(" ", sentence).strip().lower()
+            if key and (len(key) < MIN_OVERLAP_CHARS or key not in overlap):
+                sentences.append(sentence.strip())
+                separators.append(separator if "\n" in separator else " ")
+                keys.append(key)
+        if not sentences:
+            continue
+
+        cost = [estimate_tokens(sentence) + 1 for sentence in sentences]
+        if sum(cost) > remaining:
+            by_relevance = sorted(
+                range(len(sentences)),
+                key=lambda i: len(question_terms.intersection(tokenize(sentences[i]))),
+                reverse=True,
+            )
+            keep, used = set(), 0
+            for i in by_relevance:
+                if used + cost[i] <= remaining:
+                    keep.add(i)
+                    used += cost[i]
+            sentences, separators, keys = ([item for i, item in enumerate(items) if i in keep]
+                                           for items in (sentences, separators, keys))
+            if not sentences:
+                continue
+
+        text = "".join(sentence + separator for sentence, separator in zip(sentences, separators)).strip()
+        remaining -= estimate_tokens(text)
+        if chunk_id:
+            packed_sentences.setdefault(chunk_id, set()).update(keys)
+        packed.append(Document(page_content=text, metadata=doc.metadata))
+
+    tokens_after = sum(estimate_tokens(doc.page_content) for doc in packed)
+    stats = {
+        "passages_in": len(ranked),
+        "passages_out": len(packed),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "token_budget": budget,
+    }
+    return packed, stats
@@ -3,34 +3,46 @@ from langchain.prompts import PromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from modules.utils.gemini_config import configure_gemini_api
+from modules.workflow.llm.context_packer import pack_context, token_budget
+from modules.workflow.llm.registry import llm_registry
 
-#configuring_api
-configure_gemini_api()
+PROMPT_TEMPLATE = PromptTemplate(
+    template="""
+    Your name is 'PDF AI', developed by students of Woxsen University. 
+    Answer thoroughly and accurately based on the provided contexts.
 
-class GeminiPro:
-    def __init__(self, user_question,model_name=None):
-        self.user_question = user_question
-        self.model = ChatGoogleGenerativeAI(model=model_name if model_name else "gemini-2.0-flash", temperature=0.9)
-        self.prompt_template = PromptTemplate(
-            template="""
-            Your name is 'PDF AI', developed by students of Woxsen University. 
-            Answer thoroughly and accurately based on the provided contexts.
+    Context :
+    {context}
+
+    Question:
+    {question}?
 
-            Context :
-            {context}
+    Answer:
+    """,
+    input_variables=["context", "question"]
+)
 
-            Question:
-            {question}?
 
-            Answer:
-            """,
-            input_variables=["context", "question"]
+def _build_gemini(model_name):
+    """Builds the chat model and "stuff" QA chain for a Gemini model; both are stateless and shared."""
+    configure_gemini_api()
+    model = ChatGoogleGenerativeAI(model=model_name, temperature=0.9)
+    return model, load_qa_chain(model, chain_type="stuff", prompt=PROMPT_TEMPLATE)
+
+
+class GeminiPro:
+    def __init__(self, user_question,model_name=None):
+        self.user_question = user_question
+        self.model_name = model_name if model_name else "gemini-2.0-flash"
+        self.context_stats = {}
+        self.prompt_template = PROMPT_TEMPLATE
+        self.model, self.chain = llm_registry.get(
+            ("gemini", None, self.model_name), lambda: _build_gemini(self.model_name)
         )
-        self.chain = load_qa_chain(self.model, chain_type="stuff", prompt=self.prompt_template)
 
     def generate_response(self, retrieved_docs):
         """Generates a response based on retrieved documents."""
-        doc = sum(retrieved_docs.values(), [])
+        doc, self.context_stats = pack_context(retrieved_docs, self.user_question, token_budget(self.model_name))
         if doc:
             context_status = True
         else:
@@ -38,3 +50,21 @@ class GeminiPro:
 
         response = self.chain({"input_documents": doc, "question": self.user_question}, return_only_outputs=True)
         return response["output_text"],context_status
+
+    def stream_response(self, retrieved_docs):
+        """
+        Yields the response token by token as Gemini generates it.
+
+        Uses the same prompt as the "stuff" chain. The context status is
+        available as `self.context_status` once the generator has started.
+        """
+        doc, self.context_stats = pack_context(retrieved_docs, self.user_question, token_budget(self.model_name))
+        self.context_status = bool(doc)
+
+        prompt = self.prompt_template.format(
+            context="\n\n".join(d.page_content for d in doc),
+            question=self.user_question,
+        )
+        for chunk in self.model.stream(prompt):
+            if chunk.content:
+                yield chunk.content
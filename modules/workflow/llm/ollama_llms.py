@@ -1,5 +1,9 @@
-from ollama import Client
 from modules.utils.docker_utils import is_running_in_docker
+from modules.workflow.llm.context_packer import pack_context, token_budget
+from modules.workflow.llm.registry import llm_registry, ollama_endpoint
+
+NOT_CONNECTED_MESSAGE = "Ollama is not connected."
+FAILURE_MESSAGE = "Failed to generate response from Ollama."
 
 
 class OllamaModel:
@@ -7,32 +11,26 @@ class OllamaModel:
         """Initializes the Ollama model for processing user queries."""
         self.user_question = user_question
         self.model_name = model_name
+        self.context_stats = {}
 
         # Check if running inside a Docker container
         self.is_docker = is_running_in_docker()
 
         # Determine connection type
-        if host:
-            self.connection_type = "external"
-        elif self.is_docker:
-            host = "http://host.docker.internal:11434"
-            self.connection_type = "docker_internal"
-        else:
-            self.connection_type = "internal"
+        host, self.connection_type = ollama_endpoint(host)
 
         try:
-            self.client = Client(host=host) if host else Client()
+            # Clients are shared per host through the registry
+            self.client = llm_registry.ollama_client(host)
             self.connected = True
         except Exception:
             self.client = None
             self.connected = False
 
-    def generate_response(self, retrieved_docs):
-        """Generates a response using an open-source model via Ollama."""
-        if not self.connected:
-            return "Ollama is not connected."
-
-        all_contexts = [doc.page_content for doc in sum(retrieved_docs.values(), [])]
+    def _build_messages(self, retrieved_docs):
+        """Builds the chat messages for the question and returns them with the context status."""
+        packed_docs, self.context_stats = pack_context(retrieved_docs, self.user_question, token_budget(self.model_name))
+        all_contexts = [doc.page_content for doc in packed_docs]
 
         if all_contexts:
             context_text = "\n\n".join(all_contexts)
@@ -47,18 +45,46 @@ class OllamaModel:
                 "content": f"\n\nQuestion: {self.user_question}\n\nAnswer:"
             }]
             context = False
+        return messages, context
+
+    def generate_response(self, retrieved_docs):
+        """Generates a response using an open-source model via Ollama."""
+        if not self.connected:
+            return NOT_CONNECTED_MESSAGE, False
+
+        messages, context = self._build_messages(retrieved_docs)
 
         try:
             response = self.client.chat(model=self.model_name, messages=messages)
             return response.message.content, context
         except Exception:
-            return "Failed to generate response from Ollama."
+            return FAILURE_MESSAGE, context
+
+    def stream_response(self, retrieved_docs):
+        """
+        Yields the response token by token as Ollama generates it.
+
+        The context status is available as `self.context_status` once the
+        generator has started.
+        """
+        self.context_status = False
+        if not self.connected:
+            yield NOT_CONNECTED_MESSAGE
+            return
+
+        messages, self.context_status = self._build_messages(retrieved_docs)
+        for part in self.client.chat(model=self.model_name, messages=messages, stream=True):
+            if part.message.content:
+                yield part.message.content
 
     @staticmethod
-    def list_models(host=None):
+    def list_models(host=None, refresh=False):
         """
         Lists available Ollama models.
 
+        The list is cached per host by the LLM registry and refreshed in the
+        background; pass refresh=True to wait for a fresh list.
+
         Returns:
             dict: {
                 'models': list of model names or a message if not connected,
@@ -67,34 +93,5 @@ class OllamaModel:
                 'connection_type': 'external' | 'docker_internal' | 'internal'
             }
         """
-        # Check if running inside a Docker container
-        is_docker = is_running_in_docker()
-
-        # Determine connection type
-        connection_type = 'internal'  # default
-        if host:
-            connection_type = 'external'
-        elif is_docker:
-            host = "http://host.docker.internal:11434"
-            connection_type = 'docker_internal'
-
-        try:
-            client = Client(host=host) if host else Client()
-            model_list = client.list()
-            models = [model.model for model in getattr(model_list, "models", [])]
-
-            return {
-                "models": models,
-                "connected": True,
-                "docker": is_docker,
-                "connection_type": connection_type
-            }
-
-        except Exception as e:
-            a = f"[OllamaModel] Connection failed: {e}"
-            return {
-                "models": ["Ollama not connected"],
-                "connected": False,
-                "docker": is_docker,
-                "connection_type": connection_type
-            }
+        host, _ = ollama_endpoint(host)
+        return llm_registry.ollama_models(host, refresh=refresh)
@@ -0,0 +1,158 @@
+import time
+import logging
+import threading
+from collections import defaultdict
+from modules.utils.docker_utils import is_running_in_docker
+from modules.utils.lazy_import import lazy_module
+
+ollama = lazy_module("ollama")
+
+MODEL_LIST_TTL = 60           # seconds a fetched Ollama model list is served without refreshing
+FAILED_MODEL_LIST_TTL = 5     # a failed fetch is retried sooner, so a restarted server is noticed
+HEALTH_CHECK_INTERVAL = 30    # seconds between background refreshes of every known host
+HOST_IDLE_TIMEOUT = 15 * 60   # hosts not asked about for this long are no longer checked
+DOCKER_OLLAMA_HOST = "http://host.docker.internal:11434"
+
+
+def ollama_endpoint(host=None):
+    """Returns (host, connection type) for an optional external Ollama URL."""
+    if host:
+        return host, "external"
+    if is_running_in_docker():
+        return DOCKER_OLLAMA_HOST, "docker_internal"
+    return None, "internal"
+
+
+class LLMRegistry:
+    """
+    Process-wide cache of LLM clients, chains and Ollama model lists.
+
+    Clients and chains are built once per (backend, host, model) key and
+    shared by every request. Ollama model lists are cached for
+    MODEL_LIST_TTL seconds; a stale list is returned immediately while a
+    background thread refreshes it, and the same thread re-checks every
+    known host every HEALTH_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._items = {}
+        self._item_locks = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+        self._model_lists = {}     # host -> {"result", "fetched_at", "latency", "last_used"}
+        self._refreshing = set()
+        self._checker = None
+
+    def get(self, key, factory):
+        """Returns the object registered under key, building it with factory() on first use."""
+        item = self._items.get(key)
+        if item is not None:
+            return item
+        with self._item_locks[key]:
+            item = self._items.get(key)
+            if item is None:
+                item = factory()
+                self._items[key] = item
+            return item
+
+    def ollama_client(self, host=None):
+        """Returns the shared ollama Client for a host (None = default local server)."""
+        return self.get(("ollama", host, None), lambda: ollama.Client(host=host) if host else ollama.Client())
+
+    def _fetch_models(self, host):
+        _, connection_type = ollama_endpoint(host)
+        start = time.perf_counter()
+        try:
+            model_list = self.ollama_client(host).list()
+            result = {
+                "models": [model.model for model in getattr(model_list, "models", [])],
+                "connected": True,
+                "docker": is_running_in_docker(),
+                "connection_type": connection_type,
+            }
+        except Exception as e:
+            logging.error(f"[OllamaModel] Connection failed: {e}")
+            result = {
+                "models": ["Ollama not connected"],
+                "connected": False,
+                "docker": is_running_in_docker(),
+                "connection_type": connection_type,
+            }
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            entry = self._model_lists.setdefault(host, {"last_used": time.time()})
+            entry.update(result=result, fetched_at=time.time(), latency=latency)
+            self._refreshing.discard(host)
+        return result
+
+    def _refresh_async(self, host):
+        with self._lock:
+            if host in self._refreshing:
+                return
+            self._refreshing.add(host)
+        threading.Thread(target=self._fetch_models, args=(host,), name="ollama-refresh", daemon=True).start()
+
+    def ollama_models(self, host=None, refresh=False):
+        """
+        Returns the cached model list of an Ollama host (same shape as
+        OllamaModel.list_models). Only the first call for a host, or
+        refresh=True, waits for the server.
+        """
+        self._start_health_checks()
+        now = time.time()
+        with self._lock:
+            entry = self._model_lists.get(host)
+            if entry is not None:
+                entry["last_used"] = now
+        if refresh or entry is None or "result" not in entry:
+            return self._fetch_models(host)
+
+        ttl = MODEL_LIST_TTL if entry["result"]["connected"] else FAILED_MODEL_LIST_TTL
+        if now - entry["fetched_at"] > ttl:
+            self._refresh_async(host)
+        return entry["result"]
+
+    def _start_health_checks(self):
+        with self._lock:
+            if self._checker is not None:
+                return
+            self._checker = threading.Thread(target=self._health_check_loop, name="ollama-health", daemon=True)
+        self._checker.start()
+
+    def _health_check_loop(self):
+        while True:
+            time.sleep(HEALTH_CHECK_INTERVAL)
+            now = time.time()
+            with self._lock:
+                idle = [host for host, entry in self._model_lists.items() if now - entry["last_used"] > HOST_IDLE_TIMEOUT]
+                for host in idle:
+                    del self._model_lists[host]
+                hosts = list(self._model_lists)
+            for host in hosts:
+                self._fetch_models(host)
+
+    def health(self):
+        """Returns the last health check of every known Ollama host and the cached client keys."""
+        now = time.time()
+        with self._lock:
+            ollama = {
+                host or "default": {
+                    "connected": entry["result"]["connected"],
+                    "models": len(entry["result"]["models"]) if entry["result"]["connected"] else 0,
+                    "checked_seconds_ago": round(now - entry["fetched_at"], 1),
+                    "latency_ms": round(entry["latency"] * 1000, 1),
+                }
+                for host, entry in self._model_lists.items() if "result" in entry
+            }
+        return {
+            "ollama": ollama,
+            "clients": ["/".join(str(part) for part in key if part) for key in list(self._items)],
+        }
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._model_lists.clear()
+
+
+llm_registry = LLMRegistry()
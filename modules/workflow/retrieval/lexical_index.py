@@ -0,0 +1,206 @@
+import os
+import re
+import json
+from array import array
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+COMPACT_RATIO = 0.25  # rebuild posting lists once this share of documents is deleted
+MIN_IDF = 0.01        # terms found in almost every chunk do not change the ranking
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were which with".split()
+)
+# "498-A" -> "498a", and "Section 498 A" -> "section 498a" after a section marker, so
+# section numbers match however they are written; "302 a person" elsewhere is left alone
+_HYPHEN_SUFFIX = re.compile(r"\b(\d+)-([a-z])\b")
+_MARKED_SUFFIX = re.compile(r"((?:\bsections?|\bsec\.|\bs\.|\barticles?|\bart\.|§)\s*\d+)\s+([a-z])\b")
+_TOKEN = re.compile(r"\d+[a-z]*|[a-z]+")
+
+
+def tokenize(text):
+    """Lower-cases text and splits it into word and section-number tokens."""
+    text = _HYPHEN_SUFFIX.sub(r"\1\2", text.lower())
+    text = _MARKED_SUFFIX.sub(r"\1\2", text)
+    return [token for token in _TOKEN.findall(text) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the chunks of one vector store category.
+
+    Each term maps to a pair of compact posting arrays (uint32 document
+    numbers in ascending order and uint16 term frequencies). Documents are
+    appended incrementally; deletions are tombstoned (and left out of the
+    document frequencies) and the posting lists are compacted once enough of
+    them accumulate. Queries are scored with NumPy over the posting arrays of
+    the query terms only.
+    """
+
+    def __init__(self):
+        self.doc_keys = []             # document number -> docstore id
+        self.doc_lens = array("I")     # document number -> token count
+        self.postings = {}             # term -> (doc numbers, term frequencies)
+        self.deleted = set()           # tombstoned document numbers
+        self.total_len = 0
+        self._doc_numbers = {}         # docstore id -> live document number
+        self._norm = None              # cached BM25 length normalisation per document
+        self._dead = None              # cached tombstone mask per document
+
+    def __len__(self):
+        return len(self.doc_keys) - len(self.deleted)
+
+    def add(self, doc_keys, texts):
+        """Indexes texts under their docstore ids."""
+        self._norm = self._dead = None
+        for doc_key, text in zip(doc_keys, texts):
+            doc_no = len(self.doc_keys)
+            tokens = tokenize(text)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                posting = self.postings.get(term)
+                if posting is None or not isinstance(posting[0], array):
+                    # Postings loaded from disk are read-only NumPy views
+                    posting = (
+                        array("I", np.asarray(posting[0], dtype=np.uint32).tobytes() if posting else b""),
+                        array("H", np.asarray(posting[1], dtype=np.uint16).tobytes() if posting else b""),
+                    )
+                    self.postings[term] = posting
+                posting[0].append(doc_no)
+                posting[1].append(min(tf, 0xFFFF))
+            self.doc_keys.append(doc_key)
+            self._doc_numbers[doc_key] = doc_no
+            self.doc_lens.append(len(tokens))
+            self.total_len += len(tokens)
+
+    def delete(self, doc_keys):
+        """Removes documents by docstore id."""
+        self._norm = self._dead = None
+        for doc_key in doc_keys:
+            doc_no = self._doc_numbers.pop(doc_key, None)
+            if doc_no is not None:
+                self.deleted.add(doc_no)
+                self.total_len -= self.doc_lens[doc_no]
+        if self.doc_keys and len(self.deleted) > COMPACT_RATIO * len(self.doc_keys):
+            self.compact()
+
+    def compact(self):
+        """Drops tombstoned documents and renumbers the remaining ones."""
+        keep = np.array([doc_no not in self.deleted for doc_no in range(len(self.doc_keys))], dtype=bool)
+        renumber = np.cumsum(keep, dtype=np.int64) - 1
+        postings = {}
+        for term, (docs, tfs) in self.postings.items():
+            docs = np.asarray(docs, dtype=np.uint32)
+            mask = keep[docs]
+            if mask.any():
+                postings[term] = (renumber[docs[mask]].astype(np.uint32), np.asarray(tfs, dtype=np.uint16)[mask])
+        self.postings = postings
+        self.doc_keys = [doc_key for doc_key, kept in zip(self.doc_keys, keep) if kept]
+        self.doc_lens = array("I", np.asarray(self.doc_lens, dtype=np.uint32)[keep].tobytes())
+        self._doc_numbers = {doc_key: doc_no for doc_no, doc_key in enumerate(self.doc_keys)}
+        self.deleted = set()
+        self._norm = self._dead = None
+
+    def _length_norm(self):
+        if self._norm is None:
+            doc_lens = np.asarray(self.doc_lens, dtype=np.float32)
+            avg_len = self.total_len / len(self) if len(self) else 1.0
+            self._norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lens / (avg_len or 1.0))
+        return self._norm
+
+    def _tombstones(self):
+        if self._dead is None:
+            self._dead = np.zeros(len(self.doc_keys), dtype=bool)
+            self._dead[list(self.deleted)] = True
+        return self._dead
+
+    def search(self, query, k=20):
+        """Returns up to k (docstore id, BM25 score) pairs, best first."""
+        live = len(self)
+        if not live:
+            return []
+        norm = self._length_norm()
+        dead = self._tombstones() if self.deleted else None
+
+        scores = np.zeros(len(self.doc_keys), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None or not len(posting[0]):
+                continue
+            docs = np.asarray(posting[0], dtype=np.uint32)
+            tfs = np.asarray(posting[1], dtype=np.float32)
+            doc_freq = len(docs) - (int(np.count_nonzero(dead[docs])) if dead is not None else 0)
+            if not doc_freq:
+                continue
+            idf = np.log1p((live - doc_freq + 0.5) / (doc_freq + 0.5))
+            if idf < MIN_IDF:
+                continue
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+
+        if dead is not None:
+            scores[dead] = 0
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_keys[i], float(scores[i])) for i in top]
+
+    def save(self, folder_path):
+        """Writes the index as lexical.json (vocabulary, ids) and one lexical_<name>.npy per posting array."""
+        if self.deleted:
+            self.compact()
+        terms = list(self.postings)
+        lengths = np.array([len(self.postings[term][0]) for term in terms], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        docs = np.concatenate([np.asarray(self.postings[t][0], dtype=np.uint32) for t in terms]) if terms else np.zeros(0, np.uint32)
+        tfs = np.concatenate([np.asarray(self.postings[t][1], dtype=np.uint16) for t in terms]) if terms else np.zeros(0, np.uint16)
+
+        arrays = {"offsets": offsets, "docs": docs, "tfs": tfs, "doc_lens": np.asarray(self.doc_lens, dtype=np.uint32)}
+        for name, values in arrays.items():
+            np.save(os.path.join(folder_path, f"lexical_{name}.npy"), values)
+        with open(os.path.join(folder_path, "lexical.json"), "w", encoding="utf-8") as f:
+            json.dump({"terms": terms, "doc_keys": self.doc_keys}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder_path):
+        """
+        Loads an index written by save(); returns None if the folder has none.
+        The posting arrays are memory-mapped, so processes reading the same
+        index share them through the page cache.
+        """
+        json_path = os.path.join(folder_path, "lexical.json")
+        if not os.path.exists(json_path):
+            return None
+        with open(json_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if os.path.exists(os.path.join(folder_path, "lexical_offsets.npy")):
+            offsets, docs, tfs, doc_lens = (
+                np.load(os.path.join(folder_path, f"lexical_{name}.npy"), mmap_mode="r", allow_pickle=False)
+                for name in ("offsets", "docs", "tfs", "doc_lens")
+            )
+        else:
+            # Written before the arrays were stored separately
+            with np.load(os.path.join(folder_path, "lexical.npz"), allow_pickle=False) as arrays:
+                offsets, docs, tfs = arrays["offsets"], arrays["docs"], arrays["tfs"]
+                doc_lens = arrays["doc_lens"]
+
+        index = cls()
+        index.doc_keys = meta["doc_keys"]
+        index._doc_numbers = {doc_key: doc_no for doc_no, doc_key in enumerate(index.doc_keys)}
+        index.doc_lens = array("I", doc_lens.astype(np.uint32).tobytes())
+        index.total_len = int(doc_lens.sum())
+        index.postings = {term: (docs[offsets[i]:offsets[i + 1]], tfs[offsets[i]:offsets[i + 1]])
+                          for i, term in enumerate(meta["terms"])}
+        return index
+
+    @classmethod
+    def from_vector_store(cls, vector_store):
+        """Builds an index from the chunks already stored in a FAISS vector store."""
+        index = cls()
+        doc_keys = list(vector_store.index_to_docstore_id.values())
+        index.add(doc_keys, (vector_store.docstore.search(doc_key).page_content for doc_key in doc_keys))
+        return index
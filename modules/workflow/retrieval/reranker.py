@@ -0,0 +1,101 @@
+import numpy as np
+
+MMR_LAMBDA = 0.5   # weight of relevance against novelty (1.0 = plain relevance order), as LangChain's default
+MIN_SCORE = 0.6    # candidates scoring below this share of the best candidate are dropped
+RRF_K = 60         # reciprocal-rank-fusion damping constant
+
+
+def unit_rows(vectors):
+    """Scales every row to unit length (all-zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def reciprocal_rank_fusion(*ranks, k=RRF_K):
+    """
+    Fuses several rankings of the same candidates. Each ranks array holds the
+    1-based position of every candidate in one ranking, 0 where the ranking
+    does not contain it; a candidate scores the sum of 1 / (k + rank).
+    """
+    fused = np.zeros(len(ranks[0]), dtype=np.float32)
+    for rank in ranks:
+        rank = np.asarray(rank, dtype=np.float32)
+        fused += np.where(rank > 0, 1.0 / (k + rank), 0.0).astype(np.float32)
+    return fused
+
+
+def combined_relevance(dense, lexical, groups):
+    """
+    Turns each candidate's cosine similarity and BM25 score into one score
+    in [0, 1] for the min_score threshold: each channel is divided by its
+    best candidate (the dense one per embedding model group, since
+    similarities of different models are not comparable) and a candidate
+    scores as its better channel, so exact citation matches are not lost to
+    the threshold.
+    """
+    dense = np.clip(np.asarray(dense, dtype=np.float32), 0.0, None)
+    lexical = np.clip(np.asarray(lexical, dtype=np.float32), 0.0, None)
+    groups = np.asarray(groups)
+
+    scaled_dense = np.zeros_like(dense)
+    for group in np.unique(groups):
+        members = groups == group
+        best = dense[members].max()
+        if best > 0:
+            scaled_dense[members] = dense[members] / best
+    best_lexical = lexical.max() if len(lexical) else 0.0
+    scaled_lexical = lexical / best_lexical if best_lexical > 0 else np.zeros_like(lexical)
+    return np.maximum(scaled_dense, scaled_lexical)
+
+
+def mmr_rerank(relevance, vectors, k, categories=None, quotas=None, groups=None,
+               lambda_mult=MMR_LAMBDA, min_score=0.0, scores=None):
+    """
+    Selects up to k candidates by maximal marginal relevance.
+
+    Each step picks the candidate maximising
+    lambda_mult * relevance - (1 - lambda_mult) * (highest similarity to an
+    already selected candidate). Only the similarity row of the newly selected
+    candidate is computed, so a pool of n d-dimensional unit `vectors` costs
+    O(k * n * d). Candidates whose `scores` (default: relevance) are below
+    min_score are never selected, and once
+    quotas[c] candidates of categories == c are selected the rest of that
+    category is skipped. Similarities only count between candidates of the
+    same `groups` value (vectors of different embedding models, zero-padded
+    to one width, are never compared).
+
+    Returns:
+        list: indices of the selected candidates, in selection order.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    vectors = np.asarray(vectors, dtype=np.float32)
+    categories = np.zeros(n, dtype=np.int64) if categories is None else np.asarray(categories)
+    groups = None if groups is None else np.asarray(groups)
+    remaining = None if quotas is None else np.asarray(quotas, dtype=np.int64).copy()
+
+    available = (relevance if scores is None else np.asarray(scores, dtype=np.float32)) >= min_score
+    if remaining is not None:
+        available &= remaining[categories] > 0
+    redundancy = np.zeros(n, dtype=np.float32)
+    selected = []
+    while len(selected) < k and available.any():
+        scores = np.where(available, lambda_mult * relevance - (1.0 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+
+        if remaining is not None:
+            category = categories[best]
+            remaining[category] -= 1
+            if remaining[category] <= 0:
+                available &= categories != category
+
+        similarity = vectors @ vectors[best]
+        if groups is not None:
+            similarity = np.where(groups == groups[best], similarity, 0.0)
+        np.maximum(redundancy, similarity, out=redundancy)
+    return selected
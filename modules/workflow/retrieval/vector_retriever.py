@@ -1,19 +1,242 @@
 import os
+import weakref
+import contextvars
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from langchain.docstore.document import Document
 from modules.workflow.document.vector_db import VectorStore
-from modules.utils.log_decorator import log_retrieved_docs
+from modules.workflow.document.embeddings import embeddings_for
+from modules.workflow.retrieval.reranker import (unit_rows, reciprocal_rank_fusion, combined_relevance, mmr_rerank,
+                                                  MMR_LAMBDA, MIN_SCORE)
+from modules.utils.log_decorator import log_retrieved_docs, log_retrieved_batch
+from modules.utils import metrics
 
 log_dir = "logs"
 os.makedirs(log_dir, exist_ok=True)
 
+FETCH_K = 20     # candidates taken from each of the dense and lexical rankings
+FINAL_K = 6      # documents passed on after re-ranking, across all categories
+# Most documents one category may contribute to the final set
+CATEGORY_QUOTAS = {"Laws": 4, "Case": 4}
+
+# Docstore id -> vector position of each loaded store, to look up the stored
+# vectors of lexical-only candidates; dropped with the store
+_positions = weakref.WeakKeyDictionary()
+
+# Categories are searched in parallel; FAISS releases the GIL while searching
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="faiss-search")
+
+
+def _search_categories(search, db_names):
+    """Runs search(db_name) for every category on the search pool, keeping the caller's trace context."""
+    with metrics.stage("search"):
+        futures = [_search_pool.submit(contextvars.copy_context().run, search, db_name) for db_name in db_names]
+        return dict(zip(db_names, (future.result() for future in futures)))
+
+
+def _embed_queries(embedder, questions):
+    """Embeds a list of questions with one batched call when the embeddings model supports it."""
+    if hasattr(embedder, "embed_queries"):
+        return embedder.embed_queries(questions)
+    return [embedder.embed_query(question) for question in questions]
+
+
+def embed_questions(questions, db_names):
+    """
+    Embeds questions for searching the given categories: once per embedding
+    model the categories use, not once per category.
+
+    Returns:
+        dict: {db_name: [vector, ...]} with one vector per question, in input order.
+    """
+    by_model = {}
+    vectors = {}
+    for db_name in db_names:
+        embedder = embeddings_for(db_name)
+        if embedder.model_name not in by_model:
+            by_model[embedder.model_name] = _embed_queries(embedder, questions)
+        vectors[db_name] = by_model[embedder.model_name]
+    return vectors
+
+
+def embed_question(question, db_names):
+    """Embeds one question for the given categories; returns {db_name: vector}."""
+    return {db_name: vectors[0] for db_name, vectors in embed_questions([question], db_names).items()}
+
+
+def _stored_vector(db, doc_id):
+    """Returns the vector stored for a docstore id, or None if the index cannot reconstruct it (IVF)."""
+    positions = _positions.get(db)
+    if positions is None:
+        positions = _positions[db] = {value: key for key, value in db.index_to_docstore_id.items()}
+    try:
+        return db.index.reconstruct(positions[doc_id])
+    except (KeyError, RuntimeError):
+        return None
+
+
 class VectorRetriever:
+    @staticmethod
+    def candidate_pools(db_name, user_questions, query_vectors, fetch_k=FETCH_K):
+        """
+        First retrieval stage: over-fetches the fetch_k best dense and fetch_k
+        best BM25 candidates of one category for every question, with one
+        FAISS search (which also returns the stored vectors) for all of them.
+
+        Returns:
+            list: per question, None if the category has no index, else a pool
+            dict with the candidates' docstore "ids", unit "vectors", cosine
+            similarity to the question ("dense"), BM25 score ("lexical") and
+            the reciprocal-rank fusion of both rankings ("fused").
+        """
+        db = VectorStore.load_VDB(db_name)
+        if db is None or db.index.ntotal == 0:
+            return [None for _ in user_questions]
+
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        n = min(fetch_k, db.index.ntotal)
+        try:
+            _, labels, found = db.index.search_and_reconstruct(queries, n)
+        except RuntimeError:
+            _, labels = db.index.search(queries, n)
+            found = [None] * len(user_questions)
+        lexical_index = VectorStore.load_lexical(db_name)
+        model = embeddings_for(db_name).model_name
+
+        pools = []
+        for user_question, query, row, row_vectors in zip(user_questions, unit_rows(queries), labels, found):
+            dense = {db.index_to_docstore_id[label]: (row_vectors[j] if row_vectors is not None else None)
+                     for j, label in enumerate(row) if label != -1}
+            lexical = dict(lexical_index.search(user_question, fetch_k)) if lexical_index else {}
+            ids = list(dict.fromkeys([*dense, *lexical]))
+            dense_rank = {doc_id: rank for rank, doc_id in enumerate(dense, start=1)}
+            lexical_rank = {doc_id: rank for rank, doc_id in enumerate(lexical, start=1)}
+
+            vectors = np.zeros((len(ids), db.index.d), dtype=np.float32)
+            for j, doc_id in enumerate(ids):
+                vector = dense.get(doc_id)
+                if vector is None:
+                    vector = _stored_vector(db, doc_id)
+                if vector is not None:
+                    vectors[j] = vector
+            vectors = unit_rows(vectors)
+            pools.append({
+                "store": db,
+                "model": model,
+                "ids": ids,
+                "vectors": vectors,
+                "dense": vectors @ query,
+                "lexical": np.array([lexical.get(doc_id, 0.0) for doc_id in ids], dtype=np.float32),
+                "fused": reciprocal_rank_fusion([dense_rank.get(doc_id, 0) for doc_id in ids],
+                                                [lexical_rank.get(doc_id, 0) for doc_id in ids]),
+            })
+        return pools
+
+    @staticmethod
+    def rerank(pools, k=FINAL_K, quotas=None, lambda_mult=MMR_LAMBDA, min_score=MIN_SCORE):
+        """
+        Second retrieval stage: picks a small, diverse set from the candidate
+        pools of all categories ({db_name: pool or None}) with maximal
+        marginal relevance, at most quotas[db_name] per category. Relevance is
+        each candidate's reciprocal-rank fusion of its dense and BM25 ranks,
+        scaled to the best candidate. Rank fusion keeps no absolute score, so
+        the min_score threshold applies to the scaled similarity and BM25
+        scores instead (see combined_relevance).
+
+        Returns:
+            dict: {db_name: [Document, ...]}, each list in selection order.
+            Every document's metadata carries its "retrieval_rank" in the
+            selection across all categories (1 = picked first) and its
+            "retrieval_score" (the scaled fused relevance).
+        """
+        quotas = CATEGORY_QUOTAS if quotas is None else quotas
+        present = [(db_name, pool) for db_name, pool in pools.items() if pool and pool["ids"]]
+        results = {db_name: [] for db_name in pools}
+        if not present:
+            return results
+
+        models = sorted({pool["model"] for _, pool in present})
+        sizes = [len(pool["ids"]) for _, pool in present]
+        vectors = np.zeros((sum(sizes), max(pool["vectors"].shape[1] for _, pool in present)), dtype=np.float32)
+        start = 0
+        for (_, pool), size in zip(present, sizes):
+            vectors[start:start + size, :pool["vectors"].shape[1]] = pool["vectors"]
+            start += size
+        categories = np.repeat(np.arange(len(present)), sizes)
+        groups = np.repeat([models.index(pool["model"]) for _, pool in present], sizes)
+        offsets = np.cumsum([0, *sizes])
+
+        fused = np.concatenate([pool["fused"] for _, pool in present])
+        relevance = fused / fused.max()
+        scores = combined_relevance(
+            np.concatenate([pool["dense"] for _, pool in present]),
+            np.concatenate([pool["lexical"] for _, pool in present]),
+            groups,
+        )
+        selected = mmr_rerank(
+            relevance, vectors, k, categories, [quotas.get(db_name, k) for db_name, _ in present], groups,
+            lambda_mult=lambda_mult, min_score=min_score, scores=scores,
+        )
+        for position, i in enumerate(selected, start=1):
+            db_name, pool = present[categories[i]]
+            doc = pool["store"].docstore.search(pool["ids"][i - offsets[categories[i]]])
+            # A copy, so the docstore's own document is never modified
+            metadata = {**doc.metadata, "retrieval_rank": position, "retrieval_score": round(float(relevance[i]), 4)}
+            results[db_name].append(Document(page_content=doc.page_content, metadata=metadata))
+        return results
+
     @staticmethod
     @log_retrieved_docs
-    def retrieve_faiss(user_question, db_names):
-        """Retrieves relevant documents from multiple FAISS vector stores."""
-        retrieved_docs = {}
+    def retrieve_faiss(user_question, db_names, query_vectors=None):
+        """
+        Retrieves relevant documents from multiple FAISS vector stores.
+
+        The question is embedded once per embedding model in use (unless its
+        query_vectors, {db_name: vector}, are passed in) and every category is
+        searched in parallel, over-fetching dense and BM25 candidates so exact
+        section numbers and citations are not missed. The candidates of all
+        categories are then re-ranked together with MMR, so near-duplicate
+        overlapping chunks do not fill the context.
+        """
+        if not any(VectorStore.index_signature(db_name) for db_name in db_names):
+            return {db_name: [] for db_name in db_names}
+
+        if query_vectors is None:
+            with metrics.stage("question_embedding"):
+                query_vectors = embed_question(user_question, db_names)
+
+        def search(db_name):
+            return VectorRetriever.candidate_pools(db_name, [user_question], [query_vectors[db_name]])[0]
+
+        pools = _search_categories(search, db_names)
+        with metrics.stage("rerank"):
+            return VectorRetriever.rerank(pools)
+
+    @staticmethod
+    @log_retrieved_batch
+    def retrieve_faiss_batch(user_questions, db_names, query_vectors=None):
+        """
+        Retrieves documents for many questions at once.
+
+        All questions are embedded in one batched call per embedding model
+        (unless query_vectors, {db_name: [vector, ...]}, are passed in), each
+        category is searched once with the whole matrix of query vectors and
+        every question's candidates are re-ranked like in retrieve_faiss.
+
+        Returns:
+            list: one {db_name: [Document, ...]} dict per question, in input order.
+        """
+        if not user_questions or not any(VectorStore.index_signature(db_name) for db_name in db_names):
+            return [{db_name: [] for db_name in db_names} for _ in user_questions]
+
+        if query_vectors is None:
+            with metrics.stage("question_embedding"):
+                query_vectors = embed_questions(user_questions, db_names)
 
-        for db_name in db_names:
-            db = VectorStore.load_VDB(db_name)
-            retrieved_docs[db_name] = db.similarity_search(user_question) if db else []
+        def search(db_name):
+            return VectorRetriever.candidate_pools(db_name, user_questions, query_vectors[db_name])
 
-        return retrieved_docs
+        per_category = _search_categories(search, db_names)
+        with metrics.stage("rerank"):
+            return [VectorRetriever.rerank({db_name: per_category[db_name][i] for db_name in db_names})
+                    for i in range(len(user_questions))]
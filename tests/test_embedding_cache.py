@@ -0,0 +1,85 @@
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from modules.workflow.document.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+def vector(text):
+    return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+
+class CountingEmbedder:
+    """Plain callable embedder that records every batch it is asked to embed."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [vector(text) for text in texts]
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return vector(text)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "embeddings.sqlite")
+
+
+def test_hits_and_misses(cache_path):
+    model = CountingEmbeddings()
+    embedder = CachedEmbeddings(model, EmbeddingCache("model-a", path=cache_path))
+
+    assert embedder.embed_documents(["a", "bb"]) == [vector("a"), vector("bb")]
+    assert (embedder.hits, embedder.misses) == (0, 2)
+
+    assert embedder.embed_documents(["bb", "ccc", "a"]) == [vector("bb"), vector("ccc"), vector("a")]
+    assert (embedder.hits, embedder.misses) == (2, 3)
+    assert model.batches == [["a", "bb"], ["ccc"]]
+
+
+def test_duplicate_texts_in_one_batch_are_embedded_once(cache_path):
+    model = CountingEmbeddings()
+    embedder = CachedEmbeddings(model, EmbeddingCache("model-a", path=cache_path))
+
+    assert embedder.embed_documents(["a", "b", "a", "a"]) == [vector("a"), vector("b"), vector("a"), vector("a")]
+    assert model.batches == [["a", "b"]]
+    assert embedder.misses == 2
+    assert len(embedder.cache) == 2
+
+
+def test_cache_persists_across_reopen(cache_path):
+    first = CachedEmbeddings(CountingEmbeddings(), EmbeddingCache("model-a", path=cache_path))
+    first.embed_documents(["a", "bb"])
+
+    model = CountingEmbeddings()
+    reopened = CachedEmbeddings(model, EmbeddingCache("model-a", path=cache_path))
+    assert reopened.embed_documents(["a", "bb"]) == [vector("a"), vector("bb")]
+    assert (reopened.hits, reopened.misses) == (2, 0)
+    assert model.batches == []
+
+    # Another model name never reuses these vectors
+    other = CachedEmbeddings(CountingEmbeddings(), EmbeddingCache("model-b", path=cache_path))
+    other.embed_documents(["a"])
+    assert (other.hits, other.misses) == (0, 1)
+
+
+def test_plain_callable_embedder(cache_path):
+    model = CountingEmbedder()
+    embedder = CachedEmbeddings(model, EmbeddingCache("model-a", path=cache_path))
+
+    assert embedder.embed_documents(["a", "bb"]) == [vector("a"), vector("bb")]
+    assert embedder.embed_documents(["a"]) == [vector("a")]
+    assert embedder.embed_query("question") == vector("question")
+    assert model.batches == [["a", "bb"], ["question"]]
+    assert (embedder.hits, embedder.misses) == (1, 2)
@@ -0,0 +1,19 @@
+import io
+
+from benchmarks.common import write_synthetic_pdf
+from modules.workflow.document.datapreprocess import DocumentProcessor, PARALLEL_MIN_PAGES
+
+
+def test_parallel_extraction_matches_serial(tmp_path):
+    first = write_synthetic_pdf(str(tmp_path / "first.pdf"), PARALLEL_MIN_PAGES + 13)
+    with open(write_synthetic_pdf(str(tmp_path / "second.pdf"), 21, seed=1), "rb") as f:
+        second = f.read()
+
+    serial = DocumentProcessor([first, io.BytesIO(second)], workers=1).extract_pages()
+    parallel = DocumentProcessor([first, io.BytesIO(second)], workers=4).extract_pages()
+
+    assert [len(pages) for pages in parallel] == [PARALLEL_MIN_PAGES + 13, 21]
+    assert parallel == serial
+    for pages in parallel:
+        # Every synthetic page opens with its own section number, so this also checks page order
+        assert [page.split("\n")[0].strip() for page in pages] == [f"Section {n}.1" for n in range(1, len(pages) + 1)]
@@ -0,0 +1,53 @@
+import time
+import asyncio
+
+import httpx
+
+from benchmarks.common import StubEmbedder, StubLLM
+from modules.fastapi.services import model_handler
+from modules.fastapi.services.answer_cache import answer_cache
+from modules.workflow.document import embeddings
+
+REQUESTS = 8
+RETRIEVAL_LATENCY = 0.05
+LLM_LATENCY = 0.4
+
+
+def slow_retrieval(user_question, db_names, *args):
+    time.sleep(RETRIEVAL_LATENCY)
+    return {db_name: [] for db_name in db_names}
+
+
+async def post_queries(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        async def one(i):
+            return await client.post("/query/", json={
+                "question": f"What is the punishment under section {i}?",
+                "model_type": "Gemini",
+                "model_name": "stub",
+            })
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+        return time.perf_counter() - start, responses
+
+
+def test_concurrent_queries_are_not_serialized(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    embedder = StubEmbedder(dim=16)
+    for name in embeddings.EMBEDDING_BACKENDS:
+        monkeypatch.setitem(embeddings.EMBEDDING_BACKENDS, name, embeddings.LazyEmbeddings(lambda: embedder, "stub"))
+    monkeypatch.setattr(model_handler.VectorRetriever, "retrieve_faiss", staticmethod(slow_retrieval))
+    monkeypatch.setattr(model_handler, "GeminiPro", StubLLM)
+    monkeypatch.setattr(StubLLM, "latency", LLM_LATENCY)
+    monkeypatch.setattr(model_handler, "log_interaction", lambda **kwargs: None)
+    answer_cache.clear()
+    from fastapi_server import app
+
+    wall, responses = asyncio.run(post_queries(app))
+
+    assert [response.status_code for response in responses] == [200] * REQUESTS
+    assert [response.json()["response"] for response in responses] == [StubLLM.answer] * REQUESTS
+    # One at a time the requests would take REQUESTS * (LLM + retrieval) seconds
+    assert wall < REQUESTS * (LLM_LATENCY + RETRIEVAL_LATENCY) / 3
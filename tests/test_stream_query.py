@@ -0,0 +1,138 @@
+import time
+import json
+import asyncio
+
+import pytest
+
+from benchmarks.common import StubEmbedder, StubLLM
+from modules.fastapi.schemas.query import QueryRequest
+from modules.fastapi.services import model_handler
+from modules.fastapi.services.answer_cache import answer_cache
+from modules.utils import metrics
+from modules.workflow.document import embeddings
+
+
+class FailingLLM(StubLLM):
+    def stream_response(self, retrieved_docs):
+        yield "partial"
+        raise RuntimeError("model crashed")
+
+
+def no_context(question, db_names, query_vectors=None):
+    return {db_name: [] for db_name in db_names}
+
+
+@pytest.fixture
+def interactions(monkeypatch, tmp_path):
+    """Stubs embeddings, retrieval and the LLM; returns the list log_interaction records into."""
+    monkeypatch.chdir(tmp_path)
+    embedder = StubEmbedder(dim=16)
+    for name in embeddings.EMBEDDING_BACKENDS:
+        monkeypatch.setitem(embeddings.EMBEDDING_BACKENDS, name, embeddings.LazyEmbeddings(lambda: embedder, "stub"))
+    monkeypatch.setattr(model_handler.VectorRetriever, "retrieve_faiss", staticmethod(no_context))
+    monkeypatch.setattr(model_handler, "GeminiPro", StubLLM)
+    monkeypatch.setattr(StubLLM, "latency", 0.0)
+    logged = []
+    monkeypatch.setattr(model_handler, "log_interaction", lambda **kwargs: logged.append(kwargs))
+    answer_cache.clear()
+    yield logged
+    answer_cache.clear()
+
+
+def stream(question="What is Section 302?", model_type="Gemini"):
+    """Runs stream_query to completion and returns its events as (name, data) pairs."""
+    async def collect():
+        request = QueryRequest(question=question, model_type=model_type, model_name="stub")
+        return [event async for event in model_handler.stream_query(request)]
+
+    events = []
+    for event in asyncio.run(collect()):
+        name, data = event.strip().split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def stream_outcomes():
+    return {labels[2]: value for _, _, labels, _, value in metrics.QUERIES.samples() if labels[0] == "stream"}
+
+
+def test_tokens_then_done(interactions):
+    events = stream()
+
+    names = [name for name, _ in events]
+    assert names == ["token"] * (len(names) - 1) + ["done"]
+    assert "".join(data["token"] for name, data in events[:-1]) == StubLLM.answer
+    assert events[-1][1]["Connection_type"] == "Gemini"
+    assert [entry["answer"] for entry in interactions] == [StubLLM.answer]
+
+
+def test_cached_answer_is_one_token(interactions):
+    stream()
+    events = stream()
+
+    assert [name for name, _ in events] == ["token", "done"]
+    assert events[0][1]["token"] == StubLLM.answer
+    assert events[1][1]["cached"] is True
+
+
+def test_generation_error(interactions, monkeypatch):
+    monkeypatch.setattr(model_handler, "GeminiPro", FailingLLM)
+    before = stream_outcomes().get("error", 0)
+
+    events = stream()
+
+    assert [name for name, _ in events] == ["token", "error"]
+    assert "model crashed" in events[-1][1]["response"]
+    assert stream_outcomes()["error"] == before + 1
+    assert "model crashed" in interactions[0]["answer"]
+
+
+def test_retrieval_error(interactions, monkeypatch):
+    def broken(question, db_names, query_vectors=None):
+        raise OSError("index unreadable")
+
+    monkeypatch.setattr(model_handler.VectorRetriever, "retrieve_faiss", staticmethod(broken))
+    before = stream_outcomes().get("error", 0)
+
+    events = stream()
+
+    assert [name for name, _ in events] == ["error"]
+    assert "index unreadable" in events[0][1]["response"]
+    assert stream_outcomes()["error"] == before + 1
+    assert len(interactions) == 1
+
+
+def test_invalid_model_type(interactions):
+    events = stream(model_type="Unknown")
+
+    assert [name for name, _ in events] == ["error"]
+    assert "Invalid model type" in events[0][1]["response"]
+    assert len(interactions) == 1
+
+
+def test_timeout_before_generation(interactions, monkeypatch):
+    def slow(question, db_names, query_vectors=None):
+        time.sleep(0.5)
+        return no_context(question, db_names)
+
+    monkeypatch.setattr(model_handler.VectorRetriever, "retrieve_faiss", staticmethod(slow))
+    monkeypatch.setattr(model_handler, "QUERY_TIMEOUT", 0.1)
+
+    events = stream()
+
+    assert [name for name, _ in events] == ["error"]
+    assert "timed out" in events[0][1]["response"]
+    assert len(interactions) == 1
+
+
+def test_timeout_during_generation(interactions, monkeypatch):
+    monkeypatch.setattr(StubLLM, "latency", 2.0)
+    monkeypatch.setattr(model_handler, "QUERY_TIMEOUT", 0.5)
+
+    events = stream()
+
+    names = [name for name, _ in events]
+    assert names[-1] == "error" and set(names[:-1]) == {"token"}
+    assert 0 < len(names) - 1 < len(StubLLM.answer.split(" "))
+    assert "timed out" in events[-1][1]["response"]
+    assert len(interactions) == 1